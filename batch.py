@@ -0,0 +1,168 @@
+"""
+Batch evaluation of stored trails.
+
+Runs collect_all_mountains, follow_path with each personality and difficulty_maximum_paths
+over every trail in some .json files (one trail each) and .jsonl files (one trail per line),
+and writes one JSON result per trail, in input order.
+
+The inputs are split into shards (a whole .json file, or a byte range of a .jsonl file) which
+worker processes read, parse and query themselves, so only file names and results are pickled.
+
+Run with `python batch.py stores/*.json trails.jsonl --workers 4`.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, TextIO
+
+from mountain import Mountain
+from personality import BottomWalker, EasiestWalker, LazyWalker, LongestWalker, TopWalker
+from trail import Trail
+from trail_stream import load, loads
+
+#Personalities every trail is walked with, as well as a LongestWalker for the difficulty given
+PERSONALITIES = (TopWalker, BottomWalker, LazyWalker, EasiestWalker)
+
+#A .json file, or the lines of a .jsonl file that start in [start, end)
+Shard = tuple[str, int, int]
+
+def find_shards(paths: Iterable[str], shard_bytes: int) -> Iterator[Shard]:
+    """
+    Splits the input files into shards, in input order.
+    .jsonl files are cut every shard_bytes bytes, the workers line the cuts up with whole lines.
+    Complexity: O(number of shards)
+    """
+    for path in paths:
+        if path.endswith(".jsonl"):
+            size = os.path.getsize(path)
+            for start in range(0, size, shard_bytes):
+                yield path, start, min(start + shard_bytes, size)
+        else:
+            yield path, 0, -1
+
+def read_shard(path: str, start: int, end: int) -> Iterator[tuple[int, bytes]]:
+    """
+    Yields (offset, text) for every trail in a shard.
+    A .jsonl shard holds the lines that start in [start, end), so a line cut by the shard
+    boundary belongs to the shard it starts in.
+    Complexity: O(size of the shard)
+    """
+    with open(path, "rb") as f:
+        if end < 0:
+            yield 0, f.read()
+            return
+        if start > 0:
+            #Skip the rest of the line that started in the previous shard
+            f.seek(start - 1)
+            f.readline()
+        offset = f.tell()
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                yield offset, line
+            offset += len(line)
+
+def evaluate(trail: Trail, max_difficulty: int, count_paths: bool=False) -> dict[str, Any]:
+    """
+    Runs every query on a trail, with mountains given by name.
+    Complexity: O(n + size of the results) where n is the number of nodes
+    """
+    walkers = [personality() for personality in PERSONALITIES] + [LongestWalker(max_difficulty)]
+    trail.follow_paths(walkers)
+    result: dict[str, Any] = {
+        "mountains": _names(trail.collect_all_mountains()),
+        "walks": {type(walker).__name__: _names(walker.mountains) for walker in walkers},
+    }
+    if count_paths:
+        result["difficulty_maximum_paths"] = trail.compile().count_difficulty_maximum_paths(max_difficulty)
+    else:
+        result["difficulty_maximum_paths"] = [_names(path) for path in trail.difficulty_maximum_paths(max_difficulty)]
+    return result
+
+def _names(mountains: Iterable[Mountain]) -> list[str]:
+    return [mountain.name for mountain in mountains]
+
+def evaluate_shard(shard: Shard, max_difficulty: int, count_paths: bool=False) -> list[str]:
+    """
+    Parses and evaluates every trail in a shard, returning one JSON line per trail.
+    This is what runs in the worker processes.
+    Complexity: O(size of the shard + size of the results)
+    """
+    path, start, end = shard
+    if end < 0:
+        #A whole file is streamed in rather than read as one string, it may be large
+        with open(path, "rb") as f:
+            trails = [(0, load(f))]
+    else:
+        trails = ((offset, loads(text)) for offset, text in read_shard(path, start, end))
+    lines = []
+    for offset, trail in trails:
+        result = {"source": path, "offset": offset}
+        result.update(evaluate(trail, max_difficulty, count_paths))
+        lines.append(json.dumps(result))
+    return lines
+
+def run(paths: Iterable[str], out: TextIO, workers: int|None=None, max_difficulty: int=5,
+        shard_bytes: int=1 << 20, count_paths: bool=False) -> int:
+    """
+    Evaluates every trail in paths and writes the results to out as JSON lines, in input order.
+    Results are written as soon as every shard before them is done, and at most a few shards
+    per worker are waiting at once. workers=0 evaluates in this process.
+    Returns the number of trails evaluated.
+    Complexity: O(total size of the inputs and results), shared between the workers
+    """
+    shards = find_shards(paths, shard_bytes)
+    count = 0
+    def write(lines: list[str]) -> None:
+        nonlocal count
+        for line in lines:
+            out.write(line)
+            out.write("\n")
+        count += len(lines)
+
+    if workers == 0:
+        for shard in shards:
+            write(evaluate_shard(shard, max_difficulty, count_paths))
+        return count
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool:
+        window = 4 * workers
+        pending: deque = deque()
+        for shard in shards:
+            pending.append(pool.submit(evaluate_shard, shard, max_difficulty, count_paths))
+            if len(pending) >= window:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    return count
+
+if __name__ == "__main__":
+
+    p = argparse.ArgumentParser(description="Run the trail queries over stored trails.")
+    p.add_argument("paths", nargs="+", help=".json files holding one trail, or .jsonl files holding one trail per line.")
+    p.add_argument("-w", "--workers", type=int, default=None, help="Worker processes, 0 to run in this process. Defaults to the CPU count.")
+    p.add_argument("-d", "--max-difficulty", type=int, default=5, help="Difficulty passed to difficulty_maximum_paths and LongestWalker.")
+    p.add_argument("-s", "--shard-bytes", type=int, default=1 << 20, help="Bytes of a .jsonl file given to a worker at a time.")
+    p.add_argument("-c", "--count-paths", action="store_true", help="Write the number of difficulty_maximum_paths instead of the paths.")
+    p.add_argument("-o", "--output", default=None, help="File to write the results to. Defaults to standard output.")
+    args = p.parse_args()
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        trails = run(args.paths, out, args.workers, args.max_difficulty, args.shard_bytes, args.count_paths)
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - start
+    workers = args.workers if args.workers is not None else os.cpu_count()
+    print(f"{trails} trails in {elapsed:.2f} s, {trails / elapsed if elapsed else 0:.1f} trails/sec with {workers} workers", file=sys.stderr)
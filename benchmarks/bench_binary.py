@@ -0,0 +1,50 @@
+"""
+JSON stores against binary stores: size, time to the first answer, and time for a full walk.
+
+Run with `python -m benchmarks.bench_binary`.
+"""
+
+from __future__ import annotations
+import os
+import tempfile
+import time
+from itertools import islice
+
+from benchmarks.trails import branchy_trail
+from personality import TopWalker
+from serialize import dump
+import trail_binary
+import trail_stream
+
+def timed(func) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for splits in (1000, 20000, 150000):
+            trail = branchy_trail(splits)
+            json_path = os.path.join(directory, f"{splits}.json")
+            binary_path = os.path.join(directory, f"{splits}.trail")
+            with open(json_path, "w") as f:
+                dump(trail, f)
+            dump_time, _ = timed(lambda: trail_binary.dump(trail, open(binary_path, "wb")))
+            json_size = os.path.getsize(json_path) / 2**20
+            binary_size = os.path.getsize(binary_path) / 2**20
+            print(f"{splits} splits: json {json_size:6.1f} MiB  binary {binary_size:6.1f} MiB (written in {dump_time:5.2f} s)")
+
+            def first_mountains(load):
+                return [mountain.name for mountain in islice(load().iter_follow_path(TopWalker()), 100)]
+            json_first, json_names = timed(lambda: first_mountains(lambda: trail_stream.load(open(json_path, "rb"))))
+            binary_first, binary_names = timed(lambda: first_mountains(lambda: trail_binary.load(binary_path)))
+            assert json_names == binary_names
+            print(f"  first 100 mountains of a walk: json {json_first * 1e3:9.1f} ms  binary {binary_first * 1e3:7.2f} ms")
+
+            json_all, json_count = timed(lambda: len(trail_stream.load(open(json_path, "rb")).collect_all_mountains()))
+            binary_all, binary_count = timed(lambda: len(trail_binary.load(binary_path).collect_all_mountains()))
+            assert json_count == binary_count
+            print(f"  load and collect_all_mountains: json {json_all:6.2f} s  binary {binary_all:6.2f} s")
+
+if __name__ == "__main__":
+    main()
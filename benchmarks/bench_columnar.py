@@ -0,0 +1,60 @@
+"""
+Analytics over millions of mountains: the indexed MountainManager against the columnar one.
+
+Run with `python -m benchmarks.bench_columnar`.
+"""
+
+from __future__ import annotations
+import time
+
+import numpy as np
+
+from columnar_mountain_manager import ColumnarMountainManager
+from mountain import Mountain
+from mountain_manager import MountainManager
+
+def timed(func) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def main() -> None:
+    n = 2_000_000
+    rng = np.random.default_rng(0)
+    names = [f"m{i}" for i in range(n)]
+    difficulties = rng.integers(0, 100, n)
+    lengths = rng.integers(1, 1000, n)
+
+    def build_indexed() -> MountainManager:
+        manager = MountainManager()
+        for name, difficulty, length in zip(names, difficulties.tolist(), lengths.tolist()):
+            manager.add_mountain(Mountain(name, difficulty, length))
+        return manager
+    indexed_time, indexed = timed(build_indexed)
+    columnar_time, columnar = timed(lambda: ColumnarMountainManager.from_columns(names, difficulties, lengths))
+    print(f"{n} mountains built: indexed {indexed_time:7.2f} s   columnar {columnar_time:7.2f} s")
+
+    def mean_lengths(manager: MountainManager) -> dict[int, float]:
+        return {group[0].difficulty_level: sum(m.length for m in group) / len(group) for group in manager.group_by_difficulty()}
+    def max_lengths(manager: MountainManager) -> dict[int, int]:
+        return {group[0].difficulty_level: max(m.length for m in group) for group in manager.group_by_difficulty()}
+    queries = (
+        ("mean length by difficulty", mean_lengths, ColumnarMountainManager.mean_length_by_difficulty),
+        ("max length by difficulty", max_lengths, ColumnarMountainManager.max_length_by_difficulty),
+        ("count_in_range", lambda m: m.count_in_range(20, 40), lambda m: m.count_in_range(20, 40)),
+        ("mountains_with_difficulty", lambda m: len(m.mountains_with_difficulty(7)), lambda m: len(m.mountains_with_difficulty(7))),
+        ("top 10 by length", lambda m: m.top_k_by_length(10, 50), lambda m: m.top_k_by_length(10, 50)),
+        ("remove then count", lambda m: (m.remove_mountain(m.mountains_with_difficulty(3)[0]), m.count_in_range(0, 99))[1],
+                              lambda m: (m.remove_mountain(m.mountains_with_difficulty(3)[0]), m.count_in_range(0, 99))[1]),
+    )
+    for name, on_indexed, on_columnar in queries:
+        indexed_time, expected = timed(lambda: on_indexed(indexed))
+        columnar_time, result = timed(lambda: on_columnar(columnar))
+        if isinstance(expected, dict):
+            assert expected.keys() == result.keys() and all(abs(expected[k] - result[k]) < 1e-6 for k in expected)
+        else:
+            assert expected == result
+        print(f"  {name:>26}: indexed {indexed_time * 1e3:9.2f} ms   columnar {columnar_time * 1e3:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
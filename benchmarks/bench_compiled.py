@@ -0,0 +1,37 @@
+"""
+Repeated queries on the Trail object graph against the same queries on a CompiledTrail.
+
+Run with `python -m benchmarks.bench_compiled`.
+"""
+
+from __future__ import annotations
+import time
+
+from benchmarks.trails import branchy_trail, series_trail
+from personality import LazyWalker, TopWalker
+
+def timed(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def compare(name: str, on_trail, on_compiled) -> None:
+    slow, fast = timed(on_trail), timed(on_compiled)
+    print(f"  {name:<40} trail {slow * 1e3:9.2f} ms  compiled {fast * 1e3:9.2f} ms  x{slow / fast:5.1f}")
+
+def main() -> None:
+    for label, trail in [("series of 200k mountains", series_trail(200_000)), ("14 splits, 6 mountains each", branchy_trail(14, branch_length=6))]:
+        start = time.perf_counter()
+        compiled = trail.compile()
+        print(f"{label}: {len(compiled)} nodes compiled in {(time.perf_counter() - start) * 1e3:.1f} ms")
+        compare("collect_all_mountains", trail.collect_all_mountains, compiled.collect_all_mountains)
+        compare("follow_path TopWalker", lambda: trail.follow_path(TopWalker()), lambda: compiled.follow_path(TopWalker()))
+        compare("follow_path LazyWalker", lambda: trail.follow_path(LazyWalker()), lambda: compiled.follow_path(LazyWalker()))
+        compare("difficulty_maximum_paths(9)", lambda: trail.difficulty_maximum_paths(9), lambda: compiled.difficulty_maximum_paths(9))
+        compare("count of difficulty_maximum_paths(9)", lambda: sum(1 for _ in trail.iter_difficulty_maximum_paths(9, views=True)), lambda: compiled.count_difficulty_maximum_paths(9))
+
+if __name__ == "__main__":
+    main()
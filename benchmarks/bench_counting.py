@@ -0,0 +1,38 @@
+"""
+Counting paths under a total difficulty by enumeration against Trail.count_paths_by_total_difficulty.
+
+Run with `python -m benchmarks.bench_counting`.
+"""
+
+from __future__ import annotations
+import time
+
+from benchmarks.trails import branchy_trail
+from trail import iter_paths
+
+def enumerate_count(trail, max_diff: int) -> int:
+    return sum(1 for path, _ in iter_paths(trail) if sum(m.difficulty_level for m in path) <= max_diff)
+
+def _short(count: int) -> str:
+    text = str(count)
+    return text if len(text) <= 8 else f"~10^{len(text) - 1}"
+
+def main() -> None:
+    #Count once on a small trail first, so the first timing does not include importing NumPy
+    branchy_trail(1).count_paths_by_total_difficulty(0)
+    for splits in (8, 12, 16, 200, 2000):
+        trail = branchy_trail(splits, branch_length=3, max_difficulty=3)
+        max_diff = splits * 5
+        start = time.perf_counter()
+        count = trail.count_paths_by_total_difficulty(max_diff)
+        dp = time.perf_counter() - start
+        if splits <= 16:
+            start = time.perf_counter()
+            assert enumerate_count(trail, max_diff) == count
+            listed = f"{time.perf_counter() - start:9.4f} s"
+        else:
+            listed = "      n/a"
+        print(f"{splits:>5} splits: {_short(count):>10} paths under {max_diff:>5}  enumerate {listed}  count_paths_by_total_difficulty {dp:8.4f} s")
+
+if __name__ == "__main__":
+    main()
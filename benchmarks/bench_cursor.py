@@ -0,0 +1,57 @@
+"""
+Scripted edits: finding the node by searching the trail, against going straight to its address.
+
+Run with `python -m benchmarks.bench_cursor`.
+"""
+
+from __future__ import annotations
+import random
+import time
+
+from benchmarks.trails import balanced_trail
+from mountain import Mountain
+from trail import Trail, TrailSeries, TrailSplit
+from trail_cursor import TrailCursor
+
+def search_address(root: Trail, name: str) -> str:
+    """Walks the trail until the series with the mountain called name turns up."""
+    stack = [(root, "")]
+    while stack:
+        trail, address = stack.pop()
+        store = trail.store
+        if isinstance(store, TrailSeries):
+            if store.mountain.name == name:
+                return address
+            stack.append((store.following, address + "F"))
+        elif isinstance(store, TrailSplit):
+            stack.append((store.following, address + "F"))
+            stack.append((store.bottom, address + "B"))
+            stack.append((store.top, address + "T"))
+    raise KeyError(name)
+
+def main() -> None:
+    for depth in (10, 14, 17):
+        root = balanced_trail(depth)
+        rng = random.Random(depth)
+        #Random mountains on the innermost branches
+        addresses = [" ".join("F" + rng.choice("TB") for _ in range(depth)) for _ in range(200)]
+        names = [TrailCursor(root, address).store.mountain.name for address in addresses]
+
+        start = time.perf_counter()
+        searched = root
+        for name in names:
+            searched = TrailCursor(searched, search_address(searched, name)).add_mountain_after(Mountain("new", 1, 1))
+        search_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        addressed = root
+        for address in addresses:
+            addressed = TrailCursor(addressed, address).add_mountain_after(Mountain("new", 1, 1))
+        address_time = time.perf_counter() - start
+
+        assert searched == addressed
+        nodes = sum(1 for _ in root.collect_all_mountains())
+        print(f"{nodes:>7} mountains, 200 edits: search then edit {search_time * 1e3:9.2f} ms  by address {address_time * 1e3:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Many versions of one trail, made by persistent edits: one plain store per version against one DAG store.
+
+Run with `python -m benchmarks.bench_dag`.
+"""
+
+from __future__ import annotations
+import io
+import json
+import random
+import time
+
+from benchmarks.trails import balanced_trail
+from mountain import Mountain
+from serialize import deserialize_dag, dump, dump_dag
+from trail_cursor import TrailCursor
+from trail_stream import loads
+
+def timed(func) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def main() -> None:
+    for depth, edits in ((8, 100), (11, 200)):
+        rng = random.Random(depth)
+        versions = [balanced_trail(depth)]
+        for i in range(edits):
+            address = " ".join("F" + rng.choice("TB") for _ in range(rng.randint(0, depth)))
+            versions.append(TrailCursor(versions[-1], address).replace_mountain(Mountain(f"edit{i}", i % 10, 1)))
+
+        def plain() -> str:
+            out = io.StringIO()
+            for version in versions:
+                dump(version, out)
+                out.write("\n")
+            return out.getvalue()
+        def dag() -> str:
+            out = io.StringIO()
+            dump_dag(versions, out)
+            return out.getvalue()
+        plain_write, plain_text = timed(plain)
+        dag_write, dag_text = timed(dag)
+        plain_read, plain_versions = timed(lambda: [loads(line) for line in plain_text.splitlines()])
+        dag_read, dag_versions = timed(lambda: deserialize_dag(json.loads(dag_text)))
+        assert plain_versions == dag_versions == versions
+
+        print(f"{len(versions)} versions of {len(versions[0].collect_all_mountains())} mountains:")
+        print(f"  plain {len(plain_text) / 2**20:7.2f} MiB  written {plain_write:6.2f} s  read {plain_read:6.2f} s")
+        print(f"  dag   {len(dag_text) / 2**20:7.2f} MiB  written {dag_write:6.2f} s  read {dag_read:6.2f} s")
+
+if __name__ == "__main__":
+    main()
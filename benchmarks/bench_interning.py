@@ -0,0 +1,71 @@
+"""
+Memory and equality checks of deserialized trails, plain against interned.
+
+Run with `python -m benchmarks.bench_interning`.
+"""
+
+from __future__ import annotations
+import time
+import tracemalloc
+
+from benchmarks.trails import branchy_trail
+from serialize import deserialize
+from trail import TrailSeries, fold_postorder, trail_children
+from trail_interner import TrailInterner
+
+def stored(trail) -> dict:
+    """The dicts serialize makes, built without recursing."""
+    def combine(current, *children):
+        store = current.store
+        if store is None:
+            return {"store": None}
+        if isinstance(store, TrailSeries):
+            mountain = store.mountain
+            return {"store": {"mountain": {"name": mountain.name, "difficulty_level": mountain.difficulty_level, "length": mountain.length}, "following": children[0]}}
+        return {"store": dict(zip(("top", "bottom", "following"), children))}
+    return fold_postorder(trail, trail_children, combine)
+
+def load(stored, interner=None) -> tuple[float, int, object]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    trail = deserialize(stored, interner)
+    elapsed = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, held, trail
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main() -> None:
+    for splits in (1000, 10000):
+        trail_store = stored(branchy_trail(splits, branch_length=2, max_difficulty=1))
+        #Few distinct mountains, so most branches repeat
+        for mountain in _stored_mountains(trail_store):
+            mountain["name"] = f"m{mountain['difficulty_level']}"
+        plain_time, plain_held, plain = load(trail_store)
+        interner = TrailInterner()
+        interned_time, interned_held, interned = load(trail_store, interner)
+        twin = deserialize(trail_store, interner)
+        print(f"{splits} splits: plain {plain_time:7.3f} s {plain_held / 2**20:7.2f} MiB   "
+              f"interned {interned_time:7.3f} s {interned_held / 2**20:7.2f} MiB ({len(interner)} canonical nodes)")
+        other = deserialize(trail_store)
+        print(f"  equality: plain {timed(lambda: plain == other) * 1e3:8.2f} ms   "
+              f"interned {timed(lambda: interned == twin) * 1e6:8.2f} us")
+
+def _stored_mountains(obj: dict):
+    stack = [obj]
+    while stack:
+        store = stack.pop()["store"]
+        if store is None:
+            continue
+        if "mountain" in store:
+            yield store["mountain"]
+            stack.append(store["following"])
+        else:
+            stack.extend((store["top"], store["bottom"], store["following"]))
+
+if __name__ == "__main__":
+    main()
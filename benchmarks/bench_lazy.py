@@ -0,0 +1,39 @@
+"""
+Time to the first answer from parsed stores: building every node up front against building them as they are read.
+
+Run with `python -m benchmarks.bench_lazy`.
+"""
+
+from __future__ import annotations
+import time
+from itertools import islice
+
+from benchmarks.bench_interning import stored
+from benchmarks.trails import balanced_trail, branchy_trail
+from personality import TopWalker
+from serialize import deserialize
+
+def timed(func) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def main() -> None:
+    for label, trail in (("branchy, 100k splits", branchy_trail(100000)), ("balanced, depth 16", balanced_trail(16))):
+        obj = stored(trail)
+        queries = {
+            "first 100 mountains of a walk": lambda root: [m.name for m in islice(root.iter_follow_path(TopWalker()), 100)],
+            "whole TopWalker walk": lambda root: [m.name for m in root.iter_follow_path(TopWalker())],
+        }
+        print(f"{label}:")
+        for name, query in queries.items():
+            eager_time, eager = timed(lambda: query(deserialize(obj)))
+            lazy_time, lazy = timed(lambda: query(deserialize(obj, lazy=True)))
+            assert eager == lazy
+            print(f"  {name:>30}: eager {eager_time * 1e3:9.2f} ms  lazy {lazy_time * 1e3:9.2f} ms")
+        eager_time, _ = timed(lambda: deserialize(obj).collect_all_mountains())
+        lazy_time, _ = timed(lambda: deserialize(obj, lazy=True).collect_all_mountains())
+        print(f"  {'collect_all_mountains':>30}: eager {eager_time * 1e3:9.2f} ms  lazy {lazy_time * 1e3:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
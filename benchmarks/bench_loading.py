@@ -0,0 +1,62 @@
+"""
+Loading a stored trail: json.loads then deserialize, against the streaming loader.
+
+Run with `python -m benchmarks.bench_loading`.
+"""
+
+from __future__ import annotations
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.trails import branchy_trail
+from serialize import deserialize, dump
+from trail import Trail
+from trail_stream import load
+
+def measured(func) -> tuple[float, float, object]:
+    """Runs func twice, returning its time untraced, its peak traced memory in MiB and its result."""
+    gc.collect()
+    start = time.perf_counter()
+    try:
+        result = func()
+    except RecursionError:
+        return time.perf_counter() - start, 0.0, None
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, result
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for splits in (100, 500, 20000, 150000):
+            path = os.path.join(directory, f"{splits}.json")
+            with open(path, "w") as f:
+                dump(branchy_trail(splits), f)
+            size = os.path.getsize(path) / 2**20
+
+            def with_json() -> Trail:
+                with open(path) as f:
+                    return deserialize(json.loads(f.read()))
+            def streamed() -> Trail:
+                with open(path, "rb") as f:
+                    return load(f)
+            json_time, json_peak, json_trail = measured(with_json)
+            stream_time, stream_peak, stream_trail = measured(streamed)
+            #Peak of the Trail alone, for comparison
+            _, trail_size, _ = measured(lambda: branchy_trail(splits))
+            if json_trail is not None:
+                assert json_trail == stream_trail
+            json_text = f"{json_time:6.2f} s {json_peak:8.1f} MiB" if json_trail is not None else "RecursionError"
+            print(f"{size:6.1f} MiB store: json.loads + deserialize {json_text:>22}   "
+                  f"streamed {stream_time:6.2f} s {stream_peak:8.1f} MiB   (trail alone {trail_size:6.1f} MiB)")
+
+if __name__ == "__main__":
+    main()
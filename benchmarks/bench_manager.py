@@ -0,0 +1,106 @@
+"""
+MountainManager on a list against the indexed MountainManager, with editor-like calls on a large manager.
+
+Run with `python -m benchmarks.bench_manager`.
+"""
+
+from __future__ import annotations
+import random
+import time
+
+from mountain import Mountain
+from mountain_manager import MountainManager
+
+class ListMountainManager:
+    """The list-based manager MountainManager replaced."""
+
+    def __init__(self) -> None:
+        self.mountains = []
+
+    def add_mountain(self, mountain: Mountain) -> None:
+        self.mountains.append(mountain)
+
+    def remove_mountain(self, mountain: Mountain) -> None:
+        self.mountains.remove(mountain)
+
+    def edit_mountain(self, old: Mountain, new: Mountain) -> None:
+        self.mountains[self.mountains.index(old)] = new
+
+    def mountains_with_difficulty(self, diff: int) -> list[Mountain]:
+        return [mountain for mountain in self.mountains if mountain.difficulty_level == diff]
+
+    def mountains_in_range(self, lo: int, hi: int) -> list[Mountain]:
+        return sorted((m for m in self.mountains if lo <= m.difficulty_level <= hi), key=lambda m: m.difficulty_level)
+
+    def count_in_range(self, lo: int, hi: int) -> int:
+        return sum(1 for m in self.mountains if lo <= m.difficulty_level <= hi)
+
+    def top_k_by_length(self, k: int, max_diff: int) -> list[Mountain]:
+        return sorted((m for m in self.mountains if m.difficulty_level <= max_diff), key=lambda m: -m.length)[:k]
+
+    def group_by_difficulty(self) -> list[list[Mountain]]:
+        groups: dict[int, list[Mountain]] = {}
+        for mountain in sorted(self.mountains, key=lambda mountain: mountain.difficulty_level):
+            groups.setdefault(mountain.difficulty_level, []).append(mountain)
+        return list(groups.values())
+
+def run(manager, mountains: list[Mountain], calls: int, seed: int) -> dict[str, float]:
+    rng = random.Random(seed)
+    times = {}
+    start = time.perf_counter()
+    for mountain in mountains:
+        manager.add_mountain(mountain)
+    times["add"] = time.perf_counter() - start
+    live = list(mountains)
+
+    start = time.perf_counter()
+    for i in range(calls):
+        j = rng.randrange(len(live))
+        new = Mountain(f"edit{i}", rng.randrange(100), 1)
+        manager.edit_mountain(live[j], new)
+        live[j] = new
+    times["edit"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        live[-1], live[j] = live[j], live[-1]
+        manager.remove_mountain(live.pop())
+        j = rng.randrange(len(live))
+    times["remove"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        manager.mountains_with_difficulty(rng.randrange(100))
+    times["with_difficulty"] = time.perf_counter() - start
+
+    for name, query in (("range of 5", lambda d: manager.mountains_in_range(d, d + 4)),
+                        ("count_in_range", lambda d: manager.count_in_range(d, d + 50)),
+                        ("top 10 by length", lambda d: manager.top_k_by_length(10, d))):
+        start = time.perf_counter()
+        for _ in range(calls // 10):
+            query(rng.randrange(100))
+        times[name] = time.perf_counter() - start
+
+    #An editor click then a graph, as MyWindow does
+    start = time.perf_counter()
+    for i in range(calls // 10):
+        j = rng.randrange(len(live))
+        new = Mountain(f"graph{i}", rng.randrange(100), 1)
+        manager.edit_mountain(live[j], new)
+        live[j] = new
+        manager.group_by_difficulty()
+    times["edit then group"] = time.perf_counter() - start
+    return times
+
+def main() -> None:
+    for n in (10000, 200000):
+        mountains = [Mountain(f"m{i}", i % 100, i % 9 + 1) for i in range(n)]
+        calls = 200
+        old = run(ListMountainManager(), mountains, calls, n)
+        new = run(MountainManager(), mountains, calls, n)
+        print(f"{n} mountains, {calls} calls each:")
+        for name in old:
+            print(f"  {name:>16}: list {old[name] * 1e3:10.2f} ms   indexed {new[name] * 1e3:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
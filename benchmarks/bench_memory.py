@@ -0,0 +1,85 @@
+"""
+Bytes per node of 10^6-node trails, with the slotted node classes against
+plain dataclasses laid out like the old ones (a __dict__ per instance).
+
+Run with `python -m benchmarks.bench_memory`.
+"""
+
+from __future__ import annotations
+import gc
+import random
+import tracemalloc
+from dataclasses import dataclass, field
+
+from mountain import Mountain
+from trail import Trail, TrailSeries, TrailSplit
+
+@dataclass
+class DictMountain:
+
+    name: str
+    difficulty_level: int
+    length: int
+
+@dataclass
+class DictTrailSeries:
+
+    mountain: DictMountain
+    following: DictTrail
+    _summary: object = field(default=None, init=False, repr=False, compare=False)
+
+@dataclass
+class DictTrailSplit:
+
+    top: DictTrail
+    bottom: DictTrail
+    following: DictTrail
+    _summary: object = field(default=None, init=False, repr=False, compare=False)
+
+@dataclass
+class DictTrail:
+
+    store: object = None
+
+SLOTTED = (Mountain, TrailSeries, TrailSplit, Trail)
+WITH_DICT = (DictMountain, DictTrailSeries, DictTrailSplit, DictTrail)
+
+def build_series(n: int, classes) -> object:
+    """n trail nodes: n - 1 mountains in a line and the empty trail at the end."""
+    mountain_class, series_class, _, trail_class = classes
+    rng = random.Random(n)
+    trail = trail_class(None)
+    for i in range(n - 1):
+        trail = trail_class(series_class(mountain_class(f"m{i}", rng.randint(0, 9), rng.randint(1, 9)), trail))
+    return trail
+
+def build_branchy(n: int, classes) -> object:
+    """About n trail nodes: splits in series, each with one mountain on both branches."""
+    mountain_class, series_class, split_class, trail_class = classes
+    rng = random.Random(n)
+    def branch(i: int) -> object:
+        return trail_class(series_class(mountain_class(f"m{i}", rng.randint(0, 9), rng.randint(1, 9)), trail_class(None)))
+    trail = trail_class(None)
+    #Each split adds itself and two branches of two trail nodes
+    for i in range((n - 1) // 5):
+        trail = trail_class(split_class(branch(2 * i), branch(2 * i + 1), trail))
+    return trail
+
+def bytes_per_node(build, n: int, classes) -> float:
+    gc.collect()
+    tracemalloc.start()
+    trail = build(n, classes)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del trail
+    return held / n
+
+def main() -> None:
+    n = 10**6
+    for name, build in (("series", build_series), ("branchy", build_branchy)):
+        before = bytes_per_node(build, n, WITH_DICT)
+        after = bytes_per_node(build, n, SLOTTED)
+        print(f"{name:<8} {n} nodes: __dict__ {before:6.1f} B/node   slots {after:6.1f} B/node   ({after / before:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Peak memory and time of the path queries: materialised lists, streamed lists and streamed views,
+and the CPU time and memory held by a kept result as lists against the shared prefix tree.
+
+Run with `python -m benchmarks.bench_paths`.
+"""
+
+from __future__ import annotations
+import time
+import tracemalloc
+
+from benchmarks.trails import branchy_trail
+from mountain import Mountain
+from trail import Trail, TrailSplit, iter_paths
+
+def measure(func) -> tuple[float, int, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+def main() -> None:
+    for splits in (10, 14, 16):
+        trail = branchy_trail(splits, branch_length=4, max_difficulty=5)
+        diff = 5
+        print(f"{splits} splits in series")
+        for name, func in [
+            ("difficulty_maximum_paths", lambda: len(trail.difficulty_maximum_paths(diff))),
+            ("... shared=True", lambda: len(trail.difficulty_maximum_paths(diff, shared=True))),
+            ("iter_difficulty_maximum_paths", lambda: sum(1 for _ in trail.iter_difficulty_maximum_paths(diff))),
+            ("iter_... views=True", lambda: sum(1 for _ in trail.iter_difficulty_maximum_paths(diff, views=True))),
+        ]:
+            elapsed, peak, count = measure(func)
+            print(f"  {name:<32} {count:>7} paths {elapsed:8.3f} s  peak {peak / 2**10:10.1f} KiB")
+
+
+def retained(func) -> tuple[float, int, int]:
+    """Best untraced time of func, and the memory still held by its result once it returns."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+        del result
+    tracemalloc.start()
+    result = func()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return best, held, len(result)
+
+def shared_main() -> None:
+    print("kept results, lists against shared=True (TrailPaths): CPU per path and memory held")
+    for splits, branch_length, prefix in ((12, 4, 0), (14, 8, 0), (12, 4, 200), (14, 4, 1000)):
+        trail = branchy_trail(splits, branch_length=branch_length, max_difficulty=5)
+        #A long approach walked by every path before the first split
+        for i in range(prefix):
+            trail = trail.add_mountain_before(Mountain(f"p{i}", i % 5, 1))
+        for name, func in [
+            ("lists", lambda: trail.difficulty_maximum_paths(5)),
+            ("shared", lambda: trail.difficulty_maximum_paths(5, shared=True)),
+        ]:
+            elapsed, held, count = retained(func)
+            print(f"  {prefix:>4} + {splits} splits x {branch_length}: {name:<7} {count:>7} paths "
+                  f"{elapsed:8.3f} s {elapsed / count * 1e9:8.0f} ns/path  held {held / 2**20:9.2f} MiB")
+
+def filter_all_paths(trail, max_difference: int) -> int:
+    """Enumerate every path, then keep the ones within the spread."""
+    count = 0
+    for path, _ in iter_paths(trail):
+        if not path or max(m.difficulty_level for m in path) - min(m.difficulty_level for m in path) <= max_difference:
+            count += 1
+    return count
+
+def spread_trail(splits: int) -> Trail:
+    """Top branches stay at difficulty 5, bottom branch i spreads i % 8 either side of it."""
+    trail = Trail(None)
+    for i in range(splits):
+        spread = i % 8
+        top = Trail(None)
+        bottom = Trail(None)
+        for _ in range(2):
+            top = top.add_mountain_before(Mountain("top", 5, 1))
+        bottom = bottom.add_mountain_before(Mountain("low", 5 - spread, 1)).add_mountain_before(Mountain("high", 5 + spread // 2, 1))
+        trail = Trail(TrailSplit(top, bottom, trail))
+    return trail
+
+def difference_main() -> None:
+    print("difficulty_difference_paths, pruned search against enumerate-and-filter")
+    trail = spread_trail(16)
+    for max_difference in (0, 2, 4, 6, 8, 10):
+        elapsed, _, count = measure(lambda: sum(1 for _ in trail.iter_difficulty_difference_paths(max_difference, views=True)))
+        full, _, _ = measure(lambda: filter_all_paths(trail, max_difference))
+        print(f"  max_difference {max_difference:>2}: {count:>7} of {2**16} paths  pruned {elapsed:8.4f} s  filter {full:8.4f} s")
+    # The stated input bound: 50 mountains, 5 branches.
+    bound = branchy_trail(5, branch_length=5, max_difficulty=50)
+    elapsed, _, count = measure(lambda: len(bound.difficulty_difference_paths(50)))
+    print(f"  bound (k=50, 5 branches): {count} paths in {elapsed * 1e3:.3f} ms")
+
+if __name__ == "__main__":
+    main()
+    shared_main()
+    difference_main()
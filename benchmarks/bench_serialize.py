@@ -0,0 +1,50 @@
+"""
+Writing trails as JSON: the old dataclass encoder against the one-pass writer, on deep series.
+
+Run with `python -m benchmarks.bench_serialize`.
+"""
+
+from __future__ import annotations
+import dataclasses
+import io
+import json
+import time
+
+from benchmarks.trails import series_trail
+from serialize import dump, serialize
+
+class LegacyEncoder(json.JSONEncoder):
+    """The encoder serialize used before, copying every subtrail with dataclasses.asdict."""
+
+    def default(self, o):
+        if dataclasses.is_dataclass(o):
+            res = dataclasses.asdict(o)
+            self.remove_box(res)
+            return res
+        return super().default(o)
+
+    def remove_box(self, obj):
+        if isinstance(obj, dict):
+            for key in [key for key in obj if key.endswith("_box") or key.startswith("_")]:
+                del obj[key]
+            for value in obj.values():
+                self.remove_box(value)
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main() -> None:
+    for n in (50, 100, 200, 400, 10000, 100000, 1000000):
+        trail = series_trail(n)
+        try:
+            legacy = f"{timed(lambda: json.dumps(trail, cls=LegacyEncoder)) * 1e3:10.2f} ms"
+            assert json.dumps(trail, cls=LegacyEncoder) == serialize(trail)
+        except RecursionError:
+            legacy = "RecursionError"
+        written = timed(lambda: dump(trail, io.StringIO()))
+        print(f"series of {n:>7}: legacy encoder {legacy:>14}   dump {written * 1e3:10.2f} ms ({written / n * 1e6:5.2f} us/mountain)")
+
+if __name__ == "__main__":
+    main()
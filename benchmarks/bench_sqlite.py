@@ -0,0 +1,60 @@
+"""
+Starting up with a catalogue of mountains: rebuilding the in-memory MountainManager every time
+against opening an SQLite catalogue built on an earlier run.
+
+Run with `python -m benchmarks.bench_sqlite`.
+"""
+
+from __future__ import annotations
+import os
+import random
+import tempfile
+import time
+
+from mountain import Mountain
+from mountain_manager import MountainManager
+from sqlite_mountain_manager import SQLiteMountainManager
+
+def timed(func) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def main() -> None:
+    n = 500_000
+    rng = random.Random(0)
+    mountains = [Mountain(f"m{i}", rng.randrange(100), rng.randrange(1, 1000)) for i in range(n)]
+
+    def build_indexed() -> MountainManager:
+        manager = MountainManager()
+        for mountain in mountains:
+            manager.add_mountain(mountain)
+        return manager
+    indexed_time, indexed = timed(build_indexed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "mountains.db")
+        def build_stored() -> None:
+            with SQLiteMountainManager(path) as stored:
+                stored.rebuild(mountains, "bench")
+        cold_time, _ = timed(build_stored)
+        warm_time, stored = timed(lambda: SQLiteMountainManager(path))
+        print(f"{n} mountains at startup: in-memory rebuild {indexed_time:7.2f} s   "
+              f"SQLite cold build {cold_time:7.2f} s   SQLite warm start {warm_time * 1e3:7.2f} ms")
+
+        queries = (
+            ("mountains_with_difficulty", lambda m: m.mountains_with_difficulty(7)),
+            ("mountains_in_range", lambda m: m.mountains_in_range(20, 22)),
+            ("count_in_range", lambda m: m.count_in_range(20, 40)),
+            ("top 10 by length", lambda m: m.top_k_by_length(10, 50)),
+            ("group_by_difficulty", lambda m: m.group_by_difficulty()),
+        )
+        with stored:
+            for name, query in queries:
+                indexed_time, expected = timed(lambda: query(indexed))
+                stored_time, result = timed(lambda: query(stored))
+                assert expected == result
+                print(f"  {name:>26}: in-memory {indexed_time * 1e3:9.2f} ms   SQLite {stored_time * 1e3:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
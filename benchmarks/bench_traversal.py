@@ -0,0 +1,76 @@
+"""
+Compares the explicit-stack traversal core against the recursive walks it replaced.
+
+Run with `python -m benchmarks.bench_traversal`.
+"""
+
+from __future__ import annotations
+import sys
+import time
+
+from benchmarks.trails import branchy_trail, series_trail
+from trail import Trail, TrailSeries, TrailSplit
+
+def recursive_collect(trail: Trail) -> list:
+    """The recursive collect_all_mountains this repo used before the traversal core."""
+    mountains = []
+    def traverse_path(path):
+        if isinstance(path, TrailSeries):
+            mountains.append(path.mountain)
+            traverse_path(path.following.store)
+        elif isinstance(path, TrailSplit):
+            traverse_path(path.top.store)
+            traverse_path(path.bottom.store)
+            traverse_path(path.following.store)
+    traverse_path(trail.store)
+    return mountains
+
+def recursive_paths(trail: Trail, diff: int) -> list:
+    """Recursive path enumeration with the same semantics as difficulty_maximum_paths."""
+    def recurse(current, rest, prefix):
+        store = current.store
+        if isinstance(store, TrailSeries):
+            if store.mountain.difficulty_level > diff:
+                return []
+            return recurse(store.following, rest, prefix + [store.mountain])
+        if isinstance(store, TrailSplit):
+            rest = (store.following, rest)
+            return recurse(store.top, rest, prefix) + recurse(store.bottom, rest, prefix)
+        if rest is not None:
+            return recurse(rest[0], rest[1], prefix)
+        return [prefix]
+    return recurse(trail, None, [])
+
+def timed(func, *args, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def report(name: str, nodes: int, old: float|None, new: float) -> None:
+    old_text = f"{old / nodes * 1e9:8.1f} ns/node" if old is not None else "         n/a"
+    print(f"{name:<34} recursive {old_text}   core {new / nodes * 1e9:8.1f} ns/node")
+
+def main() -> None:
+    sys.setrecursionlimit(20000)
+    # Small enough for the recursive versions to finish.
+    series = series_trail(5000)
+    report("collect_all_mountains series 5k", 10001, timed(recursive_collect, series), timed(Trail.collect_all_mountains, series))
+    branchy = branchy_trail(12)
+    paths = len(branchy.difficulty_maximum_paths(9))
+    report(f"difficulty_maximum_paths {paths} paths", paths, timed(recursive_paths, branchy, 9), timed(Trail.difficulty_maximum_paths, branchy, 9))
+    twin = series_trail(5000)
+    report("equality series 5k", 10001, None, timed(series.__eq__, twin))
+
+    # Sizes the recursive versions cannot reach at all, so only the core is timed.
+    big = series_trail(500_000)
+    nodes = 1_000_001
+    report("collect_all_mountains 10^6 nodes", nodes, None, timed(Trail.collect_all_mountains, big, repeat=1))
+    report("difficulty_maximum_paths 10^6 nodes", nodes, None, timed(Trail.difficulty_maximum_paths, big, 9, repeat=1))
+    report("equality 10^6 nodes", nodes, None, timed(big.__eq__, series_trail(500_000), repeat=1))
+    report("repr 10^6 nodes", nodes, None, timed(repr, big, repeat=1))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Many walkers on one trail: follow_path for each against one follow_paths for all,
+and follow_path again once the trail is compiled and routes are replayed from the cache.
+
+Run with `python -m benchmarks.bench_walkers`.
+"""
+
+from __future__ import annotations
+import time
+
+from benchmarks.trails import branchy_trail, nested_trail
+from personality import BottomWalker, LazyWalker, LongestWalker, TopWalker
+from trail import fold_postorder, trail_children
+
+KINDS = (TopWalker, BottomWalker, LazyWalker)
+
+def walkers(count: int) -> list:
+    return [KINDS[i % len(KINDS)]() for i in range(count)]
+
+def one_by_one(trail, group) -> None:
+    for walker in group:
+        trail.follow_path(walker)
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main() -> None:
+    trail = branchy_trail(500, branch_length=3)
+    compiled = branchy_trail(500, branch_length=3)
+    compiled.compile()
+    for count in (10, 100, 1000, 10000):
+        separate = timed(one_by_one, trail, walkers(count))
+        together = timed(trail.follow_paths, walkers(count))
+        replayed = timed(one_by_one, compiled, walkers(count))
+        print(f"{count:>6} walkers: follow_path {separate * 1e3:9.2f} ms  follow_paths {together * 1e3:8.2f} ms  "
+              f"cached routes {replayed * 1e3:8.2f} ms")
+
+class LookaheadLongestWalker(LongestWalker):
+    """LongestWalker that works out both branches from scratch at every split."""
+
+    def start_walk(self, trail) -> None:
+        pass
+
+    def branch_length(self, branch):
+        return fold_postorder(branch, trail_children, self.longest_length)
+
+def optimal_main() -> None:
+    print("LongestWalker, one bottom-up pass against a lookahead at every split")
+    for splits in (100, 400, 1600):
+        #Splits nested in the top branch, so every lookahead covers most of the trail
+        trail = nested_trail(splits)
+        lookahead = timed(trail.follow_path, LookaheadLongestWalker(7))
+        planned = timed(trail.follow_path, LongestWalker(7))
+        print(f"  {splits:>5} nested splits: lookahead {lookahead * 1e3:9.2f} ms  one pass {planned * 1e3:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
+    optimal_main()
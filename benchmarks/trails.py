@@ -0,0 +1,61 @@
+"""
+Trail builders shared by the benchmark scripts.
+All of them build bottom-up in a loop, so they work for any size.
+"""
+
+from __future__ import annotations
+import random
+
+from mountain import Mountain
+from trail import Trail, TrailSeries, TrailSplit
+
+def series_trail(n: int, max_difficulty: int = 9) -> Trail:
+    """A single line of n mountains."""
+    rng = random.Random(n)
+    trail = Trail(None)
+    for i in range(n):
+        trail = Trail(TrailSeries(Mountain(f"m{i}", rng.randint(0, max_difficulty), rng.randint(1, 9)), trail))
+    return trail
+
+def branchy_trail(splits: int, branch_length: int = 3, max_difficulty: int = 9, seed: int = 0) -> Trail:
+    """splits splits in series, each with two branches of branch_length mountains."""
+    rng = random.Random(seed)
+    def mountain(i: int) -> Mountain:
+        return Mountain(f"m{i}", rng.randint(0, max_difficulty), rng.randint(1, 9))
+    count = 0
+    trail = Trail(None)
+    for _ in range(splits):
+        branches = []
+        for _ in range(2):
+            branch = Trail(None)
+            for _ in range(branch_length):
+                branch = Trail(TrailSeries(mountain(count), branch))
+                count += 1
+            branches.append(branch)
+        trail = Trail(TrailSplit(branches[0], branches[1], trail))
+    return trail
+
+def nested_trail(depth: int, max_difficulty: int = 9, seed: int = 0) -> Trail:
+    """A split nested depth levels deep in its top branch, with a mountain on every bottom branch."""
+    rng = random.Random(seed)
+    trail = Trail(TrailSeries(Mountain("end", rng.randint(0, max_difficulty), 1), Trail(None)))
+    for i in range(depth):
+        bottom = Trail(TrailSeries(Mountain(f"b{i}", rng.randint(0, max_difficulty), 1), Trail(None)))
+        trail = Trail(TrailSplit(trail, bottom, Trail(TrailSeries(Mountain(f"f{i}", rng.randint(0, max_difficulty), 1), Trail(None)))))
+    return trail
+
+def balanced_trail(depth: int, max_difficulty: int = 9, seed: int = 0) -> Trail:
+    """Splits nested depth levels deep in both branches, with a mountain before and after each split."""
+    rng = random.Random(seed)
+    count = 0
+    def mountain() -> Mountain:
+        nonlocal count
+        count += 1
+        return Mountain(f"m{count}", rng.randint(0, max_difficulty), rng.randint(1, 9))
+    level = [Trail(TrailSeries(mountain(), Trail(None))) for _ in range(2 ** depth)]
+    while len(level) > 1:
+        level = [
+            Trail(TrailSeries(mountain(), Trail(TrailSplit(level[i], level[i + 1], Trail(TrailSeries(mountain(), Trail(None)))))))
+            for i in range(0, len(level), 2)
+        ]
+    return level[0]
@@ -0,0 +1,268 @@
+"""
+A MountainManager keeping its mountains as NumPy columns, for analytics over millions of mountains.
+
+Each mountain is a row: its difficulty and length in int64 arrays, and its name as an index into
+a table of distinct names. Rows keep the order mountains were added in, removed rows are only
+marked dead until there are more dead rows than live ones. Queries are vectorised over the columns,
+and Mountain objects are only made for the rows a query returns.
+"""
+
+from __future__ import annotations
+from typing import Iterable
+
+import numpy as np
+
+from mountain import Mountain
+
+class ColumnarMountainManager:
+    """
+    Same interface as MountainManager, with the mountains stored by column.
+    Mountains handed out are new objects made from their row, so mountains are found
+    for removal and edits by equality rather than identity.
+    """
+
+    #Rows are allocated for at least this many mountains
+    MIN_CAPACITY = 64
+
+    def __init__(self) -> None:
+        """
+        Initialises empty columns
+        Complexity: O(1)
+        """
+        self._difficulty = np.zeros(self.MIN_CAPACITY, dtype=np.int64)
+        self._length = np.zeros(self.MIN_CAPACITY, dtype=np.int64)
+        self._name = np.zeros(self.MIN_CAPACITY, dtype=np.int64)
+        self._alive = np.zeros(self.MIN_CAPACITY, dtype=bool)
+        #rows in use, dead or alive
+        self._rows = 0
+        self._count = 0
+        #distinct names, and the index of each in the table
+        self._names: list[str] = []
+        self._name_ids: dict[str, int] = {}
+
+    @classmethod
+    def from_columns(cls, names: Iterable[str], difficulties: Iterable[int], lengths: Iterable[int]) -> ColumnarMountainManager:
+        """
+        Makes a manager from whole columns at once, without any Mountain objects
+        Complexity: O(n) where n is the number of mountains
+        """
+        manager = cls()
+        manager._append(list(names), np.asarray(difficulties, dtype=np.int64), np.asarray(lengths, dtype=np.int64))
+        return manager
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def mountains(self) -> list[Mountain]:
+        """
+        The mountains in the order they were added
+        Complexity: O(n) where n is the number of rows
+        """
+        return self._views(self._live_rows())
+
+    def add_mountain(self, mountain: Mountain) -> None:
+        """
+        Adds a mountain after all the others
+        Complexity: O(1) amortised
+        """
+        self._append([mountain.name], np.array([mountain.difficulty_level], dtype=np.int64), np.array([mountain.length], dtype=np.int64))
+
+    def add_mountains(self, mountains: Iterable[Mountain]) -> None:
+        """
+        Adds mountains after all the others, in one go
+        Complexity: O(m) where m is the number of mountains added
+        """
+        mountains = list(mountains)
+        self._append([m.name for m in mountains],
+                     np.fromiter((m.difficulty_level for m in mountains), dtype=np.int64, count=len(mountains)),
+                     np.fromiter((m.length for m in mountains), dtype=np.int64, count=len(mountains)))
+
+    def remove_mountain(self, mountain: Mountain) -> None:
+        """
+        Removes the first mountain equal to mountain, raising ValueError if there is none
+        Complexity: O(n) vectorised where n is the number of rows
+        """
+        row = self._find(mountain)
+        self._alive[row] = False
+        self._count -= 1
+        if self._rows > 2 * self._count + self.MIN_CAPACITY:
+            self._compact()
+
+    def edit_mountain(self, old: Mountain, new: Mountain) -> None:
+        """
+        Replaces the first mountain equal to old with new, in the same place, raising ValueError if there is none
+        Complexity: O(n) vectorised where n is the number of rows
+        """
+        row = self._find(old)
+        self._difficulty[row] = new.difficulty_level
+        self._length[row] = new.length
+        self._name[row] = self._name_id(new.name)
+
+    def mountains_with_difficulty(self, diff: int) -> list[Mountain]:
+        """
+        Returns the mountains with the given difficulty, in the order they were added
+        Complexity: O(n) vectorised where n is the number of rows, plus O(m) for the m mountains returned
+        """
+        rows = slice(0, self._rows)
+        return self._views(np.flatnonzero(self._alive[rows] & (self._difficulty[rows] == diff)))
+
+    def mountains_in_range(self, lo: int, hi: int) -> list[Mountain]:
+        """
+        Returns the mountains with difficulty from lo to hi inclusive, by difficulty and then in the order they were added
+        Complexity: O(n) vectorised where n is the number of rows, plus O(mlogm) for the m mountains returned
+        """
+        found = np.flatnonzero(self._in_range(lo, hi))
+        return self._views(found[np.argsort(self._difficulty[found], kind="stable")])
+
+    def count_in_range(self, lo: int, hi: int) -> int:
+        """
+        Returns the number of mountains with difficulty from lo to hi inclusive
+        Complexity: O(n) vectorised where n is the number of rows
+        """
+        return int(np.count_nonzero(self._in_range(lo, hi)))
+
+    def top_k_by_length(self, k: int, max_diff: int) -> list[Mountain]:
+        """
+        Returns the k longest mountains with difficulty at most max_diff, longest first,
+        with mountains of the same length in the order they were added
+        Complexity: O(n) vectorised where n is the number of rows, plus O(klogk)
+        """
+        rows = slice(0, self._rows)
+        found = np.flatnonzero(self._alive[rows] & (self._difficulty[rows] <= max_diff))
+        if k <= 0 or not len(found):
+            return []
+        lengths = self._length[found]
+        if k < len(found):
+            #keep only rows at least as long as the k-th longest, ties included
+            kth = np.partition(lengths, len(found) - k)[len(found) - k]
+            found = found[lengths >= kth]
+            lengths = self._length[found]
+        return self._views(found[np.lexsort((found, -lengths))][:k])
+
+    def group_by_difficulty(self) -> list[list[Mountain]]:
+        """
+        Groups all mountains with the same difficulty together, in increasing order of difficulty
+        Complexity: O(nlogn) vectorised where n is the number of rows, plus O(n) for the mountains returned
+        """
+        _, groups = self._grouped_rows()
+        return [self._views(group) for group in groups]
+
+    def mean_length_by_difficulty(self) -> dict[int, float]:
+        """
+        Returns the mean length of the mountains of each difficulty
+        Complexity: O(nlogn) vectorised where n is the number of rows, plus O(g) for the g difficulties
+        """
+        rows = self._live_rows()
+        difficulties, inverse, counts = np.unique(self._difficulty[rows], return_inverse=True, return_counts=True)
+        totals = np.bincount(inverse, weights=self._length[rows], minlength=len(difficulties))
+        return dict(zip(difficulties.tolist(), (totals / counts).tolist()))
+
+    def max_length_by_difficulty(self) -> dict[int, int]:
+        """
+        Returns the greatest length among the mountains of each difficulty
+        Complexity: O(nlogn) vectorised where n is the number of rows, plus O(g) for the g difficulties
+        """
+        rows = self._live_rows()
+        if not len(rows):
+            return {}
+        order = np.argsort(self._difficulty[rows], kind="stable")
+        difficulties = self._difficulty[rows][order]
+        starts = np.flatnonzero(np.r_[True, difficulties[1:] != difficulties[:-1]])
+        longest = np.maximum.reduceat(self._length[rows][order], starts)
+        return dict(zip(difficulties[starts].tolist(), longest.tolist()))
+
+    def _live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self._alive[:self._rows])
+
+    def _in_range(self, lo: int, hi: int) -> np.ndarray:
+        rows = slice(0, self._rows)
+        difficulty = self._difficulty[rows]
+        return self._alive[rows] & (difficulty >= lo) & (difficulty <= hi)
+
+    def _grouped_rows(self) -> tuple[np.ndarray, list[np.ndarray]]:
+        """
+        The distinct difficulties in increasing order, and the live rows of each, in row order
+        Complexity: O(nlogn) vectorised where n is the number of rows
+        """
+        rows = self._live_rows()
+        if not len(rows):
+            return rows, []
+        order = rows[np.argsort(self._difficulty[rows], kind="stable")]
+        difficulties = self._difficulty[order]
+        starts = np.flatnonzero(np.r_[True, difficulties[1:] != difficulties[:-1]])
+        return difficulties[starts], np.split(order, starts[1:])
+
+    def _views(self, rows: np.ndarray) -> list[Mountain]:
+        """
+        Makes a Mountain for each of the given rows
+        Complexity: O(m) where m is the number of rows
+        """
+        names = self._names
+        return [Mountain(names[name], difficulty, length) for name, difficulty, length in zip(
+            self._name[rows].tolist(), self._difficulty[rows].tolist(), self._length[rows].tolist())]
+
+    def _find(self, mountain: Mountain) -> int:
+        """
+        The first live row equal to mountain
+        Complexity: O(n) vectorised where n is the number of rows
+        """
+        name = self._name_ids.get(mountain.name)
+        if name is not None:
+            rows = slice(0, self._rows)
+            found = np.flatnonzero(self._alive[rows] & (self._name[rows] == name)
+                                   & (self._difficulty[rows] == mountain.difficulty_level) & (self._length[rows] == mountain.length))
+            if len(found):
+                return int(found[0])
+        raise ValueError(f"{mountain} is not in the mountain manager")
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        return name_id
+
+    def _append(self, names: list[str], difficulties: np.ndarray, lengths: np.ndarray) -> None:
+        """
+        Adds rows for whole columns of mountains, growing the arrays if needed
+        Complexity: O(m) amortised where m is the number of mountains added
+        """
+        added = len(names)
+        if not len(difficulties) == len(lengths) == added:
+            raise ValueError("Columns of different lengths")
+        end = self._rows + added
+        if end > len(self._alive):
+            self._resize(max(end, 2 * len(self._alive)))
+        name_id = self._name_id
+        self._name[self._rows:end] = np.fromiter((name_id(name) for name in names), dtype=np.int64, count=added)
+        self._difficulty[self._rows:end] = difficulties
+        self._length[self._rows:end] = lengths
+        self._alive[self._rows:end] = True
+        self._rows = end
+        self._count += added
+
+    def _resize(self, capacity: int) -> None:
+        """
+        Moves the rows in use into arrays with room for capacity rows
+        Complexity: O(capacity)
+        """
+        for column in ("_difficulty", "_length", "_name", "_alive"):
+            old = getattr(self, column)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._rows] = old[:self._rows]
+            setattr(self, column, new)
+
+    def _compact(self) -> None:
+        """
+        Drops the dead rows, keeping the order of the live ones
+        Complexity: O(n) vectorised where n is the number of rows
+        """
+        rows = self._live_rows()
+        capacity = max(self.MIN_CAPACITY, 2 * len(rows))
+        for column in ("_difficulty", "_length", "_name", "_alive"):
+            old = getattr(self, column)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(rows)] = old[rows]
+            setattr(self, column, new)
+        self._rows = len(rows)
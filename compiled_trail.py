@@ -0,0 +1,401 @@
+"""
+A flat, array-backed copy of a Trail for running many queries on the same trail.
+
+Every Trail node gets an index in pre-order (so a node's subtrails always come after it),
+and its details are kept in parallel typed arrays instead of Python objects.
+Mountain names are kept once each in a side table.
+"""
+
+from __future__ import annotations
+from array import array
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from mountain import Mountain
+from trail import Trail, TrailSeries, TrailSplit, PRUNE
+from trail_paths import PathView, TrailPaths
+
+# Avoid circular imports for typing.
+if TYPE_CHECKING:
+    from personality import WalkerPersonality
+
+#Node kinds stored in CompiledTrail.kind
+EMPTY = 0
+SERIES = 1
+SPLIT = 2
+
+#Child index of a node that has no such child
+NO_NODE = -1
+
+class CompiledTrail:
+    """
+    Parallel arrays describing a trail, indexed by node:
+        kind:       EMPTY, SERIES or SPLIT
+        difficulty: difficulty level of a series' mountain
+        length:     length of a series' mountain
+        name:       index into names of a series' mountain
+        top:        index of a split's top branch
+        bottom:     index of a split's bottom branch
+        following:  index of the trail after a series or split
+
+    Only the arrays and names are pickled, so a CompiledTrail is cheap to send to worker processes.
+    """
+
+    def __init__(self, kind: array, difficulty: array, length: array, name: array,
+                 top: array, bottom: array, following: array, names: list[str]) -> None:
+        """
+        Wraps already built arrays, use from_trail to compile a Trail.
+        Complexity: O(1)
+        """
+        self.kind = kind
+        self.difficulty = difficulty
+        self.length = length
+        self.name = name
+        self.top = top
+        self.bottom = bottom
+        self.following = following
+        self.names = names
+        #Trail and Mountain objects for each node, either the ones compiled from or rebuilt on demand
+        self._trails: list[Trail]|None = None
+        self._mountains: list[Mountain|None]|None = None
+        #For each series, where its run of consecutive series ends and the hardest mountain in it
+        self._run_end: array|None = None
+        self._run_peak: array|None = None
+        #Routes of personalities with a decision key, see route
+        self._routes: dict[Any, array] = {}
+
+    @classmethod
+    def from_trail(cls, trail: Trail) -> CompiledTrail:
+        """
+        Compiles a trail into arrays, numbering the nodes in pre-order.
+        Complexity: O(n) for best and worst case where n is the number of nodes in the trail
+        """
+        kind = array("b")
+        difficulty = array("q")
+        length = array("q")
+        name = array("i")
+        top = array("i")
+        bottom = array("i")
+        following = array("i")
+        names: list[str] = []
+        name_ids: dict[str, int] = {}
+        trails: list[Trail] = []
+
+        #Each entry is a node still to number, with the array and index of the parent slot pointing at it
+        stack: list = [(trail, None, 0)]
+        while stack:
+            current, slot, parent = stack.pop()
+            index = len(kind)
+            if slot is not None:
+                slot[parent] = index
+            trails.append(current)
+            store = current.store
+            top.append(NO_NODE)
+            bottom.append(NO_NODE)
+            following.append(NO_NODE)
+            if isinstance(store, TrailSeries):
+                mountain = store.mountain
+                kind.append(SERIES)
+                difficulty.append(mountain.difficulty_level)
+                length.append(mountain.length)
+                if mountain.name not in name_ids:
+                    name_ids[mountain.name] = len(names)
+                    names.append(mountain.name)
+                name.append(name_ids[mountain.name])
+                stack.append((store.following, following, index))
+            else:
+                difficulty.append(0)
+                length.append(0)
+                name.append(NO_NODE)
+                if isinstance(store, TrailSplit):
+                    kind.append(SPLIT)
+                    stack.append((store.following, following, index))
+                    stack.append((store.bottom, bottom, index))
+                    stack.append((store.top, top, index))
+                else:
+                    kind.append(EMPTY)
+
+        compiled = cls(kind, difficulty, length, name, top, bottom, following, names)
+        compiled._trails = trails
+        compiled._mountains = [
+            current.store.mountain if node_kind == SERIES else None
+            for current, node_kind in zip(trails, kind)
+        ]
+        return compiled
+
+    def __len__(self) -> int:
+        """
+        Returns the number of nodes.
+        Complexity: O(1)
+        """
+        return len(self.kind)
+
+    def __getstate__(self) -> dict[str, Any]:
+        #Only the flat arrays travel, everything else is rebuilt on the other side
+        state = self.__dict__.copy()
+        for key in ("_trails", "_mountains", "_run_end", "_run_peak"):
+            state[key] = None
+        return state
+
+    def mountains(self) -> list[Mountain|None]:
+        """
+        Returns the mountain of every node (None for nodes that are not a series).
+        The Mountains compiled from are used where they are known, otherwise they are
+        made from the arrays on the first call.
+        Complexity: O(1) amortised, O(n) for the first call after unpickling
+        """
+        if self._mountains is None:
+            names, name, difficulty, length = self.names, self.name, self.difficulty, self.length
+            self._mountains = [
+                Mountain(names[name[index]], difficulty[index], length[index]) if node_kind == SERIES else None
+                for index, node_kind in enumerate(self.kind)
+            ]
+        return self._mountains
+
+    def mountain(self, index: int) -> Mountain:
+        """
+        Returns the mountain of the series at index.
+        Complexity: O(1) amortised
+        """
+        return self.mountains()[index]
+
+    def _runs(self) -> tuple[array, array]:
+        """
+        Finds the runs of series directly following each other. In pre-order a series is
+        always followed by index + 1, so a run starting at index is the slice [index, run_end[index]).
+        run_peak[index] is the highest difficulty from index to the end of its run.
+        Complexity: O(1) amortised, O(n) for the first call
+        """
+        if self._run_end is None:
+            kind, difficulty = self.kind, self.difficulty
+            run_end = array("i", range(1, len(kind) + 1))
+            run_peak = array("q", difficulty)
+            for index in range(len(kind) - 2, -1, -1):
+                if kind[index] == SERIES and kind[index + 1] == SERIES:
+                    run_end[index] = run_end[index + 1]
+                    if run_peak[index + 1] > run_peak[index]:
+                        run_peak[index] = run_peak[index + 1]
+            self._run_end = run_end
+            self._run_peak = run_peak
+        return self._run_end, self._run_peak
+
+    def trail(self, index: int=0) -> Trail:
+        """
+        Returns the Trail for the node at index.
+        If the trail did not come from from_trail (e.g. it was unpickled), every Trail
+        is rebuilt from the arrays on the first call.
+        Complexity: O(1) amortised, O(n) for the first call after unpickling
+        """
+        if self._trails is None:
+            self._trails = self._rebuild_trails()
+        return self._trails[index]
+
+    def _rebuild_trails(self) -> list[Trail]:
+        """
+        Builds a Trail per node, children first, by walking the indices backwards.
+        Complexity: O(n) for best and worst case
+        """
+        kind, top, bottom, following = self.kind, self.top, self.bottom, self.following
+        mountains = self.mountains()
+        trails: list = [None] * len(kind)
+        for index in range(len(kind) - 1, -1, -1):
+            node_kind = kind[index]
+            if node_kind == SERIES:
+                trails[index] = Trail(TrailSeries(mountains[index], trails[following[index]]))
+            elif node_kind == SPLIT:
+                trails[index] = Trail(TrailSplit(trails[top[index]], trails[bottom[index]], trails[following[index]]))
+            else:
+                trails[index] = Trail(None)
+        return trails
+
+    def collect_all_mountains(self) -> list[Mountain]:
+        """
+        Returns a list of all mountains on the trail, in the same order as Trail.collect_all_mountains.
+        Complexity: O(n) for best and worst case
+        """
+        #Pre-order numbering means the mountains are simply in index order
+        return [mountain for mountain in self.mountains() if mountain is not None]
+
+    def follow_path(self, personality: WalkerPersonality, on_mountain: Callable[[Mountain], Any]|None=None) -> None:
+        """
+        Follow a path and add mountains according to a personality, as Trail.follow_path does.
+        The personality is still handed Trail objects for the two branches of each split.
+        Personalities with a decision key replay their cached route without being asked to select a branch.
+        Complexity: O(n) worst case where n is the number of nodes, O(length of the route) once cached
+        """
+        route = self.route(personality)
+        if route is None:
+            if on_mountain is None:
+                on_mountain = personality.add_mountain
+            for mountain in self.iter_follow_path(personality):
+                on_mountain(mountain)
+            return
+        #A cached route skips _walk_runs, so the walk still has to be started here
+        personality.start_walk(self.trail())
+        walked = map(self.mountains().__getitem__, route)
+        if on_mountain is None:
+            personality.add_mountains(walked)
+        else:
+            for mountain in walked:
+                on_mountain(mountain)
+
+    def route(self, personality: WalkerPersonality) -> array|None:
+        """
+        Returns the route a personality takes through the trail, as the indices of the series it walks.
+        Routes are kept per decision key, which stands for every personality that chooses alike.
+        Returns None for a personality without a decision key, its route may change between walks.
+        Complexity: O(1) once cached, otherwise O(n) worst case where n is the number of nodes
+        """
+        key = personality.decision_key()
+        if key is None:
+            return None
+        route = self._routes.get(key)
+        if route is None:
+            route = self._routes[key] = array("i")
+            for start, end in self._walk_runs(personality):
+                route.extend(range(start, end))
+        return route
+
+    def iter_follow_path(self, personality: WalkerPersonality) -> Iterator[Mountain]:
+        """
+        Yields the mountains on the path a personality follows, as Trail.iter_follow_path does.
+        Complexity: O(n) worst case where n is the number of nodes
+        """
+        mountains = self.mountains()
+        for start, end in self._walk_runs(personality):
+            yield from mountains[start:end]
+
+    def _walk_runs(self, personality: WalkerPersonality) -> Iterator[tuple[int, int]]:
+        """
+        Walks the path a personality follows, yielding the (start, end) slice of each run of series on it.
+        Complexity: O(n) worst case where n is the number of nodes
+        """
+        from personality import PersonalityDecision
+        personality.start_walk(self.trail())
+        kind, top, bottom, following = self.kind, self.top, self.bottom, self.following
+        run_end, _ = self._runs()
+        remaining_paths: list[int] = []
+        current = 0
+        while True:
+            node_kind = kind[current]
+            if node_kind == SERIES:
+                #Take the whole run of series at once, it ends at the trail that follows it
+                end = run_end[current]
+                yield current, end
+                current = end
+            elif node_kind == SPLIT:
+                remaining_paths.append(following[current])
+                choice = personality.select_branch(self.trail(top[current]), self.trail(bottom[current]))
+                if choice == PersonalityDecision.BOTTOM:
+                    current = bottom[current]
+                elif choice == PersonalityDecision.TOP:
+                    current = top[current]
+                elif choice == PersonalityDecision.STOP:
+                    return
+            elif remaining_paths:
+                current = remaining_paths.pop()
+            else:
+                return
+
+    def iter_paths(self, step: Callable[[Any, int], Any]|None=None, state: Any=None) -> Iterator[tuple[list[int], Any]]:
+        """
+        Path-aware walk over the arrays, the counterpart of trail.iter_paths.
+        Yields (path, state) where path is a shared buffer of series node indices,
+        only valid until the generator is resumed.
+
+        step(state, index) is called with the index of each series added to the path and
+        returns the new state, or PRUNE to abandon every path with the current prefix.
+        Complexity: O(n + total length of all paths explored)
+        """
+        kind, top, bottom, following = self.kind, self.top, self.bottom, self.following
+        path: list[int] = []
+        stack: list = [(0, None, 0, state)]
+        while stack:
+            current, rest, depth, state = stack.pop()
+            del path[depth:]
+            while True:
+                node_kind = kind[current]
+                if node_kind == SERIES:
+                    if step is not None:
+                        state = step(state, current)
+                        if state is PRUNE:
+                            break
+                    path.append(current)
+                    current = following[current]
+                elif node_kind == SPLIT:
+                    rest = (following[current], rest)
+                    stack.append((bottom[current], rest, len(path), state))
+                    current = top[current]
+                elif rest is not None:
+                    current, rest = rest
+                else:
+                    yield path, state
+                    break
+
+    def iter_difficulty_maximum_paths(self, diff: int, views: bool=False) -> Iterator[list[Mountain]|PathView]:
+        """
+        Yields the same paths, in the same order, as Trail.iter_difficulty_maximum_paths.
+        Runs of series are checked against diff in one step before being added to the path.
+        Complexity: O(n + P*L) where P is the number of paths yielded and L the longest path,
+        or O(n + E) with views where E is the number of mountains not shared with an earlier path
+        """
+        kind, top, bottom, following = self.kind, self.top, self.bottom, self.following
+        mountains = self.mountains()
+        run_end, run_peak = self._runs()
+        #Lists are copied out of one reused buffer, views are tails of the prefix tree
+        path: list[Mountain] = []
+        stack: list = [(0, None, None, 0)]
+        while stack:
+            current, rest, tail, depth = stack.pop()
+            if not views:
+                del path[depth:]
+            while True:
+                node_kind = kind[current]
+                if node_kind == SERIES:
+                    #A run is only ever entered at its start, so it is taken or dropped whole
+                    if run_peak[current] > diff:
+                        break
+                    end = run_end[current]
+                    if views:
+                        for mountain in mountains[current:end]:
+                            tail = (mountain, tail)
+                    else:
+                        path.extend(mountains[current:end])
+                    depth += end - current
+                    current = end
+                elif node_kind == SPLIT:
+                    rest = (following[current], rest)
+                    stack.append((bottom[current], rest, tail, depth))
+                    current = top[current]
+                elif rest is not None:
+                    current, rest = rest
+                else:
+                    yield PathView(tail, depth) if views else path[:]
+                    break
+
+    def difficulty_maximum_paths(self, diff: int, shared: bool=False) -> list[list[Mountain]]|TrailPaths:
+        """
+        Returns the same result as Trail.difficulty_maximum_paths, a TrailPaths if shared.
+        Complexity: O(n + P*L) where P is the number of paths and L the longest path,
+        or O(n + E) when shared where E is the number of mountains not shared with an earlier path
+        """
+        if shared:
+            return TrailPaths.from_views(self.iter_difficulty_maximum_paths(diff, views=True))
+        return list(self.iter_difficulty_maximum_paths(diff))
+
+    def count_difficulty_maximum_paths(self, diff: int) -> int:
+        """
+        Counts the paths difficulty_maximum_paths would return, without building them.
+        Each node's count only depends on nodes with larger indices, so one backwards pass does it.
+        Complexity: O(n) for best and worst case
+        """
+        kind, difficulty, top, bottom, following = self.kind, self.difficulty, self.top, self.bottom, self.following
+        counts = [0] * len(kind)
+        for index in range(len(kind) - 1, -1, -1):
+            node_kind = kind[index]
+            if node_kind == SERIES:
+                counts[index] = counts[following[index]] if difficulty[index] <= diff else 0
+            elif node_kind == SPLIT:
+                counts[index] = (counts[top[index]] + counts[bottom[index]]) * counts[following[index]]
+            else:
+                counts[index] = 1
+        return counts[0]
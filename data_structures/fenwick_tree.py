@@ -0,0 +1,74 @@
+""" Fenwick Tree
+
+Defines a Fenwick (binary indexed) tree of integer counts, for prefix and range sums
+that stay cheap while the counts change.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+
+class FenwickTree:
+    """
+    Fenwick tree over positions 0 to size - 1, each holding an integer.
+
+    Node i (counting from 1) holds the sum of the i & -i positions ending at position i - 1,
+    so a prefix sum or an update visits O(log n) nodes.
+    """
+
+    def __init__(self, values: Iterable[int] = ()) -> None:
+        """
+        Initialise the tree with the given values at positions 0, 1, ...
+
+        :complexity: O(n) where n is the number of values
+        """
+        self.tree = [0]
+        self.tree.extend(values)
+        size = len(self.tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                self.tree[parent] += self.tree[i]
+
+    def __len__(self) -> int:
+        """
+        Returns the number of positions in the tree
+        """
+        return len(self.tree) - 1
+
+    def add(self, index: int, delta: int) -> None:
+        """
+        Add delta to the value at index.
+
+        :complexity: O(log n) where n is the number of positions
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"Position {index} is out of range for a Fenwick tree of size {len(self)}")
+        i = index + 1
+        size = len(self.tree)
+        while i < size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, end: int) -> int:
+        """
+        Returns the sum of the values at positions 0 to end - 1.
+
+        :complexity: O(log n) where n is the number of positions
+        """
+        total = 0
+        i = min(end, len(self))
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def range_sum(self, start: int, end: int) -> int:
+        """
+        Returns the sum of the values at positions start to end - 1.
+
+        :complexity: O(log n) where n is the number of positions
+        """
+        if end <= start:
+            return 0
+        return self.prefix_sum(end) - self.prefix_sum(start)
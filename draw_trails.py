@@ -5,11 +5,12 @@ A bit of a mess, you 100% don't need to look at this for your assignment!
 """
 
 from __future__ import annotations
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from mountain import Mountain
 from utils import av, bezier
 from constants import DrawMode
-from trail import Trail, TrailSeries, TrailSplit
+from trail import Trail, TrailSeries, fold_postorder, trail_children
+from trail_cursor import TrailCursor
 
 @dataclass
 class Box:
@@ -25,27 +26,6 @@ class Box:
                 return True
         return False
 
-# These inheritance models are just for hinting that we are injection
-# the box attributes into the existing trail classes.
-
-@dataclass
-class TrailSplitBox(TrailSplit):
-
-    branch_start_box: Box = field(default_factory=Box)
-    branch_end_box: Box = field(default_factory=Box)
-
-@dataclass
-class TrailSeriesBox(TrailSeries):
-
-    before_box: Box = field(default_factory=Box)
-    mountain_box: Box = field(default_factory=Box)
-    after_box: Box = field(default_factory=Box)
-
-@dataclass
-class TrailBox(Trail):
-
-    trail_box: Box = field(default_factory=Box)
-
 class TrailDraw:
 
     ### Visual constants
@@ -64,54 +44,66 @@ class TrailDraw:
     ### Click constants
     LINE_VERTICAL_BOX = MOUNTAIN_HEIGHT / 2
 
-    def __init__(self, trail: TrailBox) -> None:
+    def __init__(self, trail: Trail) -> None:
         self.trail = trail
+        # The boxes laid out by the last draw, by the address of the subtrail they belong to
+        # (its steps from the root, as in trail_cursor). Interned trails share subtrails, so one
+        # node can be drawn in several places, each with its own boxes.
+        self.boxes: dict[tuple[str, ...], dict[str, Box]] = {}
+
+    def set_boxes(self, address: tuple[str, ...], **boxes: Box) -> None:
+        self.boxes.setdefault(address, {}).update(boxes)
+
+    def get_box(self, address: tuple[str, ...], name: str) -> Box|None:
+        return self.boxes.get(address, {}).get(name)
+
+    def in_box(self, mouse_pos: tuple[float, float], address: tuple[str, ...], name: str) -> bool:
+        box = self.get_box(address, name)
+        return box is not None and mouse_pos in box
 
     # VISUAL CALCULATIONS
 
-    def required_height(self, cur_trail: TrailBox|None=None) -> int:
-        if cur_trail is None:
-            cur_trail = self.trail.store
-        else:
-            cur_trail = cur_trail.store
+    def required_height(self, cur_trail: Trail|None=None) -> int:
         if cur_trail is None:
+            cur_trail = self.trail
+        return fold_postorder(cur_trail, trail_children, self._combine_height)
+
+    def _combine_height(self, cur_trail: Trail, *heights: int) -> int:
+        if cur_trail.store is None:
             return self.EMPTY_HEIGHT
-        elif isinstance(cur_trail, TrailSeries):
-            return max(self.MOUNTAIN_HEIGHT, self.required_height(cur_trail.following))
+        elif isinstance(cur_trail.store, TrailSeries):
+            following, = heights
+            return max(self.MOUNTAIN_HEIGHT, following)
         else:
-            return max(
-                self.required_height(cur_trail.top) + self.BRANCH_SEPARATION + self.required_height(cur_trail.bottom),
-                self.required_height(cur_trail.following)
-            )
+            top, bottom, following = heights
+            return max(top + self.BRANCH_SEPARATION + bottom, following)
 
-    def required_width(self, cur_trail: TrailBox|None=None) -> int:
-        if cur_trail is None:
-            cur_trail = self.trail.store
-        else:
-            cur_trail = cur_trail.store
+    def required_width(self, cur_trail: Trail|None=None) -> int:
         if cur_trail is None:
+            cur_trail = self.trail
+        return fold_postorder(cur_trail, trail_children, self._combine_width)
+
+    def _combine_width(self, cur_trail: Trail, *widths: int) -> int:
+        if cur_trail.store is None:
             return 0
-        elif isinstance(cur_trail, TrailSeries):
-            return self.TOTAL_MOUNTAIN_WIDTH + self.required_width(cur_trail.following)
+        elif isinstance(cur_trail.store, TrailSeries):
+            following, = widths
+            return self.TOTAL_MOUNTAIN_WIDTH + following
         else:
-            return 2 * self.BRANCH_WIDTH + max(
-                self.required_width(cur_trail.top),
-                self.required_width(cur_trail.bottom),
-                self.MIN_BRANCH_CONTENT_WIDTH,
-            ) + self.required_width(cur_trail.following)
+            top, bottom, following = widths
+            return 2 * self.BRANCH_WIDTH + max(top, bottom, self.MIN_BRANCH_CONTENT_WIDTH) + following
 
-    def draw_in_box(self, height, width, minx, miny, cur_trail: TrailBox|None=None) -> None:
+    def draw_in_box(self, height, width, minx, miny, cur_trail: Trail|None=None, address: tuple[str, ...]=()) -> None:
         if cur_trail is None:
-            ref_trail = self.trail
             cur_trail = self.trail.store
+            self.boxes = {}
         else:
-            ref_trail = cur_trail
             cur_trail = cur_trail.store
         if cur_trail is None:
             self.draw_line(minx, miny + height/2, minx + width, miny + height/2)
-            ref_trail.trail_box = Box(minx, miny + height/2-self.LINE_VERTICAL_BOX, width, 2*self.LINE_VERTICAL_BOX)
+            self.set_boxes(address, trail_box=Box(minx, miny + height/2-self.LINE_VERTICAL_BOX, width, 2*self.LINE_VERTICAL_BOX))
         elif isinstance(cur_trail, TrailSeries):
-            ref_trail.trail_box = Box(minx, miny, width, height)
+            self.set_boxes(address, trail_box=Box(minx, miny, width, height))
             p1 = self.TOTAL_MOUNTAIN_WIDTH
             p2 = self.required_width(cur_trail.following)
             total = p1 + p2
@@ -129,13 +121,16 @@ class TrailDraw:
             self.draw_line(start_mountain_trail_x, mid, start_mountain_x, mid)
             self.draw_line(end_mountain_x, mid, end_mountain_trail_x, mid)
             mountain_actual_height = self.MOUNTAIN_HEIGHT * (end_mountain_x - start_mountain_x) / self.MIN_MOUNTAIN_WIDTH
-            cur_trail.before_box = Box(start_mountain_trail_x, mid - mountain_actual_height/2, start_mountain_x - start_mountain_trail_x, mountain_actual_height)
-            cur_trail.mountain_box = Box(start_mountain_x, mid - mountain_actual_height/2, end_mountain_x - start_mountain_x, mountain_actual_height)
-            cur_trail.after_box = Box(end_mountain_x, mid - mountain_actual_height/2, end_mountain_trail_x - end_mountain_x, mountain_actual_height)
+            self.set_boxes(
+                address,
+                before_box=Box(start_mountain_trail_x, mid - mountain_actual_height/2, start_mountain_x - start_mountain_trail_x, mountain_actual_height),
+                mountain_box=Box(start_mountain_x, mid - mountain_actual_height/2, end_mountain_x - start_mountain_x, mountain_actual_height),
+                after_box=Box(end_mountain_x, mid - mountain_actual_height/2, end_mountain_trail_x - end_mountain_x, mountain_actual_height),
+            )
             # Draw rest
-            self.draw_in_box(height, p2/total*width, minx+p1_total_dist, miny, cur_trail.following)
+            self.draw_in_box(height, p2/total*width, minx+p1_total_dist, miny, cur_trail.following, address + ("F",))
         else:
-            ref_trail.trail_box = Box(minx, miny, width, height)
+            self.set_boxes(address, trail_box=Box(minx, miny, width, height))
             b1 = self.required_width(cur_trail.top)
             b2 = self.required_width(cur_trail.bottom)
             b3 = self.required_width(cur_trail.following)
@@ -157,13 +152,16 @@ class TrailDraw:
             # Draw branches
             self.draw_branch(minx, mid, minx+self.BRANCH_WIDTH, miny + bot_section + self.BRANCH_SEPARATION + top_section / 2, miny + bot_section / 2)
             self.draw_branch(minx + width - b3_dist, mid, minx + width - self.BRANCH_WIDTH - b3_dist, miny + bot_section + self.BRANCH_SEPARATION + top_section / 2, miny + bot_section / 2)
-            cur_trail.branch_start_box = Box(minx, mid - self.BRANCH_SEPARATION/2 - top_section/2, self.BRANCH_WIDTH, bot_section/2 + top_section/2 + self.BRANCH_SEPARATION)
-            cur_trail.branch_end_box = Box(minx+width-b3_dist-self.BRANCH_WIDTH, mid - self.BRANCH_SEPARATION/2 - top_section/2, self.BRANCH_WIDTH, bot_section/2 + top_section/2 + self.BRANCH_SEPARATION)
+            self.set_boxes(
+                address,
+                branch_start_box=Box(minx, mid - self.BRANCH_SEPARATION/2 - top_section/2, self.BRANCH_WIDTH, bot_section/2 + top_section/2 + self.BRANCH_SEPARATION),
+                branch_end_box=Box(minx+width-b3_dist-self.BRANCH_WIDTH, mid - self.BRANCH_SEPARATION/2 - top_section/2, self.BRANCH_WIDTH, bot_section/2 + top_section/2 + self.BRANCH_SEPARATION),
+            )
             # Draw top & bottom
-            self.draw_in_box(top_section, branch_dist, minx+self.BRANCH_WIDTH, miny+bot_section+self.BRANCH_SEPARATION, cur_trail.top)
-            self.draw_in_box(bot_section, branch_dist, minx+self.BRANCH_WIDTH, miny, cur_trail.bottom)
+            self.draw_in_box(top_section, branch_dist, minx+self.BRANCH_WIDTH, miny+bot_section+self.BRANCH_SEPARATION, cur_trail.top, address + ("T",))
+            self.draw_in_box(bot_section, branch_dist, minx+self.BRANCH_WIDTH, miny, cur_trail.bottom, address + ("B",))
             # Draw following
-            self.draw_in_box(height, b3_dist, minx + width - b3_dist, miny, cur_trail.following)
+            self.draw_in_box(height, b3_dist, minx + width - b3_dist, miny, cur_trail.following, address + ("F",))
 
     def draw_line(self, sx, sy, ex, ey):
         import arcade
@@ -212,44 +210,36 @@ class TrailDraw:
             for t in range(101)
         ], (0, 0, 0), 1)
 
-    def box_and_action(self, mouse_pos: tuple[float, float], mode=DrawMode, cur_trail: Trail|None=None, parent_sets: tuple[Trail, str]|None=None) -> tuple[Box|None, function|None, Trail|None]:
-        if cur_trail is None:
-            ref_trail = self.trail
-            cur_trail = self.trail.store
-            parent_sets = (self, "trail")
-        else:
-            ref_trail = cur_trail
-            cur_trail = cur_trail.store
-        if mouse_pos not in ref_trail.trail_box:
+    def box_and_action(self, mouse_pos: tuple[float, float], mode=DrawMode, cursor: TrailCursor|None=None, address: tuple[str, ...]=()) -> tuple[Box|None, function|None, Trail|None]:
+        if cursor is None:
+            cursor = TrailCursor(self.trail)
+        cur_trail = cursor.store
+        if not self.in_box(mouse_pos, address, "trail_box"):
             return None, None, None
-        def set_m(ref, cur_method):
-            def func(*m):
-                ref.store = cur_method(*m)
-            return func
-        def set_parent(parent_set, cur_method):
-            parent, attribute = parent_set
+        # Edits go through the cursor, which gives a new root to replace the trail being drawn.
+        def edit(cursor_method):
             def func(*m):
-                setattr(parent, attribute, cur_method(*m))
+                self.trail = cursor_method(*m)
             return func
         if cur_trail is None:
             if mode in [DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH]:
-                return ref_trail.trail_box, set_parent(parent_sets, ref_trail.add_mountain_before if mode == DrawMode.ADD_MOUNTAIN else ref_trail.add_empty_branch_before), cur_trail
+                return self.get_box(address, "trail_box"), edit(cursor.add_mountain_before if mode == DrawMode.ADD_MOUNTAIN else cursor.add_empty_branch_before), cur_trail
         elif isinstance(cur_trail, TrailSeries):
-            if mouse_pos in cur_trail.before_box and mode in [DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH]:
-                return cur_trail.before_box, set_m(ref_trail, cur_trail.add_mountain_before if mode == DrawMode.ADD_MOUNTAIN else cur_trail.add_empty_branch_before), cur_trail
-            if mouse_pos in cur_trail.mountain_box and mode in [DrawMode.REMOVE, DrawMode.EDIT]:
-                return cur_trail.mountain_box, (set_m(ref_trail, cur_trail.remove_mountain) if mode == DrawMode.REMOVE else lambda: cur_trail.mountain), cur_trail
-            if mouse_pos in cur_trail.after_box and mode in [DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH]:
-                return cur_trail.after_box, set_m(ref_trail, cur_trail.add_mountain_after if mode == DrawMode.ADD_MOUNTAIN else cur_trail.add_empty_branch_after), cur_trail
-            return self.box_and_action(mouse_pos, mode, cur_trail.following, (cur_trail, 'following'))
+            if self.in_box(mouse_pos, address, "before_box") and mode in [DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH]:
+                return self.get_box(address, "before_box"), edit(cursor.add_mountain_before if mode == DrawMode.ADD_MOUNTAIN else cursor.add_empty_branch_before), cur_trail
+            if self.in_box(mouse_pos, address, "mountain_box") and mode in [DrawMode.REMOVE, DrawMode.EDIT]:
+                return self.get_box(address, "mountain_box"), edit(cursor.remove_mountain if mode == DrawMode.REMOVE else cursor.replace_mountain), cur_trail
+            if self.in_box(mouse_pos, address, "after_box") and mode in [DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH]:
+                return self.get_box(address, "after_box"), edit(cursor.add_mountain_after if mode == DrawMode.ADD_MOUNTAIN else cursor.add_empty_branch_after), cur_trail
+            return self.box_and_action(mouse_pos, mode, cursor.following(), address + ("F",))
         else:
-            if mouse_pos in cur_trail.branch_start_box and mode == DrawMode.REMOVE:
-                return cur_trail.branch_start_box, set_m(ref_trail, cur_trail.remove_branch), cur_trail
-            if mouse_pos in cur_trail.branch_end_box and mode == DrawMode.REMOVE:
-                return cur_trail.branch_end_box, set_m(ref_trail, cur_trail.remove_branch), cur_trail
-            if mouse_pos in cur_trail.bottom.trail_box:
-                return self.box_and_action(mouse_pos, mode, cur_trail.bottom, (cur_trail, 'bottom'))
-            if mouse_pos in cur_trail.top.trail_box:
-                return self.box_and_action(mouse_pos, mode, cur_trail.top, (cur_trail, 'top'))
-            return self.box_and_action(mouse_pos, mode, cur_trail.following, (cur_trail, 'following'))
+            if self.in_box(mouse_pos, address, "branch_start_box") and mode == DrawMode.REMOVE:
+                return self.get_box(address, "branch_start_box"), edit(cursor.remove_branch), cur_trail
+            if self.in_box(mouse_pos, address, "branch_end_box") and mode == DrawMode.REMOVE:
+                return self.get_box(address, "branch_end_box"), edit(cursor.remove_branch), cur_trail
+            if self.in_box(mouse_pos, address + ("B",), "trail_box"):
+                return self.box_and_action(mouse_pos, mode, cursor.bottom(), address + ("B",))
+            if self.in_box(mouse_pos, address + ("T",), "trail_box"):
+                return self.box_and_action(mouse_pos, mode, cursor.top(), address + ("T",))
+            return self.box_and_action(mouse_pos, mode, cursor.following(), address + ("F",))
         return None, None, None
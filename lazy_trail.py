@@ -0,0 +1,64 @@
+"""
+Trails whose store is only built the first time it is read.
+
+A LazyTrail holds a source and a key instead of a store, and calls source.load_store(key) on the
+first read of .store. The stores a source builds hold LazyTrails in turn, so a trail is loaded
+one node at a time as it is walked. Every query reads subtrails through .store, so a LazyTrail
+works wherever a Trail does.
+"""
+
+from __future__ import annotations
+from typing import Any, Protocol
+
+from trail import Trail, TrailStore
+
+#The slot Trail keeps its store in, which LazyTrail fills on first read
+_STORE = Trail.__dict__["store"]
+
+class StoreSource(Protocol):
+
+    def load_store(self, key: Any) -> TrailStore:
+        """Builds the store of the subtrail key stands for, with LazyTrails for its subtrails."""
+        ...
+
+class LazyTrail(Trail):
+    """
+    A Trail loaded on demand from a StoreSource.
+    Once loaded it keeps its store, and drops its source and key.
+    """
+
+    __slots__ = ("_source", "_key")
+
+    def __init__(self, source: StoreSource, key: Any) -> None:
+        self._source = source
+        self._key = key
+
+    @property
+    def store(self) -> TrailStore:
+        """
+        The store of this trail, built by the source on first read.
+        Complexity: O(1) once loaded, otherwise the cost of source.load_store
+        """
+        try:
+            return _STORE.__get__(self)
+        except AttributeError:
+            store = self._source.load_store(self._key)
+            _STORE.__set__(self, store)
+            self._source = self._key = None
+            return store
+
+    @store.setter
+    def store(self, store: TrailStore) -> None:
+        _STORE.__set__(self, store)
+        self._source = self._key = None
+
+    def is_loaded(self) -> bool:
+        """
+        Returns whether the store of this trail has been built yet.
+        Complexity: O(1)
+        """
+        try:
+            _STORE.__get__(self)
+        except AttributeError:
+            return False
+        return True
@@ -5,19 +5,20 @@ Requires no student import, but will use your implemented classes as part of it'
 
 import arcade
 import arcade.gui as gui
-import json
+import os
 import sys
 import secrets
-from copy import copy
 
 from constants import DrawMode
 from mountain import Mountain
 from mountain_manager import MountainManager
+from sqlite_mountain_manager import SQLiteMountainManager
 from trail import Trail, TrailSeries, TrailSplit
 from draw_trails import TrailDraw
 from mountain_organiser import MountainOrganiser
 from double_key_table import DoubleKeyTable
-from serialize import serialize, deserialize
+from serialize import dump
+from trail_stream import load
 
 class MyWindow(arcade.Window):
     """ Painter Window """
@@ -276,16 +277,26 @@ class MyWindow(arcade.Window):
     def setup(self) -> None:
         """Set up the game and initialize the variables."""
         self.reset()
-        self.mountain_manager = MountainManager()
         self.cur_filename = sys.argv[1] if len(sys.argv) > 1 else "basic.json"
-        with open(f"stores/{self.cur_filename}", "r") as f:
-            t = deserialize(json.loads(f.read()))
-        try:
-            # Try to add all existing mountains
-            for mountain in t.collect_all_mountains():
-                self.mountain_manager.add_mountain(mountain)
-        except NotImplementedError:
-            pass
+        # An optional second argument keeps the mountains in an SQLite catalogue between runs
+        catalogue = sys.argv[2] if len(sys.argv) > 2 else None
+        path = f"stores/{self.cur_filename}"
+        with open(path, "rb") as f:
+            t = load(f)
+        if catalogue is None:
+            self.mountain_manager = MountainManager()
+            try:
+                # Try to add all existing mountains
+                for mountain in t.collect_all_mountains():
+                    self.mountain_manager.add_mountain(mountain)
+            except NotImplementedError:
+                pass
+        else:
+            self.mountain_manager = SQLiteMountainManager(catalogue)
+            # Only rebuild the catalogue if the store changed, or the catalogue was edited, since it was built
+            source = f"{self.cur_filename}@{os.stat(path).st_mtime_ns}"
+            if self.mountain_manager.source != source:
+                self.mountain_manager.rebuild(t.collect_all_mountains(), source)
         self.mountain = TrailDraw(t)
         self.draw_box = None
 
@@ -352,7 +363,9 @@ class MyWindow(arcade.Window):
                                 pass
                         self.box_action()
                     elif self.cur_draw_mode == DrawMode.EDIT:
-                        self.cur_editing_mountain = self.box_action()
+                        # Editing swaps in a new mountain through the action, rather than changing this one.
+                        self.cur_editing_mountain = self.cur_trail.mountain
+                        self.replace_editing_mountain = self.box_action
                         self.input_mountain_name.text = self.cur_editing_mountain.name
                         self.input_difficulty_level.text = str(self.cur_editing_mountain.difficulty_level)
                         self.input_length.text = str(self.cur_editing_mountain.length)
@@ -445,12 +458,15 @@ class MyWindow(arcade.Window):
         self.edit_mode = False
 
     def on_save_clicked(self, event):
-        old_mountain = copy(self.cur_editing_mountain)
-        self.cur_editing_mountain.name = self.input_mountain_name.text
-        self.cur_editing_mountain.difficulty_level = int(self.input_difficulty_level.text)
-        self.cur_editing_mountain.length = int(self.input_length.text)
+        old_mountain = self.cur_editing_mountain
+        new_mountain = Mountain(
+            self.input_mountain_name.text,
+            int(self.input_difficulty_level.text),
+            int(self.input_length.text),
+        )
+        self.replace_editing_mountain(new_mountain)
         try:
-            self.mountain_manager.edit_mountain(old_mountain, self.cur_editing_mountain)
+            self.mountain_manager.edit_mountain(old_mountain, new_mountain)
         except NotImplementedError:
             pass
         # Close the window.
@@ -460,11 +476,12 @@ class MyWindow(arcade.Window):
         self.is_editing = False
         self.manager.disable()
         self.cur_editing_mountain = None
+        self.replace_editing_mountain = None
 
     def on_file_save_clicked(self, event):
         new_path = str(self.input_file_name.text)
         with open(f"stores/{new_path}", "w") as f:
-            f.write(serialize(self.mountain.trail))
+            dump(self.mountain.trail, f)
         # Close the window.
         self.on_file_close_clicked(event)
 
@@ -476,7 +493,12 @@ def main():
     """ Main function """
     window = MyWindow()
     window.setup()
-    arcade.run()
+    try:
+        arcade.run()
+    finally:
+        # Close the SQLite catalogue, if there is one, once the window has closed
+        if isinstance(window.mountain_manager, SQLiteMountainManager):
+            window.mountain_manager.close()
 
 if __name__ == "__main__":
     main()
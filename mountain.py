@@ -1,7 +1,8 @@
 from __future__ import annotations
 from dataclasses import dataclass
 
-@dataclass
+#Frozen, since trails keep summaries, pruning bounds and routes worked out from their mountains
+@dataclass(slots=True, frozen=True)
 class Mountain:
 
     name: str
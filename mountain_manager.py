@@ -1,91 +1,229 @@
 from __future__ import annotations
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+
 from mountain import Mountain
-from mountain_organiser import MountainOrganiser
+from data_structures.fenwick_tree import FenwickTree
 
 class MountainManager:
+    """
+    Keeps mountains in the order they were added, indexed two ways:
+    by value, to find the slots of a mountain in O(1), and by difficulty, to find every
+    mountain of one difficulty without looking at the others.
+
+    Mountains are frozen, so they hash by value and equal mountains share one entry in the value
+    index, whether or not they are the same object. Removals and edits take the first of them, as list.remove would.
+    The difficulties with a bucket are kept sorted, so grouping by difficulty needs no sort,
+    with a Fenwick tree of bucket sizes over them for counts, and each bucket also keeps its
+    mountains longest first for top-k queries.
+    """
+
+    #Slots are compacted once there are more removed ones than this on top of the live ones
+    COMPACT_SLACK = 32
 
     def __init__(self) -> None:
         """
-        Initialises a list of mountains and creates an instance of moutnain organiser
+        Initialises the mountain slots and the indexes over them
         Complexity: O(1)
         """
-        self.mountains = []
-        self.organiser = MountainOrganiser()
+        #mountains in the order they were added, with None where one was removed
+        self._slots: list[Mountain|None] = []
+        #mountain -> the slots holding a mountain equal to it in increasing order, usually just one
+        self._slots_of: dict[Mountain, list[int]] = {}
+        #difficulty -> {slot: mountain} for the mountains of that difficulty
+        self._buckets: dict[int, dict[int, Mountain]] = {}
+        #difficulties whose bucket is no longer in slot order after an edit
+        self._unordered: set[int] = set()
+        #difficulties that have a bucket, kept sorted as buckets come and go
+        self._difficulties: list[int] = []
+        #difficulty -> (-length, slot) for the mountains of that difficulty, sorted so the longest come first
+        self._by_length: dict[int, list[tuple[int, int]]] = {}
+        #bucket sizes by position in _difficulties, rebuilt on the next count after a difficulty comes or goes
+        self._sizes: FenwickTree|None = None
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def mountains(self) -> list[Mountain]:
+        """
+        The mountains in the order they were added
+        Complexity: O(n) where n is the number of slots, at most twice the number of mountains
+        """
+        return [mountain for mountain in self._slots if mountain is not None]
 
     def add_mountain(self, mountain: Mountain) -> None:
         """
-        Adds a mountain to the list
-        Complexity: O(1)
+        Adds a mountain after all the others
+        Complexity: O(1) amortised
         """
-        self.mountains.append(mountain)
+        slot = len(self._slots)
+        self._slots.append(mountain)
+        self._slots_of.setdefault(mountain, []).append(slot)
+        self._enter_bucket(slot, mountain)
+        self._count += 1
 
     def remove_mountain(self, mountain: Mountain) -> None:
         """
-        Removes a mountain from the list
-        Complexity: O(1)
+        Removes the first mountain equal to mountain, raising ValueError if there is none
+        Complexity: O(s) amortised where s is the number of mountains equal to mountain, usually O(1)
         """
-        self.mountains.remove(mountain)
+        slot = self._take_slot(mountain)
+        self._leave_bucket(slot, self._slots[slot])
+        self._slots[slot] = None
+        self._count -= 1
+        if len(self._slots) > 2 * self._count + self.COMPACT_SLACK:
+            self._compact()
 
     def edit_mountain(self, old: Mountain, new: Mountain) -> None:
         """
-        Edits an already existing mountain
-        Complexity: O(1)
+        Replaces the first mountain equal to old with new, in the same place, raising ValueError if there is none
+        Complexity: O(s) amortised where s is the number of mountains equal to old or new, usually O(1)
         """
-        pos = self.mountains.index(old)
-        self.mountains[pos] = new
+        slot = self._take_slot(old)
+        old = self._slots[slot]
+        self._slots[slot] = new
+        #an edit reuses an earlier slot, so it may not be the last one holding new
+        insort(self._slots_of.setdefault(new, []), slot)
+        if old.difficulty_level == new.difficulty_level:
+            self._buckets[old.difficulty_level][slot] = new
+            if old.length != new.length:
+                by_length = self._by_length[old.difficulty_level]
+                del by_length[bisect_left(by_length, (-old.length, slot))]
+                insort(by_length, (-new.length, slot))
+            return
+        self._leave_bucket(slot, old)
+        self._enter_bucket(slot, new)
 
     def mountains_with_difficulty(self, diff: int) -> list[Mountain]:
         """
-        Groups mountains with the same sifficulty level
-        Complexity: O(n) for best and worst case where n is the number of moutnains already in the list
+        Returns the mountains with the given difficulty, in the order they were added
+        Complexity: O(k) where k is the number of mountains with that difficulty,
+        O(klogk) the first time after an edit moved a mountain into it
         """
-        res = []
-        #we iterate through all the mountains and compare them to the given dif and if they are the same append them to the result
-        for mount in self.mountains:
-            if mount.difficulty_level == diff:
-                res.append(mount)
-        
-        return res
-
+        return list(self._bucket(diff).values())
 
     def group_by_difficulty(self) -> list[list[Mountain]]:
         """
-        Groups all mountains with the same difficult together
-        Complexity: best and worst case is O(nlogn) where n is the number of mountains in the existing list
+        Groups all mountains with the same difficulty together, in increasing order of difficulty
+        The difficulties are kept sorted as mountains come and go, so nothing is sorted here
+        Complexity: O(g + n) where g is the number of difficulties and n the number of mountains
+        """
+        return [list(self._bucket(diff).values()) for diff in self._difficulties]
+
+    def mountains_in_range(self, lo: int, hi: int) -> list[Mountain]:
+        """
+        Returns the mountains with difficulty from lo to hi inclusive, by difficulty and then in the order they were added
+        Complexity: O(logg + m) where g is the number of difficulties and m the number of mountains returned
         """
-        #first we clear the organisers list
-        self.organiser.lst_mountains = []
-        self.organiser.mountains_difficulty = []
-        #then add all the mountains to the organiser adn get a sorted list returned
-        self.organiser.add_mountains(self.mountains)
-        sorted_list = self.organiser.lst_mountains
-        #initialise variables inorder to slice the list into smaller lists
         res = []
-        lower = 0
-        upper = 1
-        prev_dif = 0
-        
-        #iterate through the sorted list
-        for i in range(len(sorted_list)):
-            #get the difficulty level fo the current 
-            cur_dif = sorted_list[i].difficulty_level
-            #if the current mountains difficulty is the same as the orevious we increse upper by 1
-            if cur_dif == prev_dif:
-                upper += 1
-            #if the previous dif isnt assigned yet and prev wasnt the same as current
-            elif prev_dif != 0:
-                #then we append a sliced list from the lower bound to the upper bound which contains all the mountains with that difficulty
-                res.append(sorted_list[lower:upper])
-                #then we set lower to upper and increase upper by one
-                lower = upper
-                upper += 1
-                #finally the cur dif becomes prev dif
-            prev_dif = cur_dif
-        
-        #finally we append the last slice after we reach the end of the list and then return the result
-        res.append(sorted_list[lower:upper])
+        for diff in self._difficulties[bisect_left(self._difficulties, lo):bisect_right(self._difficulties, hi)]:
+            res.extend(self._bucket(diff).values())
         return res
-    
 
-                
+    def count_in_range(self, lo: int, hi: int) -> int:
+        """
+        Returns the number of mountains with difficulty from lo to hi inclusive
+        Complexity: O(logg) where g is the number of difficulties, O(g) the first time after a difficulty came or went
+        """
+        if self._sizes is None:
+            self._sizes = FenwickTree(len(self._buckets[diff]) for diff in self._difficulties)
+        return self._sizes.range_sum(bisect_left(self._difficulties, lo), bisect_right(self._difficulties, hi))
 
+    def top_k_by_length(self, k: int, max_diff: int) -> list[Mountain]:
+        """
+        Returns the k longest mountains with difficulty at most max_diff, longest first,
+        with mountains of the same length in the order they were added
+        Complexity: O(g + klogg) where g is the number of difficulties up to max_diff
+        """
+        lists = [self._by_length[diff] for diff in self._difficulties[:bisect_right(self._difficulties, max_diff)]]
+        return [self._slots[slot] for _, slot in islice(heapq.merge(*lists), max(k, 0))]
+
+    def _bucket(self, diff: int) -> dict[int, Mountain]:
+        """
+        The {slot: mountain} bucket for a difficulty, put back in slot order if an edit disturbed it
+        Complexity: O(1), or O(klogk) when the bucket has to be sorted
+        """
+        bucket = self._buckets.get(diff)
+        if bucket is None:
+            return {}
+        if diff in self._unordered:
+            bucket = self._buckets[diff] = dict(sorted(bucket.items()))
+            self._unordered.discard(diff)
+        return bucket
+
+    def _enter_bucket(self, slot: int, mountain: Mountain) -> None:
+        """
+        Puts the mountain in slot into the indexes for its difficulty, making them if it is the first one
+        Complexity: O(logk) plus moving O(k) entries of a list, where k is the number of mountains of that difficulty,
+        or O(g) for a new difficulty where g is the number of difficulties
+        """
+        diff = mountain.difficulty_level
+        bucket = self._buckets.get(diff)
+        if bucket is None:
+            bucket = self._buckets[diff] = {}
+            self._by_length[diff] = []
+            insort(self._difficulties, diff)
+            self._sizes = None
+        elif slot < next(reversed(bucket)):
+            #an edited mountain keeps its slot, so it may belong before others already in the bucket
+            self._unordered.add(diff)
+        bucket[slot] = mountain
+        by_length = self._by_length[diff]
+        insort(by_length, (-mountain.length, slot))
+        if self._sizes is not None:
+            self._sizes.add(bisect_left(self._difficulties, diff), 1)
+
+    def _leave_bucket(self, slot: int, mountain: Mountain) -> None:
+        """
+        Takes the mountain in slot out of the indexes for its difficulty, dropping them once they are empty
+        Complexity: O(logk) plus moving O(k) entries of a list, where k is the number of mountains of that difficulty,
+        or O(g) when the difficulty empties where g is the number of difficulties
+        """
+        diff = mountain.difficulty_level
+        bucket = self._buckets[diff]
+        del bucket[slot]
+        if not bucket:
+            del self._buckets[diff]
+            del self._by_length[diff]
+            self._unordered.discard(diff)
+            del self._difficulties[bisect_left(self._difficulties, diff)]
+            self._sizes = None
+            return
+        by_length = self._by_length[diff]
+        del by_length[bisect_left(by_length, (-mountain.length, slot))]
+        if self._sizes is not None:
+            self._sizes.add(bisect_left(self._difficulties, diff), -1)
+
+    def _take_slot(self, mountain: Mountain) -> int:
+        """
+        Finds the first slot holding a mountain equal to mountain, as list.remove would, and forgets it in the value index
+        Complexity: O(s) where s is the number of mountains equal to mountain, usually O(1)
+        """
+        slots = self._slots_of.get(mountain)
+        if slots is None:
+            raise ValueError(f"{mountain} is not in the mountain manager")
+        slot = slots.pop(0)
+        if not slots:
+            del self._slots_of[mountain]
+        return slot
+
+    def _compact(self) -> None:
+        """
+        Drops the slots of removed mountains, renumbering the rest
+        Complexity: O(nlogn) where n is the number of slots
+        """
+        self._slots = self.mountains
+        self._slots_of = {}
+        self._buckets = {}
+        self._unordered = set()
+        for slot, mountain in enumerate(self._slots):
+            self._slots_of.setdefault(mountain, []).append(slot)
+            self._buckets.setdefault(mountain.difficulty_level, {})[slot] = mountain
+        #the same difficulties are left, still sorted, with the same sizes
+        self._by_length = {
+            diff: sorted((-mountain.length, slot) for slot, mountain in bucket.items())
+            for diff, bucket in self._buckets.items()
+        }
@@ -1,9 +1,10 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from enum import auto
+from typing import Any, Iterable
 from base_enum import BaseEnum
 from mountain import Mountain
-from trail import Trail
+from trail import Trail, TrailSeries
 
 class PersonalityDecision(BaseEnum):
     TOP = auto()
@@ -25,21 +26,69 @@ class WalkerPersonality(ABC):
         """
         self.mountains.append(mountain)
 
+    def add_mountains(self, mountains: Iterable[Mountain]) -> None:
+        """
+        Adds each of the input mountains in turn, as add_mountain would
+        Complexity: O(k) where k is the number of mountains
+        """
+        #Extend in one go unless a subclass wants to see every mountain
+        if type(self).add_mountain is WalkerPersonality.add_mountain:
+            self.mountains.extend(mountains)
+        else:
+            for mountain in mountains:
+                self.add_mountain(mountain)
+
+    def decision_key(self) -> Any:
+        """
+        Returns a hashable key shared by every personality that always makes the same choice
+        for the same two branches, whatever it has walked before, or None if there is no such key.
+        Trail.follow_paths asks select_branch once per key at each split.
+        Complexity: O(1)
+        """
+        return None
+
+    def _decision_key_of(self, owner: type, key: Any) -> Any:
+        """
+        Returns key as the decision key of owner's choices, or None if a subclass has overridden
+        select_branch, since it may choose differently (or count its calls). Such a subclass
+        gets grouped again by overriding decision_key itself.
+        Complexity: O(1)
+        """
+        return key if type(self).select_branch is owner.select_branch else None
+
+    def start_walk(self, trail: Trail) -> None:
+        """
+        Called with the whole trail before a walk of it begins, and before any select_branch.
+        Does nothing by default, personalities that plan ahead can look at the trail here.
+        Complexity: O(1)
+        """
+        pass
+
     @abstractmethod
     def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> PersonalityDecision:
         pass
 
 class TopWalker(WalkerPersonality):
+    def decision_key(self) -> Any:
+        return self._decision_key_of(TopWalker, type(self))
+
     def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> PersonalityDecision:
         # Always select the top branch
         return PersonalityDecision.TOP
 
 class BottomWalker(WalkerPersonality):
+    def decision_key(self) -> Any:
+        return self._decision_key_of(BottomWalker, type(self))
+
     def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> PersonalityDecision:
         # Always select the bottom branch
         return PersonalityDecision.BOTTOM
 
 class LazyWalker(WalkerPersonality):
+    def decision_key(self) -> Any:
+        # Only looks at the first mountain of each branch
+        return self._decision_key_of(LazyWalker, type(self))
+
     def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> PersonalityDecision:
         """
         Try looking into the first mountain on each branch,
@@ -61,3 +110,82 @@ class LazyWalker(WalkerPersonality):
         if top_m:
             return PersonalityDecision.BOTTOM
         return PersonalityDecision.TOP
+
+class EasiestWalker(WalkerPersonality):
+    """
+    Take the branch with the lowest total difficulty over its easiest path,
+    so the whole walk has the lowest total difficulty possible.
+    """
+
+    def decision_key(self) -> Any:
+        return self._decision_key_of(EasiestWalker, type(self))
+
+    def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> PersonalityDecision:
+        """
+        The summaries of both branches already hold their easiest total, and are kept on the trail.
+        Complexity: O(1) once the trail's summary is known, O(size of the branches) the first time
+        """
+        if top_branch.summary().min_path_difficulty <= bottom_branch.summary().min_path_difficulty:
+            return PersonalityDecision.TOP
+        return PersonalityDecision.BOTTOM
+
+class LongestWalker(WalkerPersonality):
+    """
+    Take the branch with the greatest total length over the paths that never climb
+    a mountain harder than max_difficulty, so the whole walk is the longest such walk.
+    Stops at a split where neither branch can be walked within max_difficulty.
+    """
+
+    def __init__(self, max_difficulty: int) -> None:
+        super().__init__()
+        self.max_difficulty = max_difficulty
+        self.lengths: dict[int, int|None] = {}
+
+    def decision_key(self) -> Any:
+        return self._decision_key_of(LongestWalker, (type(self), self.max_difficulty))
+
+    def start_walk(self, trail: Trail) -> None:
+        """
+        Looks up the longest length of every subtrail, worked out in one pass and kept with the trail.
+        Complexity: O(1) if already known for this trail and max_difficulty, otherwise O(n)
+        """
+        self.lengths = trail.subtrail_values((type(self), self.max_difficulty), self.longest_length)
+
+    def longest_length(self, trail: Trail, *lengths: int|None) -> int|None:
+        """
+        Combines the longest lengths of the parts of a trail, None meaning no path is within max_difficulty.
+        Complexity: O(1)
+        """
+        store = trail.store
+        if store is None:
+            return 0
+        if isinstance(store, TrailSeries):
+            following, = lengths
+            if following is None or store.mountain.difficulty_level > self.max_difficulty:
+                return None
+            return store.mountain.length + following
+        top, bottom, following = lengths
+        best = max((length for length in (top, bottom) if length is not None), default=None)
+        if best is None or following is None:
+            return None
+        return best + following
+
+    def branch_length(self, branch: Trail) -> int|None:
+        """
+        Returns the longest length of a branch, from the table when the branch is part of the trail walked.
+        Complexity: O(1) for a branch of the trail given to start_walk, otherwise O(size of the branch)
+        """
+        if branch.store is None:
+            return 0
+        if id(branch.store) in self.lengths:
+            return self.lengths[id(branch.store)]
+        return branch.subtrail_values((type(self), self.max_difficulty), self.longest_length)[id(branch.store)]
+
+    def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> PersonalityDecision:
+        top = self.branch_length(top_branch)
+        bottom = self.branch_length(bottom_branch)
+        if top is None and bottom is None:
+            return PersonalityDecision.STOP
+        if bottom is None or (top is not None and top >= bottom):
+            return PersonalityDecision.TOP
+        return PersonalityDecision.BOTTOM
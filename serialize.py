@@ -1,44 +1,213 @@
 from __future__ import annotations
-import dataclasses, json
+import dataclasses, io, json
+from functools import partial
 
-from trail import Trail, TrailSplit, TrailSeries
+from typing import TYPE_CHECKING, Iterable, TextIO
+
+from lazy_trail import LazyTrail
+from trail import Trail, TrailSplit, TrailSeries, TrailStore, fold_postorder, trail_children
 from mountain import Mountain
 
-# https://stackoverflow.com/questions/51286748/make-the-python-json-encoder-support-pythons-new-dataclasses
-class EnhancedJSONEncoder(json.JSONEncoder):
-    def default(self, o):
-        if dataclasses.is_dataclass(o):
-            res = dataclasses.asdict(o)
-            self.remove_box(res)
-            return res
-        return super().default(o)
-
-    def remove_box(self, obj):
-        if isinstance(obj, dict):
-            rm_keys = list(filter(lambda x: x.endswith("_box"), obj.keys()))
-            for key in rm_keys:
-                del obj[key]
-            for key in obj.keys():
-                self.remove_box(obj[key])
-        if isinstance(obj, list):
-            for o in obj:
-                self.remove_box(o)
-
-def serialize(trail):
-    return json.dumps(trail, cls=EnhancedJSONEncoder)
-
-def deserialize(obj):
-    if obj["store"] is None:
+# Avoid circular imports for typing.
+if TYPE_CHECKING:
+    from trail_interner import TrailInterner
+
+#Mountain fields written to a store, leaving out draw boxes and cached values
+MOUNTAIN_FIELDS = tuple(f.name for f in dataclasses.fields(Mountain) if not (f.name.startswith("_") or f.name.endswith("_box")))
+
+#Pieces of text gathered before each write to the file
+_WRITE_BATCH = 4096
+
+def dump(trail: Trail, fp: TextIO) -> None:
+    """
+    Writes trail to the text file fp as JSON, in one pass with an explicit stack.
+    The text is the same json.dumps would give for the trail as nested dicts.
+    Complexity: O(n) where n is the number of nodes, with O(number of open splits) extra memory
+    """
+    parts: list[str] = []
+    stack: list = [trail]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        item = pop()
+        if isinstance(item, str):
+            parts.append(item)
+        else:
+            store = item.store
+            if store is None:
+                parts.append('{"store": null}')
+            elif isinstance(store, TrailSeries):
+                parts.append(f'{{"store": {{"mountain": {_mountain_json(store.mountain)}, "following": ')
+                push("}}")
+                push(store.following)
+            else:
+                parts.append('{"store": {"top": ')
+                push("}}")
+                push(store.following)
+                push(', "following": ')
+                push(store.bottom)
+                push(', "bottom": ')
+                push(store.top)
+        if len(parts) >= _WRITE_BATCH:
+            fp.write("".join(parts))
+            parts.clear()
+    fp.write("".join(parts))
+
+def _mountain_json(mountain: Mountain) -> str:
+    return "{" + ", ".join(f'"{name}": {_json_value(getattr(mountain, name))}' for name in MOUNTAIN_FIELDS) + "}"
+
+def _json_value(value) -> str:
+    if value.__class__ is int:
+        return str(value)
+    return json.dumps(value)
+
+def serialize(trail: Trail) -> str:
+    """
+    Returns trail as JSON text, see dump.
+    Complexity: O(n) where n is the number of nodes
+    """
+    out = io.StringIO()
+    dump(trail, out)
+    return out.getvalue()
+
+def deserialize(obj, interner: TrailInterner|None=None, lazy: bool=False):
+    """
+    Builds a Trail from the dicts made by serialize.
+    If an interner is given, equal subtrails come out as the same canonical objects.
+    If lazy, only the root is made, and each node is built from its dict the first time it is read,
+    so a query that walks part of the trail only pays for that part.
+    """
+    if lazy:
+        if interner is not None:
+            raise ValueError("A lazily built trail cannot be interned, interning reads every node")
+        return LazyTrail(STORED_SOURCE, obj)
+    if interner is not None:
+        return fold_postorder(obj, _stored_children, partial(_build_interned_trail, interner))
+    return fold_postorder(obj, _stored_children, _build_trail)
+
+class StoredTrailSource:
+    """
+    Builds the stores of lazily deserialized trails from the dicts made by serialize.
+    The dicts are kept until the nodes they stand for are read.
+    """
+
+    def load_store(self, obj) -> TrailStore:
+        """
+        Builds the store for obj, with LazyTrails for its subtrails.
+        Complexity: O(1)
+        """
+        store = obj["store"]
+        if store is None:
+            return None
+        if "mountain" in store:
+            return TrailSeries(Mountain(**store["mountain"]), LazyTrail(self, store["following"]))
+        return TrailSplit(LazyTrail(self, store["top"]), LazyTrail(self, store["bottom"]), LazyTrail(self, store["following"]))
+
+STORED_SOURCE = StoredTrailSource()
+
+def _stored_children(obj):
+    store = obj["store"]
+    if store is None:
+        return ()
+    if "mountain" in store:
+        return (store["following"],)
+    return (store["top"], store["bottom"], store["following"])
+
+def _build_trail(obj, *children):
+    store = obj["store"]
+    if store is None:
         return Trail(None)
-    if "mountain" in obj["store"]:
-        inside = TrailSeries(
-            Mountain(**obj["store"]["mountain"]),
-            deserialize(obj["store"]["following"])
-        )
-    else:
-        inside = TrailSplit(
-            deserialize(obj["store"]["top"]),
-            deserialize(obj["store"]["bottom"]),
-            deserialize(obj["store"]["following"])
-        )
-    return Trail(inside)
+    if "mountain" in store:
+        return Trail(TrailSeries(Mountain(**store["mountain"]), *children))
+    return Trail(TrailSplit(*children))
+
+def _build_interned_trail(interner, obj, *children):
+    store = obj["store"]
+    if store is None:
+        return interner.empty()
+    if "mountain" in store:
+        return interner.trail(interner.series(interner.mountain(**store["mountain"]), *children))
+    return interner.trail(interner.split(*children))
+
+#Format name written at the top of a DAG store
+DAG_FORMAT = "trail-dag"
+DAG_VERSION = 1
+
+def dump_dag(trails: Trail|Iterable[Trail], fp: TextIO) -> None:
+    """
+    Writes one or more trails to the text file fp as a DAG store:
+        {"format": "trail-dag", "version": 1, "nodes": [...], "roots": [...]}
+    Every distinct node is written once, after the nodes below it, as one of
+        null                                                    an empty trail
+        {"mountain": {...}, "following": id}                    a series
+        {"top": id, "bottom": id, "following": id}              a split
+    where an id is the position of an earlier node in "nodes". "roots" holds the id of each trail.
+    Subtrails shared between the trails, or within one, are written once and read back shared,
+    so several versions of a trail made by persistent edits cost little more than one.
+    Complexity: O(number of distinct nodes)
+    """
+    if isinstance(trails, Trail):
+        trails = (trails,)
+    #Node id of each store written so far, by id(store), with the stores kept alive alongside
+    ids: dict[int, int] = {}
+    written: list = []
+    parts: list[str] = []
+
+    def children(trail: Trail) -> tuple[Trail, ...]:
+        #Nodes already written are leaves for the walk
+        if id(trail.store) in ids:
+            return ()
+        return trail_children(trail)
+
+    def combine(trail: Trail, *child_ids: int) -> int:
+        store = trail.store
+        node_id = ids.get(id(store))
+        if node_id is not None:
+            return node_id
+        if store is None:
+            text = "null"
+        elif isinstance(store, TrailSeries):
+            text = f'{{"mountain": {_mountain_json(store.mountain)}, "following": {child_ids[0]}}}'
+        else:
+            text = '{{"top": {}, "bottom": {}, "following": {}}}'.format(*child_ids)
+        node_id = ids[id(store)] = len(written)
+        written.append(store)
+        parts.append(",\n" + text if node_id else "\n" + text)
+        if len(parts) >= _WRITE_BATCH:
+            fp.write("".join(parts))
+            parts.clear()
+        return node_id
+
+    fp.write(f'{{"format": "{DAG_FORMAT}", "version": {DAG_VERSION}, "nodes": [')
+    roots = [fold_postorder(trail, children, combine) for trail in trails]
+    parts.append(f'\n], "roots": {json.dumps(roots)}}}\n')
+    fp.write("".join(parts))
+
+def serialize_dag(trails: Trail|Iterable[Trail]) -> str:
+    """
+    Returns one or more trails as a DAG store, see dump_dag.
+    Complexity: O(number of distinct nodes)
+    """
+    out = io.StringIO()
+    dump_dag(trails, out)
+    return out.getvalue()
+
+def deserialize_dag(obj) -> list[Trail]:
+    """
+    Builds the trails of a DAG store from its parsed JSON, one Trail per stored node,
+    so subtrails stored once are shared by every trail using them.
+    Complexity: O(number of stored nodes)
+    """
+    if obj.get("format") != DAG_FORMAT:
+        raise ValueError("Not a trail DAG store")
+    if obj.get("version") != DAG_VERSION:
+        raise ValueError(f"Trail DAG store version {obj.get('version')} is not supported, expected {DAG_VERSION}")
+    built: list[Trail] = []
+    for node in obj["nodes"]:
+        if node is None:
+            built.append(Trail(None))
+        elif "mountain" in node:
+            built.append(Trail(TrailSeries(Mountain(**node["mountain"]), built[node["following"]])))
+        else:
+            built.append(Trail(TrailSplit(built[node["top"]], built[node["bottom"]], built[node["following"]])))
+    return [built[root] for root in obj["roots"]]
@@ -0,0 +1,196 @@
+"""
+A MountainManager kept in a local SQLite file, so a catalogue of mountains survives restarts.
+
+Mountains are rows of one table, in the order they were added (by row id), with indexes on
+difficulty and on name. Every change is committed as it is made, and add_mountains adds a whole
+batch in one transaction. Opening an existing file reads nothing up front, so a warm start costs
+only the queries that follow.
+
+The catalogue remembers what it was last rebuilt from (see rebuild), and forgets it on any other
+change, so a caller can tell whether the mountains on disk still match their source.
+"""
+
+from __future__ import annotations
+import sqlite3
+from typing import Iterable
+
+from mountain import Mountain
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mountains (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    difficulty_level INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mountains_by_difficulty ON mountains (difficulty_level, id, name, length);
+CREATE INDEX IF NOT EXISTS mountains_by_name ON mountains (name, difficulty_level, length);
+CREATE INDEX IF NOT EXISTS mountains_by_length ON mountains (length DESC, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_COLUMNS = "name, difficulty_level, length"
+
+class SQLiteMountainManager:
+    """
+    Same interface as MountainManager, with the mountains in an SQLite database.
+    Mountains handed out are new objects made from their row, so mountains are found
+    for removal and edits by equality rather than identity.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        """
+        Opens (or makes) the catalogue at path
+        Complexity: O(1)
+        """
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        with self._db:
+            self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> SQLiteMountainManager:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM mountains").fetchone()[0]
+
+    @property
+    def mountains(self) -> list[Mountain]:
+        """
+        The mountains in the order they were added
+        Complexity: O(n) where n is the number of mountains
+        """
+        return self._select("ORDER BY id")
+
+    @property
+    def source(self) -> str|None:
+        """
+        What the mountains were last rebuilt from, or None once they have been changed since
+        Complexity: O(1)
+        """
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        return row[0] if row else None
+
+    def rebuild(self, mountains: Iterable[Mountain], source: str) -> None:
+        """
+        Replaces every mountain with mountains, in one transaction, and records where they came from
+        Complexity: O(mlogm) where m is the number of mountains added, plus O(n) for the n removed
+        """
+        with self._db:
+            self._db.execute("DELETE FROM mountains")
+            self._insert(mountains)
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('source', ?)", (source,))
+
+    def add_mountain(self, mountain: Mountain) -> None:
+        """
+        Adds a mountain after all the others
+        Complexity: O(logn) where n is the number of mountains
+        """
+        self.add_mountains((mountain,))
+
+    def add_mountains(self, mountains: Iterable[Mountain]) -> None:
+        """
+        Adds mountains after all the others, in one transaction
+        Complexity: O(mlogn) where m is the number of mountains added and n the number in the catalogue
+        """
+        with self._db:
+            self._insert(mountains)
+            self._changed()
+
+    def remove_mountain(self, mountain: Mountain) -> None:
+        """
+        Removes the first mountain equal to mountain, raising ValueError if there is none
+        Complexity: O(logn + s) where s is the number of mountains equal to mountain
+        """
+        row = self._find(mountain)
+        with self._db:
+            self._db.execute("DELETE FROM mountains WHERE id = ?", (row,))
+            self._changed()
+
+    def edit_mountain(self, old: Mountain, new: Mountain) -> None:
+        """
+        Replaces the first mountain equal to old with new, in the same place, raising ValueError if there is none
+        Complexity: O(logn + s) where s is the number of mountains equal to old
+        """
+        row = self._find(old)
+        with self._db:
+            self._db.execute("UPDATE mountains SET name = ?, difficulty_level = ?, length = ? WHERE id = ?",
+                             (new.name, new.difficulty_level, new.length, row))
+            self._changed()
+
+    def mountains_with_difficulty(self, diff: int) -> list[Mountain]:
+        """
+        Returns the mountains with the given difficulty, in the order they were added
+        Complexity: O(logn + k) where k is the number of mountains with that difficulty
+        """
+        return self._select("WHERE difficulty_level = ? ORDER BY id", (diff,))
+
+    def mountains_in_range(self, lo: int, hi: int) -> list[Mountain]:
+        """
+        Returns the mountains with difficulty from lo to hi inclusive, by difficulty and then in the order they were added
+        Complexity: O(logn + m) where m is the number of mountains returned
+        """
+        return self._select("WHERE difficulty_level BETWEEN ? AND ? ORDER BY difficulty_level, id", (lo, hi))
+
+    def count_in_range(self, lo: int, hi: int) -> int:
+        """
+        Returns the number of mountains with difficulty from lo to hi inclusive
+        Complexity: O(logn + m) where m is the number of mountains counted, read from the index alone
+        """
+        return self._db.execute("SELECT COUNT(*) FROM mountains WHERE difficulty_level BETWEEN ? AND ?", (lo, hi)).fetchone()[0]
+
+    def top_k_by_length(self, k: int, max_diff: int) -> list[Mountain]:
+        """
+        Returns the k longest mountains with difficulty at most max_diff, longest first,
+        with mountains of the same length in the order they were added
+        Complexity: O(logn + r) where r is the number of rows read down the length index to find k matches
+        """
+        return self._select("INDEXED BY mountains_by_length WHERE difficulty_level <= ? ORDER BY length DESC, id LIMIT ?", (max_diff, max(k, 0)))
+
+    def group_by_difficulty(self) -> list[list[Mountain]]:
+        """
+        Groups all mountains with the same difficulty together, in increasing order of difficulty
+        Complexity: O(n) where n is the number of mountains, read in order from the difficulty index
+        """
+        groups: list[list[Mountain]] = []
+        prev = None
+        for name, difficulty_level, length in self._db.execute(
+                f"SELECT {_COLUMNS} FROM mountains INDEXED BY mountains_by_difficulty ORDER BY difficulty_level, id"):
+            if difficulty_level != prev or not groups:
+                groups.append([])
+                prev = difficulty_level
+            groups[-1].append(Mountain(name, difficulty_level, length))
+        return groups
+
+    def _insert(self, mountains: Iterable[Mountain]) -> None:
+        self._db.executemany(f"INSERT INTO mountains ({_COLUMNS}) VALUES (?, ?, ?)",
+                             ((m.name, m.difficulty_level, m.length) for m in mountains))
+
+    def _changed(self) -> None:
+        #the mountains no longer match what they were rebuilt from
+        self._db.execute("DELETE FROM meta WHERE key = 'source'")
+
+    def _select(self, clause: str, params: tuple = ()) -> list[Mountain]:
+        rows = self._db.execute(f"SELECT {_COLUMNS} FROM mountains {clause}", params)
+        return [Mountain(name, difficulty_level, length) for name, difficulty_level, length in rows]
+
+    def _find(self, mountain: Mountain) -> int:
+        """
+        The id of the first row equal to mountain
+        Complexity: O(logn + s) where s is the number of mountains equal to mountain
+        """
+        row = self._db.execute("SELECT id FROM mountains WHERE name = ? AND difficulty_level = ? AND length = ? ORDER BY id LIMIT 1",
+                               (mountain.name, mountain.difficulty_level, mountain.length)).fetchone()
+        if row is None:
+            raise ValueError(f"{mountain} is not in the mountain manager")
+        return row[0]
@@ -0,0 +1,63 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from ed_utils.decorators import number
+
+from batch import evaluate, find_shards, read_shard, run
+from mountain import Mountain
+from serialize import serialize
+from trail import Trail, TrailSeries, TrailSplit
+
+class TestBatch(unittest.TestCase):
+
+    def make_trail(self, i: int) -> Trail:
+        return Trail(TrailSplit(
+            Trail(TrailSeries(Mountain(f"top-{i}", i % 7, 2), Trail(None))),
+            Trail(TrailSeries(Mountain(f"bot-{i}", 3, 4), Trail(None))),
+            Trail(TrailSeries(Mountain(f"final-{i}", 1, 1), Trail(None))),
+        ))
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.single = os.path.join(self.folder.name, "single.json")
+        with open(self.single, "w") as f:
+            f.write(serialize(self.make_trail(100)))
+        self.lines = os.path.join(self.folder.name, "trails.jsonl")
+        with open(self.lines, "w") as f:
+            for i in range(30):
+                f.write(serialize(self.make_trail(i)) + "\n")
+                if i == 10:
+                    f.write("\n")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    @number("10.1")
+    def test_shards(self):
+        # Every line is read by exactly one shard, whatever the shard size.
+        whole = [offset for offset, _ in read_shard(self.lines, 0, os.path.getsize(self.lines))]
+        self.assertEqual(len(whole), 30)
+        for shard_bytes in (1, 37, 200, 10**6):
+            offsets = [offset for shard in find_shards([self.lines], shard_bytes) for offset, _ in read_shard(*shard)]
+            self.assertListEqual(offsets, whole)
+
+        result = evaluate(self.make_trail(5), 4)
+        self.assertListEqual(result["mountains"], ["top-5", "bot-5", "final-5"])
+        self.assertListEqual(result["walks"]["BottomWalker"], ["bot-5", "final-5"])
+        self.assertListEqual(result["walks"]["EasiestWalker"], ["bot-5", "final-5"])
+        self.assertListEqual(result["difficulty_maximum_paths"], [["bot-5", "final-5"]])
+        self.assertEqual(evaluate(self.make_trail(1), 4, count_paths=True)["difficulty_maximum_paths"], 2)
+
+    @number("10.2")
+    def test_run_in_order(self):
+        inline = io.StringIO()
+        self.assertEqual(run([self.single, self.lines], inline, workers=0, max_difficulty=4, shard_bytes=100), 31)
+        pooled = io.StringIO()
+        self.assertEqual(run([self.single, self.lines], pooled, workers=2, max_difficulty=4, shard_bytes=100), 31)
+        self.assertEqual(pooled.getvalue(), inline.getvalue())
+
+        results = [json.loads(line) for line in inline.getvalue().splitlines()]
+        self.assertEqual(results[0]["source"], self.single)
+        self.assertListEqual([result["mountains"][0] for result in results[1:]], [f"top-{i}" for i in range(30)])
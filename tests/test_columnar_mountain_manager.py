@@ -0,0 +1,45 @@
+import unittest
+from ed_utils.decorators import number
+
+from columnar_mountain_manager import ColumnarMountainManager
+from mountain import Mountain
+from mountain_manager import MountainManager
+
+class TestColumnarMountainManager(unittest.TestCase):
+
+    @number("15.1")
+    def test_matches_mountain_manager(self):
+        mountains = [Mountain(f"m{i}", (i * 7) % 5, (i * 3) % 8) for i in range(40)]
+        indexed = MountainManager()
+        columnar = ColumnarMountainManager()
+        for mountain in mountains:
+            indexed.add_mountain(mountain)
+        columnar.add_mountains(mountains)
+        for mountain in mountains[:30:3]:
+            indexed.remove_mountain(mountain)
+            columnar.remove_mountain(mountain)
+        for i in (31, 35, 39):
+            indexed.edit_mountain(mountains[i], Mountain(f"edited{i}", 9 - i % 3, i))
+            columnar.edit_mountain(mountains[i], Mountain(f"edited{i}", 9 - i % 3, i))
+
+        self.assertEqual(len(columnar), 30)
+        self.assertEqual(columnar.mountains, indexed.mountains)
+        self.assertEqual(columnar.group_by_difficulty(), indexed.group_by_difficulty())
+        for diff in range(-1, 11):
+            self.assertEqual(columnar.mountains_with_difficulty(diff), indexed.mountains_with_difficulty(diff))
+            self.assertEqual(columnar.mountains_in_range(diff, diff + 3), indexed.mountains_in_range(diff, diff + 3))
+            self.assertEqual(columnar.count_in_range(diff, diff + 3), indexed.count_in_range(diff, diff + 3))
+            self.assertEqual(columnar.top_k_by_length(6, diff), indexed.top_k_by_length(6, diff))
+        self.assertRaises(ValueError, lambda: columnar.remove_mountain(mountains[0]))
+
+    @number("15.2")
+    def test_columns_and_aggregates(self):
+        columnar = ColumnarMountainManager.from_columns(["a", "b", "c", "a", "d"], [2, 1, 2, 3, 1], [4, 6, 10, 1, 3])
+        self.assertEqual(columnar.mountains_with_difficulty(2), [Mountain("a", 2, 4), Mountain("c", 2, 10)])
+        self.assertEqual(columnar.mean_length_by_difficulty(), {1: 4.5, 2: 7.0, 3: 1.0})
+        self.assertEqual(columnar.max_length_by_difficulty(), {1: 6, 2: 10, 3: 1})
+        self.assertEqual(ColumnarMountainManager().max_length_by_difficulty(), {})
+        self.assertEqual(ColumnarMountainManager().group_by_difficulty(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import pickle
+import unittest
+from ed_utils.decorators import number
+
+from mountain import Mountain
+from trail import Trail, TrailSeries, TrailSplit
+from compiled_trail import CompiledTrail, EMPTY, SERIES, SPLIT
+from personality import TopWalker, BottomWalker, LazyWalker, LongestWalker, PersonalityDecision
+
+class TestCompiledTrail(unittest.TestCase):
+
+    def load_example(self):
+        self.top_top = Mountain("top-top", 5, 3)
+        self.top_bot = Mountain("top-bot", 3, 5)
+        self.top_mid = Mountain("top-mid", 4, 7)
+        self.bot_one = Mountain("bot-one", 2, 5)
+        self.bot_two = Mountain("bot-two", 0, 0)
+        self.final   = Mountain("final", 4, 4)
+        self.trail = Trail(TrailSplit(
+            Trail(TrailSplit(
+                Trail(TrailSeries(self.top_top, Trail(None))),
+                Trail(TrailSeries(self.top_bot, Trail(None))),
+                Trail(TrailSeries(self.top_mid, Trail(None))),
+            )),
+            Trail(TrailSeries(self.bot_one, Trail(TrailSplit(
+                Trail(TrailSeries(self.bot_two, Trail(None))),
+                Trail(TrailSplit(Trail(None), Trail(None), Trail(None))),
+                Trail(None),
+            )))),
+            Trail(TrailSeries(self.final, Trail(None)))
+        ))
+
+    @number("8.1")
+    def test_compile(self):
+        self.load_example()
+        compiled = self.trail.compile()
+        self.assertEqual(len(compiled), 19)
+        self.assertEqual(compiled.kind[0], SPLIT)
+        self.assertEqual(compiled.kind[compiled.top[0]], SPLIT)
+        self.assertEqual(compiled.kind[compiled.following[0]], SERIES)
+        self.assertEqual(compiled.kind[compiled.following[compiled.following[0]]], EMPTY)
+        self.assertEqual(compiled.names[compiled.name[compiled.following[0]]], "final")
+        self.assertIs(compiled.trail(compiled.bottom[0]), self.trail.store.bottom)
+
+    @number("8.2")
+    def test_queries_match_trail(self):
+        self.load_example()
+        compiled = CompiledTrail.from_trail(self.trail)
+        self.assertListEqual(compiled.collect_all_mountains(), self.trail.collect_all_mountains())
+        for diff in range(8):
+            expected = self.trail.difficulty_maximum_paths(diff)
+            self.assertListEqual(compiled.difficulty_maximum_paths(diff), expected)
+            self.assertEqual(compiled.difficulty_maximum_paths(diff, shared=True), expected)
+            self.assertEqual(compiled.count_difficulty_maximum_paths(diff), len(expected))
+        for walker in (TopWalker, BottomWalker, LazyWalker):
+            on_trail, on_compiled = walker(), walker()
+            self.trail.follow_path(on_trail)
+            compiled.follow_path(on_compiled)
+            self.assertListEqual(on_compiled.mountains, on_trail.mountains)
+
+    @number("8.3")
+    def test_pickle(self):
+        self.load_example()
+        compiled = pickle.loads(pickle.dumps(self.trail.compile()))
+        self.assertListEqual(compiled.collect_all_mountains(), self.trail.collect_all_mountains())
+        self.assertEqual(compiled.trail(), self.trail)
+        lazy = LazyWalker()
+        compiled.follow_path(lazy)
+        self.assertListEqual([m.name for m in lazy.mountains], ["top-bot", "top-mid", "final"])
+        self.assertEqual(compiled.difficulty_maximum_paths(5), self.trail.difficulty_maximum_paths(5))
+
+    @number("8.4")
+    def test_route_cache(self):
+        self.load_example()
+        calls = []
+        class CountingLazyWalker(LazyWalker):
+            # Still chooses as LazyWalker does, so it can say so and share a route.
+            def decision_key(self):
+                return type(self)
+            def select_branch(self, top_branch, bottom_branch):
+                calls.append(top_branch)
+                return super().select_branch(top_branch, bottom_branch)
+
+        compiled = self.trail.compile()
+        self.assertIs(self.trail.compile(), compiled)
+        self.assertIs(Trail(self.trail.store).compiled(), compiled)
+        walkers = [CountingLazyWalker() for _ in range(5)]
+        for walker in walkers:
+            self.trail.follow_path(walker)
+        self.assertEqual(len(calls), 2)
+        for walker in walkers:
+            self.assertListEqual(walker.mountains, [self.top_bot, self.top_mid, self.final])
+        route = compiled.route(walkers[0])
+        self.assertListEqual([compiled.names[compiled.name[index]] for index in route], ["top-bot", "top-mid", "final"])
+
+        group = [CountingLazyWalker(), TopWalker(), BottomWalker()]
+        self.trail.follow_paths(group)
+        self.assertEqual(len(calls), 2)
+        self.assertListEqual(group[1].mountains, [self.top_top, self.top_mid, self.final])
+        self.assertListEqual(group[2].mountains, [self.bot_one, self.final])
+
+        # An edit makes a new root, which starts without a compiled trail or routes.
+        edited = self.trail.add_mountain_before(Mountain("start", 1, 1))
+        self.assertIsNone(edited.compiled())
+        walker = CountingLazyWalker()
+        edited.follow_path(walker)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(walker.mountains[0].name, "start")
+
+        # Overriding select_branch drops the inherited decision key, so it is asked every time.
+        class StopWalker(TopWalker):
+            def select_branch(self, top_branch, bottom_branch):
+                calls.append(top_branch)
+                return PersonalityDecision.STOP
+        self.trail.follow_path(StopWalker())
+        self.trail.follow_path(StopWalker())
+        self.assertEqual(len(calls), 6)
+
+    @number("8.5")
+    def test_replayed_route_starts_walk(self):
+        self.load_example()
+        self.trail.compile()
+        first, second = LongestWalker(4), LongestWalker(4)
+        self.trail.follow_path(first)
+        # The second walker replays the cached route, but is still started on the trail.
+        self.trail.follow_path(second)
+        self.assertNotEqual(second.lengths, {})
+        self.assertEqual(second.lengths, first.lengths)
+        self.assertListEqual(second.mountains, first.mountains)
+        self.assertListEqual(second.mountains, [self.top_bot, self.top_mid, self.final])
+
+        group = [LongestWalker(4), LongestWalker(4)]
+        self.trail.follow_paths(group)
+        for walker in group:
+            self.assertEqual(walker.lengths, first.lengths)
+            self.assertListEqual(walker.mountains, first.mountains)
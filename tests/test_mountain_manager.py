@@ -1,8 +1,10 @@
 import unittest
 from ed_utils.decorators import number
 
+from columnar_mountain_manager import ColumnarMountainManager
 from mountain import Mountain
 from mountain_manager import MountainManager
+from sqlite_mountain_manager import SQLiteMountainManager
 
 class TestInfiniteHash(unittest.TestCase):
 
@@ -56,3 +58,102 @@ class TestInfiniteHash(unittest.TestCase):
         self.assertEqual(len(res), 4)
 
         self.assertEqual(make_set(res[3]), make_set([m10]))
+
+    @number("5.2")
+    def test_indexed_edits(self):
+        mm = MountainManager()
+        mountains = [Mountain(f"m{i}", i % 3, i) for i in range(100)]
+        for mountain in mountains:
+            mm.add_mountain(mountain)
+
+        # Remove most of them, which compacts the slots, and an equal copy of another.
+        for mountain in mountains[:80]:
+            mm.remove_mountain(mountain)
+        mm.remove_mountain(Mountain("m80", 2, 80))
+        self.assertEqual(len(mm), 19)
+        self.assertEqual(mm.mountains, mountains[81:])
+        self.assertRaises(ValueError, lambda: mm.remove_mountain(mountains[0]))
+        self.assertRaises(ValueError, lambda: mm.edit_mountain(mountains[0], mountains[1]))
+
+        # Edits keep each mountain's place, in the manager and in its new difficulty.
+        mm.edit_mountain(mountains[81], Mountain("edited", 2, 0))
+        mm.edit_mountain(mountains[99], Mountain("last", 1, 0))
+        self.assertEqual(mm.mountains[0].name, "edited")
+        self.assertEqual([m.name for m in mm.mountains_with_difficulty(2)], ["edited"] + [f"m{i}" for i in range(83, 99, 3)])
+        self.assertEqual([m.name for m in mm.mountains_with_difficulty(0)], [f"m{i}" for i in range(84, 99, 3)])
+        self.assertEqual([m.name for m in mm.mountains_with_difficulty(1)], [f"m{i}" for i in range(82, 99, 3)] + ["last"])
+        self.assertEqual([len(group) for group in mm.group_by_difficulty()], [5, 7, 7])
+
+    @number("5.3")
+    def test_groups_kept_sorted(self):
+        mm = MountainManager()
+        mountains = [Mountain(f"m{i}", d, 1) for i, d in enumerate([5, 1, 9, 5, 3, 1])]
+        for mountain in mountains:
+            mm.add_mountain(mountain)
+
+        def names(groups):
+            return [[m.name for m in group] for group in groups]
+
+        self.assertEqual(names(mm.group_by_difficulty()), [["m1", "m5"], ["m4"], ["m0", "m3"], ["m2"]])
+        # Emptying a difficulty drops its group, and an edit can make a new one.
+        mm.remove_mountain(mountains[4])
+        mm.edit_mountain(mountains[2], Mountain("m2", 0, 1))
+        mm.edit_mountain(mountains[3], Mountain("m3", 1, 1))
+        self.assertEqual(names(mm.group_by_difficulty()), [["m2"], ["m1", "m3", "m5"], ["m0"]])
+
+    @number("5.4")
+    def test_range_and_top_k(self):
+        mm = MountainManager()
+        mountains = [Mountain(f"m{i}", d, length) for i, (d, length) in enumerate([(5, 2), (1, 9), (9, 4), (5, 7), (3, 9), (1, 1), (7, 3)])]
+        for mountain in mountains:
+            mm.add_mountain(mountain)
+
+        def names(found):
+            return [m.name for m in found]
+
+        self.assertEqual(names(mm.mountains_in_range(2, 7)), ["m4", "m0", "m3", "m6"])
+        self.assertEqual(names(mm.mountains_in_range(6, 6)), [])
+        self.assertEqual(mm.count_in_range(1, 5), 5)
+        self.assertEqual(mm.count_in_range(-10, 100), 7)
+        self.assertEqual(mm.count_in_range(8, 2), 0)
+        # Equal lengths come in the order they were added.
+        self.assertEqual(names(mm.top_k_by_length(3, 5)), ["m1", "m4", "m3"])
+        self.assertEqual(names(mm.top_k_by_length(10, 0)), [])
+
+        # Counts and lengths follow removals and edits.
+        mm.remove_mountain(mountains[1])
+        mm.edit_mountain(mountains[3], Mountain("longer", 5, 20))
+        mm.edit_mountain(mountains[6], Mountain("easy", 2, 3))
+        self.assertEqual(mm.count_in_range(1, 5), 5)
+        self.assertEqual(names(mm.mountains_in_range(2, 7)), ["easy", "m4", "m0", "longer"])
+        self.assertEqual(names(mm.top_k_by_length(3, 5)), ["longer", "m4", "easy"])
+
+    @number("5.5")
+    def test_mountain_added_twice(self):
+        a, b, c = Mountain("a", 1, 1), Mountain("b", 1, 2), Mountain("c", 1, 3)
+        # Every manager removes and edits the first copy, as list.remove and list.index would.
+        for manager in (MountainManager(), ColumnarMountainManager(), SQLiteMountainManager()):
+            for mountain in (a, b, a):
+                manager.add_mountain(mountain)
+            manager.remove_mountain(a)
+            self.assertEqual(manager.mountains, [b, a])
+            manager.add_mountain(a)
+            manager.edit_mountain(a, c)
+            self.assertEqual(manager.mountains, [b, c, a])
+            self.assertEqual(manager.mountains_with_difficulty(1), [b, c, a])
+            manager.edit_mountain(b, a)
+            manager.remove_mountain(a)
+            self.assertEqual(manager.mountains, [c, a])
+
+        # Equal mountains count as copies even when they are different objects.
+        x, y, z = Mountain("x", 2, 1), Mountain("x", 2, 1), Mountain("z", 2, 2)
+        for manager in (MountainManager(), ColumnarMountainManager(), SQLiteMountainManager()):
+            for mountain in (x, z, y):
+                manager.add_mountain(mountain)
+            manager.remove_mountain(y)
+            self.assertEqual(manager.mountains, [z, y])
+            if isinstance(manager, MountainManager):
+                self.assertIs(manager.mountains[1], y)
+            manager.add_mountain(x)
+            manager.edit_mountain(x, c)
+            self.assertEqual(manager.mountains, [z, c, x])
@@ -0,0 +1,59 @@
+import json
+import unittest
+from ed_utils.decorators import number
+
+from mountain import Mountain
+from personality import TopWalker
+from serialize import deserialize, deserialize_dag, serialize, serialize_dag
+from trail_interner import TrailInterner
+from trail import Trail, TrailSeries, TrailSplit
+
+class TestSerialize(unittest.TestCase):
+
+    @number("14.1")
+    def test_dag_shares_subtrails(self):
+        shared = Trail(TrailSeries(Mountain("shared", 3, 3), Trail(None)))
+        first = Trail(TrailSplit(shared, shared, Trail(TrailSeries(Mountain("end", 1, 1), Trail(None)))))
+        second = first.store.following.store.add_mountain_after(Mountain("after", 2, 2))
+        second = Trail(TrailSplit(shared, Trail(None), Trail(second)))
+
+        stored = json.loads(serialize_dag([first, second]))
+        # One empty trail, shared, end, first's split, after, end with after, second's split.
+        self.assertEqual(len(stored["nodes"]), 7)
+        self.assertEqual(stored["roots"], [3, 6])
+
+        one, two = deserialize_dag(stored)
+        self.assertEqual(one, first)
+        self.assertEqual(two, second)
+        self.assertIs(one.store.top, one.store.bottom)
+        self.assertIs(one.store.top, two.store.top)
+
+        self.assertEqual(deserialize_dag(json.loads(serialize_dag(first))), [first])
+        with self.assertRaises(ValueError):
+            deserialize_dag({"nodes": [None], "roots": [0]})
+
+    @number("14.2")
+    def test_lazy_deserialize(self):
+        with open("stores/methods_example.json") as f:
+            stored = json.load(f)
+        trail = deserialize(stored, lazy=True)
+        self.assertFalse(trail.is_loaded())
+        self.assertEqual(trail, deserialize(stored))
+
+        # Only the nodes a walk reaches are built.
+        trail = deserialize(json.loads(serialize(Trail(TrailSplit(
+            Trail(TrailSeries(Mountain("top", 1, 1), Trail(None))),
+            Trail(TrailSeries(Mountain("bottom", 1, 1), Trail(None))),
+            Trail(None),
+        )))), lazy=True)
+        walker = TopWalker()
+        trail.follow_path(walker)
+        self.assertEqual([mountain.name for mountain in walker.mountains], ["top"])
+        self.assertTrue(trail.store.top.is_loaded())
+        self.assertFalse(trail.store.bottom.is_loaded())
+
+        with self.assertRaises(ValueError):
+            deserialize(stored, TrailInterner(), lazy=True)
+
+if __name__ == '__main__':
+    unittest.main()
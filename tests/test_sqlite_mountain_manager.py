@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from ed_utils.decorators import number
+
+from mountain import Mountain
+from mountain_manager import MountainManager
+from sqlite_mountain_manager import SQLiteMountainManager
+
+class TestSQLiteMountainManager(unittest.TestCase):
+
+    @number("16.1")
+    def test_matches_mountain_manager(self):
+        mountains = [Mountain(f"m{i}", (i * 7) % 5, (i * 3) % 8) for i in range(40)]
+        indexed = MountainManager()
+        with SQLiteMountainManager() as stored:
+            for mountain in mountains:
+                indexed.add_mountain(mountain)
+            stored.add_mountains(mountains)
+            for mountain in mountains[:30:3]:
+                indexed.remove_mountain(mountain)
+                stored.remove_mountain(mountain)
+            for i in (31, 35, 39):
+                indexed.edit_mountain(mountains[i], Mountain(f"edited{i}", 9 - i % 3, i))
+                stored.edit_mountain(mountains[i], Mountain(f"edited{i}", 9 - i % 3, i))
+
+            self.assertEqual(len(stored), 30)
+            self.assertEqual(stored.mountains, indexed.mountains)
+            self.assertEqual(stored.group_by_difficulty(), indexed.group_by_difficulty())
+            for diff in range(-1, 11):
+                self.assertEqual(stored.mountains_with_difficulty(diff), indexed.mountains_with_difficulty(diff))
+                self.assertEqual(stored.mountains_in_range(diff, diff + 3), indexed.mountains_in_range(diff, diff + 3))
+                self.assertEqual(stored.count_in_range(diff, diff + 3), indexed.count_in_range(diff, diff + 3))
+                self.assertEqual(stored.top_k_by_length(6, diff), indexed.top_k_by_length(6, diff))
+            self.assertRaises(ValueError, lambda: stored.remove_mountain(mountains[0]))
+
+    @number("16.2")
+    def test_persists_and_tracks_source(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "mountains.db")
+            with SQLiteMountainManager(path) as stored:
+                self.assertIsNone(stored.source)
+                stored.rebuild([Mountain("a", 2, 4), Mountain("b", 1, 6), Mountain("c", 2, 10)], "basic.json")
+            with SQLiteMountainManager(path) as stored:
+                self.assertEqual(stored.source, "basic.json")
+                self.assertEqual(stored.group_by_difficulty(), [[Mountain("b", 1, 6)], [Mountain("a", 2, 4), Mountain("c", 2, 10)]])
+                stored.add_mountain(Mountain("d", 3, 1))
+                self.assertIsNone(stored.source)
+            with SQLiteMountainManager(path) as stored:
+                self.assertEqual(stored.mountains_with_difficulty(3), [Mountain("d", 3, 1)])
+                stored.rebuild([Mountain("e", 5, 5)], "other.json")
+                self.assertEqual(stored.mountains, [Mountain("e", 5, 5)])
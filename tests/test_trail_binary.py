@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from itertools import islice
+from ed_utils.decorators import number
+
+from mountain import Mountain
+from personality import TopWalker
+from trail import Trail, TrailSeries, TrailSplit
+from trail_binary import BinaryTrailStore, dump, load
+from trail_stream import loads
+
+class TestTrailBinary(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "store.trail")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write(self, trail: Trail) -> None:
+        with open(self.path, "wb") as f:
+            dump(trail, f)
+
+    @number("13.1")
+    def test_round_trip(self):
+        for name in ("basic", "methods_example"):
+            with open(f"stores/{name}.json") as f:
+                trail = loads(f.read())
+            self.write(trail)
+            self.assertEqual(load(self.path), trail)
+
+        # Negative and large numbers, non-ascii names, and one name used by several mountains.
+        trail = Trail(TrailSplit(
+            Trail(TrailSeries(Mountain("Mönch", -3, 10**12), Trail(None))),
+            Trail(TrailSeries(Mountain("Mönch", 2, 7), Trail(None))),
+            Trail(TrailSeries(Mountain("Eiger", 0, 0), Trail(TrailSplit(Trail(None), Trail(None), Trail(None))))),
+        ))
+        self.write(trail)
+        with BinaryTrailStore(self.path) as store:
+            self.assertEqual(len(store), 10)
+            self.assertEqual(store.root(), trail)
+            self.assertEqual(store.name(1), "Eiger")
+            with self.assertRaises(ValueError):
+                store.name(2)
+
+        with open(self.path, "wb") as f:
+            f.write(b"not a store at all, just some bytes")
+        with self.assertRaises(ValueError):
+            load(self.path)
+
+    @number("13.2")
+    def test_lazy_loading(self):
+        # A long series with a split at the start: walking the top branch leaves the bottom unread.
+        following = Trail(None)
+        for i in range(1000):
+            following = Trail(TrailSeries(Mountain(f"m{i}", i % 5, 1), following))
+        bottom = Trail(TrailSeries(Mountain("bottom", 1, 1), following))
+        trail = Trail(TrailSplit(Trail(TrailSeries(Mountain("top", 1, 1), Trail(None))), bottom, following))
+        self.write(trail)
+
+        root = load(self.path)
+        self.assertFalse(root.is_loaded())
+        names = [mountain.name for mountain in islice(root.iter_follow_path(TopWalker()), 3)]
+        self.assertEqual(names, ["top", "m999", "m998"])
+        self.assertTrue(root.store.top.is_loaded())
+        self.assertFalse(root.store.bottom.is_loaded())
+
+        # Nodes further down the series than the walk went are not loaded either.
+        node = root.store.following
+        for _ in range(3):
+            node = node.store.following
+        self.assertFalse(node.is_loaded())
+        self.assertEqual(root, trail)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from ed_utils.decorators import number
+
+from constants import DrawMode
+from draw_trails import TrailDraw
+from mountain import Mountain
+from trail import Trail, TrailSeries, TrailSplit
+from trail_cursor import TrailCursor
+
+class TestTrailCursor(unittest.TestCase):
+
+    def load_example(self):
+        self.top_top = Mountain("top-top", 5, 3)
+        self.top_bot = Mountain("top-bot", 3, 5)
+        self.top_mid = Mountain("top-mid", 4, 7)
+        self.bot_one = Mountain("bot-one", 2, 5)
+        self.final   = Mountain("final", 4, 4)
+        self.trail = Trail(TrailSplit(
+            Trail(TrailSplit(
+                Trail(TrailSeries(self.top_top, Trail(None))),
+                Trail(TrailSeries(self.top_bot, Trail(None))),
+                Trail(TrailSeries(self.top_mid, Trail(None))),
+            )),
+            Trail(TrailSeries(self.bot_one, Trail(None))),
+            Trail(TrailSeries(self.final, Trail(None)))
+        ))
+
+    @number("11.1")
+    def test_navigation(self):
+        self.load_example()
+        cursor = TrailCursor(self.trail, "T B")
+        self.assertIs(cursor.store.mountain, self.top_bot)
+        self.assertEqual(cursor.address, "T B")
+        self.assertEqual(cursor.depth, 2)
+        self.assertIs(TrailCursor(self.trail, "TF").store.mountain, self.top_mid)
+        self.assertIs(cursor.up().up().trail, self.trail)
+        self.assertIs(TrailCursor(self.trail).following().walk("F").trail, self.trail.store.following.store.following)
+        self.assertEqual(TrailCursor(self.trail).walk(["B", "F"]).address, "B F")
+
+        for address in ("X", "B T", "F F F"):
+            with self.assertRaises(ValueError):
+                TrailCursor(self.trail, address)
+        with self.assertRaises(ValueError):
+            TrailCursor(self.trail).up()
+
+    @number("11.2")
+    def test_edits(self):
+        self.load_example()
+        new = Mountain("new", 1, 1)
+
+        edited = TrailCursor(self.trail, "T B").add_mountain_after(new)
+        self.assertListEqual([m.name for m in edited.collect_all_mountains()], ["top-top", "top-bot", "new", "top-mid", "bot-one", "final"])
+        # The old root is untouched, and everything off the edited path is shared.
+        self.assertListEqual([m.name for m in self.trail.collect_all_mountains()], ["top-top", "top-bot", "top-mid", "bot-one", "final"])
+        self.assertIs(edited.store.bottom, self.trail.store.bottom)
+        self.assertIs(edited.store.following, self.trail.store.following)
+        self.assertIs(edited.store.top.store.top, self.trail.store.top.store.top)
+        self.assertIs(edited.store.top.store.following, self.trail.store.top.store.following)
+
+        self.assertEqual(TrailCursor(self.trail, "B").remove_mountain().store.bottom, Trail(None))
+        self.assertIs(TrailCursor(self.trail, "T").remove_branch().store.top.store.mountain, self.top_mid)
+        self.assertIs(TrailCursor(self.trail, "F").replace_mountain(new).store.following.store.mountain, new)
+        self.assertIsInstance(TrailCursor(self.trail, "F F").add_empty_branch_before().store.following.store.following.store, TrailSplit)
+        self.assertIs(TrailCursor(self.trail, "B F").add_mountain_before(new).store.bottom.store.following.store.mountain, new)
+        self.assertIsInstance(TrailCursor(self.trail, "F").add_empty_branch_after().store.following.store.following.store, TrailSplit)
+        self.assertIs(TrailCursor(self.trail).add_mountain_before(new).store.mountain, new)
+
+        with self.assertRaises(ValueError):
+            TrailCursor(self.trail, "B").remove_branch()
+        with self.assertRaises(ValueError):
+            TrailCursor(self.trail).remove_mountain()
+
+        # Scripted edits, each taking a new root.
+        root = self.trail
+        for i in range(5):
+            root = TrailCursor(root, "F" + " F" * i).add_mountain_after(Mountain(f"after-{i}", 0, 1))
+        self.assertListEqual([m.name for m in TrailCursor(root, "F").trail.collect_all_mountains()], ["final"] + [f"after-{i}" for i in range(5)])
+
+    @number("11.3")
+    def test_draw_boxes_by_address(self):
+        class LayoutOnly(TrailDraw):
+            def draw_line(self, *args): pass
+            def draw_mountain(self, *args): pass
+            def draw_branch(self, *args): pass
+        # The same subtrail drawn in both branches gets boxes in both places.
+        shared = Trail(TrailSeries(Mountain("shared", 1, 1), Trail(None)))
+        drawing = LayoutOnly(Trail(TrailSplit(shared, shared, Trail(None))))
+        drawing.draw_in_box(700, 700, 0, 0)
+        top = drawing.get_box(("T",), "mountain_box")
+        bottom = drawing.get_box(("B",), "mountain_box")
+        self.assertNotEqual(top, bottom)
+
+        box, action, _ = drawing.box_and_action((bottom.x + 1, bottom.y + 1), DrawMode.REMOVE)
+        self.assertEqual(box, bottom)
+        action()
+        self.assertIs(drawing.trail.store.top, shared)
+        self.assertEqual(drawing.trail.store.bottom, Trail(None))
@@ -0,0 +1,60 @@
+import json
+import unittest
+from ed_utils.decorators import number
+
+from mountain import Mountain
+from serialize import deserialize, serialize
+from trail import Trail, TrailSeries, TrailSplit
+from trail_interner import TrailInterner
+
+class TestTrailInterner(unittest.TestCase):
+
+    def build_example(self):
+        return Trail(TrailSplit(
+            Trail(TrailSeries(Mountain("top", 3, 2), Trail(None))),
+            Trail(TrailSplit(Trail(None), Trail(None), Trail(None))),
+            Trail(TrailSeries(Mountain("final", 4, 4), Trail(TrailSplit(Trail(None), Trail(None), Trail(None))))),
+        ))
+
+    @number("9.1")
+    def test_canonical_instances(self):
+        interner = TrailInterner()
+        first = interner.intern(self.build_example())
+        second = interner.intern(self.build_example())
+        self.assertIs(first, second)
+        self.assertTrue(interner.is_canonical(first))
+        self.assertFalse(interner.is_canonical(self.build_example()))
+
+        # Both empty splits are the same node, as is every empty trail.
+        self.assertIs(first.store.bottom, first.store.following.store.following)
+        self.assertIs(first.store.top.store.following, interner.empty())
+        self.assertIs(interner.mountain("top", 3, 2), first.store.top.store.mountain)
+        self.assertIs(interner.trail(TrailSeries(Mountain("top", 3, 2), Trail(None))), first.store.top)
+        self.assertIs(interner.split(Trail(None), Trail(None), Trail(None)), first.store.bottom.store)
+        self.assertEqual(first, self.build_example())
+
+        # Summaries cached on shared nodes are reused by other trails.
+        summary = first.store.following.summary()
+        other = interner.intern(Trail(TrailSeries(Mountain("start", 1, 1), self.build_example().store.following)))
+        self.assertIs(other.store.following, first.store.following)
+        self.assertIs(other.store.following.summary(), summary)
+
+    @number("9.2")
+    def test_edits_and_deserialize(self):
+        interner = TrailInterner()
+        trail = interner.intern(self.build_example())
+        size = len(interner)
+
+        edited = trail.store.following.store.add_mountain_after(Mountain("new", 1, 1))
+        again = interner.intern(Trail(edited))
+        self.assertIs(again.store.following.store.following, trail.store.following.store.following)
+        self.assertEqual(again, Trail(edited))
+        self.assertIs(interner.intern(Trail(trail.store.following.store.add_mountain_after(Mountain("new", 1, 1)))), again)
+        # Only the new series, its mountain and their trails were added.
+        self.assertEqual(len(interner), size + 5)
+
+        loaded = deserialize(json.loads(serialize(trail)), interner)
+        self.assertIs(loaded, trail)
+        plain = deserialize(json.loads(serialize(trail)))
+        self.assertIsNot(plain.store.bottom, plain.store.following.store.following)
+        self.assertEqual(plain, trail)
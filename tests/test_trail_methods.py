@@ -1,8 +1,11 @@
+import random
 import unittest
+from dataclasses import FrozenInstanceError
 from ed_utils.decorators import number, advanced
 
 from mountain import Mountain
-from trail import Trail, TrailSeries, TrailSplit
+from serialize import deserialize
+from trail import Trail, TrailSeries, TrailSplit, TrailSummary, iter_preorder, iter_paths, fold_postorder, trail_children
 
 class TestTrailMethods(unittest.TestCase):
 
@@ -86,3 +89,197 @@ class TestTrailMethods(unittest.TestCase):
         expected_res.sort()
 
         self.assertListEqual(res, expected_res)
+
+    @number("7.4")
+    def test_deep_trail(self):
+        # Far past the recursion limit.
+        n = 50000
+        trail = Trail(None)
+        for i in range(n):
+            trail = Trail(TrailSeries(Mountain(f"m{i}", i % 4, 1), trail))
+
+        res = trail.collect_all_mountains()
+        self.assertEqual(len(res), n)
+        self.assertEqual(res[0].name, f"m{n - 1}")
+        self.assertEqual(res[-1].name, "m0")
+
+        self.assertEqual(len(trail.difficulty_maximum_paths(3)), 1)
+        self.assertEqual(trail.difficulty_maximum_paths(2), [])
+
+        twin = Trail(None)
+        for i in range(n):
+            twin = Trail(TrailSeries(Mountain(f"m{i}", i % 4, 1), twin))
+        self.assertEqual(trail, twin)
+        self.assertTrue(repr(trail).startswith("Trail(store=TrailSeries(mountain=Mountain(name='m49999'"))
+
+        stored = {"store": None}
+        for i in range(n):
+            stored = {"store": {"mountain": {"name": f"m{i}", "difficulty_level": i % 4, "length": 1}, "following": stored}}
+        self.assertEqual(deserialize(stored), trail)
+
+    @number("7.5")
+    def test_traversal_core(self):
+        self.load_example()
+        order = [
+            t.store.mountain.name
+            for t in iter_preorder(self.trail)
+            if isinstance(t.store, TrailSeries)
+        ]
+        self.assertListEqual(order, ["top-top", "top-bot", "top-mid", "bot-one", "bot-two", "final"])
+
+        # Post-order: count the paths through every subtrail.
+        def count(trail, *values):
+            if isinstance(trail.store, TrailSplit):
+                return (values[0] + values[1]) * values[2]
+            return values[0] if values else 1
+        self.assertEqual(fold_postorder(self.trail, trail_children, count), 5)
+
+        paths = [[m.name for m in path] for path, _ in iter_paths(self.trail)]
+        self.assertEqual(len(paths), 5)
+        self.assertListEqual(paths[0], ["top-top", "top-mid", "final"])
+
+        # The dataclass style equality and repr are kept.
+        self.load_example()
+        first = self.trail
+        self.load_example()
+        self.assertEqual(first, self.trail)
+        self.assertNotEqual(first, Trail(None))
+        self.assertEqual(repr(Trail(TrailSeries(self.final, Trail(None)))), "Trail(store=TrailSeries(mountain=Mountain(name='final', difficulty_level=4, length=4), following=Trail(store=None)))")
+
+    @number("7.6")
+    def test_iter_difficulty_maximum_paths(self):
+        self.load_example()
+        for diff in range(8):
+            self.assertListEqual(list(self.trail.iter_difficulty_maximum_paths(diff)), self.trail.difficulty_maximum_paths(diff))
+
+        views = self.trail.iter_difficulty_maximum_paths(5, views=True)
+        first = next(views)
+        self.assertEqual(len(first), 3)
+        self.assertListEqual(list(first), [self.bot_one, self.bot_two, self.final])
+        self.assertEqual(first[-1], self.final)
+        self.assertListEqual(first.to_list(), [self.bot_one, self.bot_two, self.final])
+        self.assertEqual(sum(1 for _ in views), 2)
+
+    @number("7.7")
+    def test_difficulty_difference_paths_pruning(self):
+        rng = random.Random(1054)
+        for _ in range(20):
+            # Random trail of up to 5 splits.
+            trail = Trail(None)
+            for _ in range(rng.randint(1, 5)):
+                branches = []
+                for _ in range(2):
+                    branch = Trail(None)
+                    for _ in range(rng.randint(0, 3)):
+                        branch = branch.add_mountain_before(Mountain("m", rng.randint(0, 9), 1))
+                    branches.append(branch)
+                trail = Trail(TrailSplit(branches[0], branches[1], trail.add_mountain_before(Mountain("s", rng.randint(0, 9), 1))))
+            for max_difference in range(10):
+                expected = [
+                    path
+                    for path, _ in ((p[:], None) for p, _ in iter_paths(trail))
+                    if not path or max(m.difficulty_level for m in path) - min(m.difficulty_level for m in path) <= max_difference
+                ]
+                self.assertEqual(trail.difficulty_difference_paths(max_difference), expected)
+                expected = [
+                    path[:]
+                    for path, _ in iter_paths(trail)
+                    if all(m.difficulty_level <= max_difference for m in path)
+                ]
+                self.assertEqual(trail.difficulty_maximum_paths(max_difference), expected)
+
+    @number("7.8")
+    def test_summary(self):
+        self.load_example()
+        summary = self.trail.summary()
+        self.assertEqual(summary, TrailSummary(
+            mountains=6,
+            length=19,
+            min_difficulty=0,
+            max_difficulty=7,
+            min_path_difficulty=6,
+            max_path_difficulty=17,
+            min_path_peak=4,
+            max_path_floor=4,
+            paths=5,
+        ))
+        self.assertEqual(Trail(None).summary().paths, 1)
+        self.assertIsNone(Trail(None).summary().min_difficulty)
+
+        # Edits share the untouched subtrails, and with them their summaries.
+        bottom = self.trail.store.bottom
+        self.assertIs(self.trail.store.bottom.store._summary, bottom.summary())
+        edited = bottom.store.add_mountain_after(Mountain("extra", 1, 10))
+        self.assertIsNone(edited._summary)
+        self.assertIs(edited.following.store.following, bottom.store.following)
+        self.assertIsNotNone(edited.following.store.following.store._summary)
+        self.assertEqual(Trail(edited).summary().length, bottom.summary().length + 10)
+        self.assertEqual(Trail(edited).summary().min_difficulty, 0)
+        self.assertEqual(Trail(edited).summary().paths, 3)
+
+        # Summaries are worked out from the mountains, which cannot change under them.
+        with self.assertRaises(FrozenInstanceError):
+            self.final.difficulty_level = 0
+
+    @number("7.9")
+    def test_count_paths(self):
+        self.load_example()
+        for diff in range(-1, 10):
+            self.assertEqual(self.trail.count_paths(diff), len(self.trail.difficulty_maximum_paths(diff)))
+        self.assertEqual(Trail(None).count_paths(0), 1)
+
+        # Path totals: 17, 14, 6, 6, 6
+        self.assertEqual(self.trail.count_paths_by_total_difficulty(5), 0)
+        self.assertEqual(self.trail.count_paths_by_total_difficulty(6), 3)
+        self.assertEqual(self.trail.count_paths_by_total_difficulty(14), 4)
+        self.assertEqual(self.trail.count_paths_by_total_difficulty(100), 5)
+        self.assertEqual(Trail(None).count_paths_by_total_difficulty(0), 1)
+
+        histogram = self.trail.path_difficulty_histogram()
+        self.assertEqual(len(histogram), 18)
+        self.assertEqual(histogram[6], 3)
+        self.assertEqual(histogram[14], 1)
+        self.assertEqual(histogram[17], 1)
+        self.assertEqual(histogram.sum(), 5)
+
+        # Path lengths: 9, 11, 9, 9, 9
+        lengths = self.trail.path_length_histogram()
+        self.assertListEqual(list(lengths), [0] * 9 + [4, 0, 1])
+
+    @number("7.10")
+    def test_shared_path_results(self):
+        self.load_example()
+        self.assertIsInstance(self.trail.difficulty_maximum_paths(5), list)
+        res = self.trail.difficulty_maximum_paths(5, shared=True)
+        self.assertEqual(len(res), 3)
+        self.assertListEqual(res[0], [self.bot_one, self.bot_two, self.final])
+        self.assertListEqual(res[-1], [self.bot_one, self.final])
+        self.assertListEqual(res.to_lists(), self.trail.difficulty_maximum_paths(5))
+        self.assertEqual(res[1:], res.to_lists()[1:])
+        self.assertEqual(res, res.to_lists())
+        self.assertNotEqual(res, res.to_lists()[:2])
+
+        # Paths through the same branches share their nodes.
+        first, second, third = res.views()
+        self.assertIs(first._tail[1][1], second._tail[1])
+        self.assertIs(second._tail[1], third._tail[1])
+        self.assertEqual(second, third)
+        self.assertEqual(first[1], self.bot_two)
+        self.assertEqual(Trail(None).difficulty_maximum_paths(0, shared=True).to_lists(), [[]])
+        self.assertEqual(Trail(None).difficulty_maximum_paths(0), [[]])
+        for max_difference in range(8):
+            self.assertEqual(self.trail.difficulty_difference_paths(max_difference, shared=True), self.trail.difficulty_difference_paths(max_difference))
+
+    @number("7.11")
+    def test_slotted_nodes(self):
+        self.load_example()
+        for node in (self.trail, self.trail.store, self.trail.store.bottom.store, self.final):
+            self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            self.trail.trail_box = None
+        # Cached summaries still stay out of equality and repr.
+        first = self.trail
+        first.summary()
+        self.load_example()
+        self.assertEqual(first, self.trail)
+        self.assertEqual(repr(first), repr(self.trail))
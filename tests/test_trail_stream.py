@@ -0,0 +1,72 @@
+import io
+import json
+import unittest
+from ed_utils.decorators import number
+
+from mountain import Mountain
+from serialize import deserialize, dump, serialize
+from trail import Trail, TrailSeries, TrailSplit
+from trail_interner import TrailInterner
+from trail_stream import load, loads
+
+class TestTrailStream(unittest.TestCase):
+
+    @number("12.1")
+    def test_matches_deserialize(self):
+        for name in ("basic", "methods_example"):
+            with open(f"stores/{name}.json") as f:
+                text = f.read()
+            expected = deserialize(json.loads(text))
+            self.assertEqual(loads(text), expected)
+            spaced = json.dumps(json.loads(text), indent=1, separators=(" , ", " : "))
+            # Tokens and multi-byte characters cut between chunks are put back together.
+            for chunk_size in (1, 5, 64):
+                self.assertEqual(load(io.StringIO(text), chunk_size=chunk_size), expected)
+                self.assertEqual(load(io.BytesIO(text.encode()), chunk_size=chunk_size), expected)
+                self.assertEqual(load(io.StringIO(spaced), chunk_size=chunk_size), expected)
+        text = json.dumps({"store": {"mountain": {"name": "Mönch \"2\"", "difficulty_level": 4, "length": 10}, "following": {"store": None}}})
+        self.assertEqual(load(io.BytesIO(text.encode()), chunk_size=1).store.mountain, Mountain("Mönch \"2\"", 4, 10))
+
+        interner = TrailInterner()
+        text = json.dumps({"store": {"top": {"store": None}, "bottom": {"store": None}, "following": {"store": None}}})
+        trail = loads(text, interner)
+        self.assertIs(trail.store.top, interner.empty())
+        self.assertIs(trail, loads(text, interner))
+
+    @number("12.2")
+    def test_deep_and_invalid(self):
+        # A series far deeper than the recursion limit.
+        depth = 20000
+        text = '{"store": {"mountain": {"name": "m", "difficulty_level": 1, "length": 1}, "following": ' * depth + '{"store": null}' + "}}" * depth
+        trail = load(io.StringIO(text))
+        count = 0
+        while trail.store is not None:
+            count += 1
+            trail = trail.store.following
+        self.assertEqual(count, depth)
+
+        for bad in ('{"store": null', '{"store": null}}', '{"store": [1]}', '{"store" null}', '{"top": 1}', '{"store": nul}', ""):
+            with self.assertRaises(ValueError):
+                loads(bad)
+
+    @number("12.3")
+    def test_dump(self):
+        # The same text json.dumps gives for the stored dicts.
+        for name in ("basic", "methods_example"):
+            with open(f"stores/{name}.json") as f:
+                stored = json.load(f)
+            trail = deserialize(stored)
+            self.assertEqual(json.loads(serialize(trail)), stored)
+        trail = Trail(TrailSeries(Mountain("Mönch \"2\"", -1, 3), Trail(TrailSplit(Trail(None), Trail(None), Trail(None)))))
+        self.assertEqual(serialize(trail), json.dumps({"store": {"mountain": {"name": "Mönch \"2\"", "difficulty_level": -1, "length": 3},
+            "following": {"store": {"top": {"store": None}, "bottom": {"store": None}, "following": {"store": None}}}}}))
+
+        # Deep trails are written without recursing, and read back the same.
+        for i in range(20000):
+            trail = Trail(TrailSeries(Mountain(f"m{i}", i % 4, 1), trail))
+        out = io.StringIO()
+        dump(trail, out)
+        self.assertEqual(loads(out.getvalue()), trail)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,10 @@
+import random
 import unittest
 from ed_utils.decorators import number
 
 from mountain import Mountain
-from trail import Trail, TrailSeries, TrailSplit, TrailStore
-from personality import WalkerPersonality, TopWalker, BottomWalker, LazyWalker, PersonalityDecision
+from trail import Trail, TrailSeries, TrailSplit, iter_paths
+from personality import WalkerPersonality, TopWalker, BottomWalker, LazyWalker, EasiestWalker, LongestWalker, PersonalityDecision
 
 class TestTrailMethods(unittest.TestCase):
 
@@ -59,3 +60,111 @@ class TestTrailMethods(unittest.TestCase):
         self.trail.follow_path(cw)
 
         self.assertListEqual(cw.mountains, [self.bot_one])
+
+    @number("2.3")
+    def test_follow_paths(self):
+        calls = []
+        class CountingWalker(TopWalker):
+            # Counting does not change its choices, so it keeps TopWalker's grouping.
+            def decision_key(self):
+                return type(self)
+            def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> PersonalityDecision:
+                calls.append(self)
+                return PersonalityDecision.TOP
+        class AlternatingWalker(WalkerPersonality):
+            def __init__(self) -> None:
+                super().__init__()
+                self.count = 0
+            def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> PersonalityDecision:
+                self.count += 1
+                return PersonalityDecision.TOP if self.count % 2 else PersonalityDecision.BOTTOM
+
+        self.load_example()
+        kinds = [TopWalker, BottomWalker, LazyWalker, CountingWalker, AlternatingWalker]
+        walkers = [kind() for kind in kinds for _ in range(20)]
+        self.trail.follow_paths(walkers)
+        for walker in walkers:
+            alone = type(walker)()
+            self.trail.follow_path(alone)
+            self.assertListEqual(walker.mountains, alone.mountains)
+        # Twenty counting walkers were asked at the two splits they reached together (and twice more by the check above).
+        self.assertEqual(len(calls), 2 + 20 * 2)
+        # Without a decision key of its own, a walker overriding select_branch is asked on its own.
+        class UngroupedWalker(TopWalker):
+            def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> PersonalityDecision:
+                calls.append(self)
+                return PersonalityDecision.TOP
+        self.assertIsNone(UngroupedWalker().decision_key())
+        self.trail.follow_paths([UngroupedWalker() for _ in range(3)])
+        self.assertEqual(len(calls), 2 + 20 * 2 + 3 * 2)
+
+        # A walker that stops still keeps the mountains before the split.
+        class StopWalker(WalkerPersonality):
+            def decision_key(self):
+                return type(self)
+            def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> PersonalityDecision:
+                return PersonalityDecision.STOP
+        lazy, stop = LazyWalker(), StopWalker()
+        trail = Trail(TrailSeries(self.final, self.trail))
+        trail.follow_paths([lazy, stop])
+        self.assertListEqual(stop.mountains, [self.final])
+        self.assertListEqual(lazy.mountains, [self.final, self.top_bot, self.top_mid, self.final])
+
+    @number("2.4")
+    def test_streamed_walk(self):
+        self.load_example()
+        lazy = LazyWalker()
+        self.assertListEqual(list(self.trail.iter_follow_path(lazy)), [self.top_bot, self.top_mid, self.final])
+        self.assertListEqual(lazy.mountains, [])
+
+        # Fold statistics as the walk goes, without keeping the mountains.
+        totals = {"length": 0, "hardest": 0, "count": 0}
+        def tally(mountain: Mountain) -> None:
+            totals["length"] += mountain.length
+            totals["hardest"] = max(totals["hardest"], mountain.difficulty_level)
+            totals["count"] += 1
+        top = TopWalker()
+        self.trail.follow_path(top, on_mountain=tally)
+        self.assertListEqual(top.mountains, [])
+        self.assertDictEqual(totals, {"length": 14, "hardest": 5, "count": 3})
+
+        compiled = self.trail.compile()
+        self.assertListEqual(list(compiled.iter_follow_path(LazyWalker())), [self.top_bot, self.top_mid, self.final])
+
+    @number("2.5")
+    def test_optimal_walkers(self):
+        rng = random.Random(2085)
+        for _ in range(30):
+            trail = Trail(None)
+            for _ in range(rng.randint(1, 5)):
+                branches = []
+                for _ in range(2):
+                    branch = Trail(None)
+                    for _ in range(rng.randint(0, 3)):
+                        branch = branch.add_mountain_before(Mountain("m", rng.randint(0, 9), rng.randint(1, 9)))
+                    if rng.random() < 0.3:
+                        branch = branch.add_empty_branch_before()
+                    branches.append(branch)
+                trail = Trail(TrailSplit(branches[0], branches[1], trail.add_mountain_before(Mountain("s", rng.randint(0, 9), rng.randint(1, 9)))))
+            paths = [path.to_list() for path, _ in iter_paths(trail)]
+
+            easiest = EasiestWalker()
+            trail.follow_path(easiest)
+            self.assertEqual(sum(m.difficulty_level for m in easiest.mountains), min(sum(m.difficulty_level for m in path) for path in paths))
+
+            for cap in (4, 7, 9):
+                longest = LongestWalker(cap)
+                trail.follow_path(longest)
+                within = [sum(m.length for m in path) for path in paths if all(m.difficulty_level <= cap for m in path)]
+                if within:
+                    self.assertEqual(sum(m.length for m in longest.mountains), max(within))
+                    self.assertTrue(all(m.difficulty_level <= cap for m in longest.mountains))
+
+        # The pass is done once per trail and cap, and shared by every walker.
+        self.load_example()
+        first, second = LongestWalker(4), LongestWalker(4)
+        self.trail.follow_paths([first])
+        self.trail.follow_path(second)
+        self.assertIs(first.lengths, second.lengths)
+        self.assertListEqual(first.mountains, [self.top_bot, self.top_mid, self.final])
+        self.assertListEqual(second.mountains, first.mountains)
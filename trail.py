@@ -1,16 +1,22 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from mountain import Mountain
 from data_structures.linked_stack import LinkedStack
+from trail_paths import PathView, TrailPaths
 
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, TypeVar, Union
 
 # Avoid circular imports for typing.
 if TYPE_CHECKING:
+    from numpy import ndarray
     from personality import WalkerPersonality
+    from compiled_trail import CompiledTrail
 
-@dataclass
+T = TypeVar("T")
+V = TypeVar("V")
+
+@dataclass(slots=True)
 class TrailSplit:
     """
     A split in the trail.
@@ -23,6 +29,18 @@ class TrailSplit:
     top: Trail
     bottom: Trail
     following: Trail
+    #Filled in by Trail.summary, safe to keep because a split is never changed once built (see Trail)
+    _summary: TrailSummary|None = field(default=None, init=False, repr=False, compare=False)
+    #Other values worked out for the trail starting here, such as its compiled form (see Trail.compile)
+    _derived: dict[str, Any]|None = field(default=None, init=False, repr=False, compare=False)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return structurally_equal(self, other)
+
+    def __repr__(self) -> str:
+        return trail_repr(self)
     
     #Defining a method that removes a branch and return the following trail
     def remove_branch(self) -> TrailStore:
@@ -32,7 +50,7 @@ class TrailSplit:
         """
         return self.following.store
 
-@dataclass
+@dataclass(slots=True)
 class TrailSeries:
     """
     A mountain, followed by the rest of the trail
@@ -43,6 +61,18 @@ class TrailSeries:
 
     mountain: Mountain
     following: Trail
+    #Filled in by Trail.summary, safe to keep because a series is never changed once built (see Trail)
+    _summary: TrailSummary|None = field(default=None, init=False, repr=False, compare=False)
+    #Other values worked out for the trail starting here, such as its compiled form (see Trail.compile)
+    _derived: dict[str, Any]|None = field(default=None, init=False, repr=False, compare=False)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return structurally_equal(self, other)
+
+    def __repr__(self) -> str:
+        return trail_repr(self)
 
     #Defining a method that removes the current mountain and return the following trail
     def remove_mountain(self) -> TrailStore:
@@ -103,12 +133,64 @@ class TrailSeries:
         except:
             raise ValueError
 
+    #Defines a method to swap the current mountain for another one
+    def replace_mountain(self, mountain: Mountain) -> TrailStore:
+        """
+        Returns a *new* trail which would be the result of:
+        Replacing the mountain at the beginning of this series, keeping the following trail.
+        Complexity: O(1) for best and worst case
+        """
+        return TrailSeries(mountain, self.following)
+
 TrailStore = Union[TrailSplit, TrailSeries, None]
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class TrailSummary:
+    """
+    Totals over a subtrail, kept on each TrailSeries and TrailSplit once worked out.
+
+    The min/max difficulty and path peak/floor values are None when there is no mountain to take them from.
+    """
+
+    #Number of mountains and their total length
+    mountains: int
+    length: int
+    #Easiest and hardest single mountain
+    min_difficulty: int|None
+    max_difficulty: int|None
+    #Smallest and largest sum of difficulties along one path
+    min_path_difficulty: int
+    max_path_difficulty: int
+    #Lowest possible hardest mountain on a path (None if a path has no mountains)
+    min_path_peak: int|None
+    #Highest possible easiest mountain on a path (None if a path has no mountains)
+    max_path_floor: int|None
+    #Number of paths from the start to the end of the subtrail
+    paths: int
+
+EMPTY_SUMMARY = TrailSummary(0, 0, None, None, 0, 0, None, None, 1)
+
+@dataclass(slots=True)
 class Trail:
+    """
+    A trail, empty if its store is None.
+
+    Trails are persistent: edits return new trails that share the untouched subtrails, and
+    summaries, compiled forms and routes are kept on the stores on the assumption that
+    no trail, store or mountain is changed once built. Reassigning store (or a store's fields)
+    would leave every trail above it with stale values, so build a new trail instead.
+    """
 
     store: TrailStore = None
+
+    def __eq__(self, other: object) -> bool:
+        #Subclasses such as LazyTrail compare by structure like any other trail
+        if not isinstance(other, Trail):
+            return NotImplemented
+        return structurally_equal(self, other)
+
+    def __repr__(self) -> str:
+        return trail_repr(self)
     
     #This defines a method to add a mountain before everything currently in the trail
     def add_mountain_before(self, mountain: Mountain) -> Trail:
@@ -128,24 +210,166 @@ class Trail:
         """
         return Trail(TrailSplit(Trail(None), Trail(None), self))
 
+    #Defines a method to build the flat array form of the trail
+    def compile(self) -> CompiledTrail:
+        """
+        Returns a CompiledTrail of this trail, for running many queries on it.
+        The result is kept with the trail's store, so compiling the same trail again is free,
+        and an edit (which makes a new store) gets a new one.
+        Once compiled, follow_path and follow_paths replay the routes the compiled trail caches.
+        Complexity: O(1) if already compiled, otherwise O(n) where n is the number of nodes in the trail
+        """
+        from compiled_trail import CompiledTrail
+        compiled = self.compiled()
+        if compiled is None:
+            compiled = CompiledTrail.from_trail(self)
+            if self.store is not None:
+                if self.store._derived is None:
+                    self.store._derived = {}
+                self.store._derived["compiled"] = compiled
+        return compiled
+
+    def compiled(self) -> CompiledTrail|None:
+        """
+        Returns the CompiledTrail kept by an earlier call to compile, or None.
+        Complexity: O(1)
+        """
+        if self.store is None or self.store._derived is None:
+            return None
+        return self.store._derived.get("compiled")
+
+    #Defines a method to get the cached totals of the trail
+    def subtrail_values(self, key: Any, combine: Callable[..., V]) -> dict[int, V]:
+        """
+        Computes a value for every subtrail in one bottom-up pass, as fold_postorder(self, trail_children, combine)
+        does, and returns them keyed by the id of each subtrail's store (empty subtrails are left out).
+        The table is kept with the trail's store under key, so later calls with the same key are free
+        and an edit, which makes a new store, starts over.
+        Complexity: O(1) if already known, otherwise O(n) calls to combine where n is the number of nodes
+        """
+        store = self.store
+        if store is not None and store._derived is not None and key in store._derived:
+            return store._derived[key]
+        values: dict[int, V] = {}
+        def record(trail: Trail, *children: V) -> V:
+            value = combine(trail, *children)
+            if trail.store is not None:
+                values[id(trail.store)] = value
+            return value
+        fold_postorder(self, trail_children, record)
+        if store is not None:
+            if store._derived is None:
+                store._derived = {}
+            store._derived[key] = values
+        return values
+
+    def summary(self) -> TrailSummary:
+        """
+        Returns the TrailSummary of this trail.
+        Summaries are worked out once per TrailSeries/TrailSplit and kept on it, so subtrails
+        shared with an earlier version of the trail are not looked at again.
+        Complexity: O(1) if already known, otherwise O(m) where m is the number of nodes without a summary
+        """
+        store = self.store
+        if store is None:
+            return EMPTY_SUMMARY
+        if store._summary is not None:
+            return store._summary
+        return fold_postorder(self, _children_without_summary, _combine_summary)
+
+    #Defines a method to count the paths of difficulty_maximum_paths without listing them
+    def count_paths(self, max_diff: int) -> int:
+        """
+        Returns how many paths through the trail have no mountain with a difficulty above max_diff,
+        the same as len(self.difficulty_maximum_paths(max_diff)).
+        A mountain over max_diff blocks every path through it, the branches of a split add up
+        and are multiplied by the ways through the trail following it.
+        Complexity: O(n) for best and worst case where n is the number of nodes
+        """
+        def combine(current: Trail, *parts: int) -> int:
+            store = current.store
+            if store is None:
+                return 1
+            if isinstance(store, TrailSeries):
+                return parts[0] if store.mountain.difficulty_level <= max_diff else 0
+            top, bottom, following = parts
+            return (top + bottom) * following
+        return fold_postorder(self, trail_children, combine)
+
+    #Defines a method to count paths by total difficulty without listing them
+    def count_paths_by_total_difficulty(self, max_diff: int) -> int:
+        """
+        Returns how many paths through the trail have a total difficulty, summed over their
+        mountains, of at most max_diff.
+        Unlike count_paths this limits the sum, not each mountain, so it convolves the
+        distributions of total difficulty over the branches.
+        Complexity: O(n * D^2) worst case where n is the number of nodes and D = max_diff + 1,
+        independent of the number of paths
+        """
+        if max_diff < 0:
+            return 0
+        offset, counts = _path_distribution(self, _mountain_difficulty, max_diff)
+        return int(counts[:max(0, max_diff - offset + 1)].sum()) if offset <= max_diff else 0
+
+    #Defines a method to get the distribution of total difficulty over all paths
+    def path_difficulty_histogram(self) -> ndarray:
+        """
+        Returns a NumPy array where entry d is the number of paths with a total difficulty of d,
+        from 0 up to the largest total difficulty of any path.
+        Complexity: O(n * D^2) worst case where n is the number of nodes and D the largest
+        total difficulty, independent of the number of paths
+        """
+        return _path_histogram(self, _mountain_difficulty)
+
+    #Defines a method to get the distribution of total length over all paths
+    def path_length_histogram(self) -> ndarray:
+        """
+        Returns a NumPy array where entry l is the number of paths with a total length of l,
+        from 0 up to the longest path.
+        Complexity: O(n * L^2) worst case where n is the number of nodes and L the longest path length
+        """
+        return _path_histogram(self, _mountain_length)
+
     #Defines a method to follow a path and add mountains based on a personality
-    def follow_path(self, personality: WalkerPersonality) -> None:
+    def follow_path(self, personality: WalkerPersonality, on_mountain: Callable[[Mountain], Any]|None=None) -> None:
         """
         Follow a path and add mountains according to a personality.
+        If on_mountain is given, each mountain is passed to it instead of personality.add_mountain,
+        so nothing is kept beyond what the callback keeps.
+        Complexity: O(n) for best and worst case where n is the total number of trails 
+        """
+        #Personalities with a decision key replay the route cached for it on a compiled trail
+        compiled = self.compiled()
+        if compiled is not None and personality.decision_key() is not None:
+            compiled.follow_path(personality, on_mountain)
+            return
+        if on_mountain is None:
+            on_mountain = personality.add_mountain
+        for mountain in self.iter_follow_path(personality):
+            on_mountain(mountain)
+
+    #Defines a generator version of follow_path
+    def iter_follow_path(self, personality: WalkerPersonality) -> Iterator[Mountain]:
+        """
+        Yields the mountains on the path a personality follows, in order, asking the
+        personality to select a branch at each split. Mountains are not added to the
+        personality, that is left to the caller (follow_path does it).
+        Only the trails still to follow after each split are held, so memory is O(depth).
         Complexity: O(n) for best and worst case where n is the total number of trails 
         """
         #first importing personality and establishing variables, no path which tells us when we've exhausted alll paths
         #remaining path which is a linked stack that will contain all the possible paths to go after encountering a trail split
         from personality import PersonalityDecision
+        personality.start_walk(self)
         remaining_paths = LinkedStack()
         no_paths = False
         current_path = self.store
 
         #while loop will continue to iterate until there are no more paths to travel
         while not no_paths:
-            #if we encounter a trail series the mountain is added and the path we follow is updated to be following
+            #if we encounter a trail series the mountain is handed out and the path we follow is updated to be following
             if isinstance(current_path, TrailSeries):
-                personality.add_mountain(current_path.mountain)
+                yield current_path.mountain
                 #Chooses a branch based on personality and updates current path accordingly
                 current_path = current_path.following.store
 
@@ -183,73 +407,577 @@ class Trail:
         
         return
         
+    #Defines a method to walk many personalities through the trail at once
+    def follow_paths(self, personalities: Iterable[WalkerPersonality]) -> None:
+        """
+        Follow a path for every personality, adding the same mountains as follow_path would.
+
+        Personalities with the same decision_key walk as one group, so select_branch is only
+        asked once per key at each split, and groups only part where their choices differ.
+        Each walker is handed the mountains of its path in one add_mountains call at the end.
+        Personalities without a decision key walk on their own with follow_path.
+        If the trail has been compiled, every walker replays the route cached for its key instead.
+
+        Complexity: O(W + K*n + W*L) where W is the number of walkers, K the number of distinct
+        decision keys, n the number of nodes and L the length of the longest path walked
+        """
+        from personality import PersonalityDecision
+        compiled = self.compiled()
+        walkers_by_key: dict[Any, list[WalkerPersonality]] = {}
+        for personality in personalities:
+            key = personality.decision_key()
+            if key is None or compiled is not None:
+                self.follow_path(personality)
+            else:
+                personality.start_walk(self)
+                walkers_by_key.setdefault(key, []).append(personality)
+        if not walkers_by_key:
+            return
+
+        #Every walker in a group gets the mountains walked so far by the whole group
+        def hand_over(runs: tuple|None, group: dict[Any, list[WalkerPersonality]]) -> None:
+            parts = []
+            while runs is not None:
+                run, runs = runs
+                parts.append(run)
+            path = [mountain for run in reversed(parts) for mountain in run]
+            for walkers in group.values():
+                for walker in walkers:
+                    walker.add_mountains(path)
+
+        #Each entry is a group of walkers at the same place: the store they are at, the trails that
+        #follow it, the mountains walked so far as a chain of (run, earlier runs), and the walkers by key
+        groups: list = [(self.store, None, None, walkers_by_key)]
+        while groups:
+            current, rest, runs, group = groups.pop()
+            run: list[Mountain] = []
+            while True:
+                if isinstance(current, TrailSeries):
+                    run.append(current.mountain)
+                    current = current.following.store
+                elif isinstance(current, TrailSplit):
+                    rest = (current.following, rest)
+                    if run:
+                        runs = (run, runs)
+                        run = []
+                    top: dict[Any, list[WalkerPersonality]] = {}
+                    bottom: dict[Any, list[WalkerPersonality]] = {}
+                    stopped: dict[Any, list[WalkerPersonality]] = {}
+                    for key, walkers in group.items():
+                        choice = walkers[0].select_branch(current.top, current.bottom)
+                        if choice == PersonalityDecision.BOTTOM:
+                            bottom[key] = walkers
+                        elif choice == PersonalityDecision.TOP:
+                            top[key] = walkers
+                        elif choice == PersonalityDecision.STOP:
+                            stopped[key] = walkers
+                    if stopped:
+                        hand_over(runs, stopped)
+                    if bottom:
+                        groups.append((current.bottom.store, rest, runs, bottom))
+                    if top:
+                        groups.append((current.top.store, rest, runs, top))
+                    break
+                elif rest is not None:
+                    following, rest = rest
+                    current = following.store
+                else:
+                    hand_over((run, runs), group)
+                    break
+
     #Defines a method to collect all mountains in the trail
     def collect_all_mountains(self) -> list[Mountain]:
         """
         Returns a list of all mountains on the trail.
+        Complexity: O(n) for best and worst case where n is the number of nodes in the trail
         """
-        #List storing all the mountains
-        mountains = []
-        #Starts with initial path
-        current_path = self.store
-        #It is a helper function to traverse through the trail and collect mountains
-        def traverse_path(path: TrailStore):
-            nonlocal mountains
-            if isinstance(path, TrailSeries):
-                mountains.append(path.mountain)
-                traverse_path(path.following.store)
-            elif isinstance(path, TrailSplit):
-                traverse_path(path.top.store)
-                traverse_path(path.bottom.store)
-                traverse_path(path.following.store)
-        
-        traverse_path(current_path)
-        return mountains
+        #A pre-order walk meets the mountains in the same order as top, bottom, then following
+        return [
+            trail.store.mountain
+            for trail in iter_preorder(self)
+            if isinstance(trail.store, TrailSeries)
+        ]
 
-        
     #Defines a method to find all paths through the trail with a maximum difficulty level
-    def difficulty_maximum_paths(self, diff: int) -> list[list[Mountain]]:
+    def difficulty_maximum_paths(self, diff: int, shared: bool=False) -> list[list[Mountain]]|TrailPaths:
         """
         Calculates all paths through the trail such that the maximum difficulty 
         of all mountains in the path does not exceed diff.
 
         Args:
             diff: The maximum difficulty allowed.
+            shared: If True, return a TrailPaths instead, which reads like the list of lists
+                but shares the mountains of common prefixes between paths. It holds far less
+                memory when paths share long prefixes, but costs more time per path.
 
         Returns:
             A list of lists, containing the Mountains on each path, in order taken in the path.
+
+        Complexity: O(n + P*L) where n is the number of nodes, P the number of paths returned
+        and L the length of the longest path, or O(n + E) when shared where E is the number
+        of mountains on the paths not shared with an earlier path
         """
-        #List that stores all paths
-        paths = []
-
-        #Defines a helper function that recursively finds paths through the trail
-        def recurse(path: TrailStore, current_difficulty: int, current_path: list[Mountain]=[]) -> list[list[Mountain]]:
-            local_paths = []
-
-            #Sees if it's not exceeding difficulty limit
-            if current_difficulty > diff:
-                return []
-
-            #Handles a segment of the trail with a mountain and the following trail
-            if isinstance(path, TrailSeries):
-                if current_difficulty + path.mountain.difficulty_level <= diff:
-                    new_path = current_path + [path.mountain]
-                    local_paths.append(new_path)  
-                    local_paths += recurse(path.following.store, current_difficulty + path.mountain.difficulty_level, new_path)
-
-            #Handles a branch (split) in the trail
-            elif isinstance(path, TrailSplit):
-                local_paths += recurse(path.top.store, current_difficulty, current_path)
-                local_paths += recurse(path.bottom.store, current_difficulty, current_path)
-                local_paths += recurse(path.following.store, current_difficulty, current_path)
-            
-            return local_paths
+        if shared:
+            return TrailPaths.from_views(self.iter_difficulty_maximum_paths(diff, views=True))
+        return list(self.iter_difficulty_maximum_paths(diff))
+
+    #Defines a generator version of difficulty_maximum_paths
+    def iter_difficulty_maximum_paths(self, diff: int, views: bool=False) -> Iterator[list[Mountain]|PathView]:
+        """
+        Yields the paths of difficulty_maximum_paths one at a time, in the same order.
 
-        #Initiates a recursive function starting from the root of the trail system with a difficulty of 0, 
-        #to find all paths through the mountains that match to the specific maximum difficulty level
-        paths = recurse(self.store, 0)
-        return paths
+        Paths are built in a prefix tree that is shared by every path with the same prefix,
+        so only the paths kept by the caller are held in memory.
 
-    def difficulty_difference_paths(self, max_difference: int) -> list[list[Mountain]]: # Input to this should not exceed k > 50, at most 5 branches.
-        # 1054 ONLY!
-        pass
+        Args:
+            diff: The maximum difficulty allowed.
+            views: If True, yield a PathView of the prefix tree instead of copying each path
+                into a new list.
+
+        Complexity: O(n + P*L) where n is the number of nodes, P the number of paths yielded
+        and L the length of the longest path, or O(n + E) with views where E is the number of
+        mountains on the paths not shared with an earlier path
+        """
+        #A path is abandoned as soon as it reaches a mountain that is too difficult
+        def within_limit(state: None, mountain: Mountain) -> Any:
+            if mountain.difficulty_level > diff:
+                return PRUNE
+            return state
+
+        #A subtrail is skipped when every path through it has a mountain that is too difficult
+        def too_difficult(trail: Trail, state: None) -> bool:
+            peak = trail.summary().min_path_peak
+            return peak is not None and peak > diff
+
+        if not views:
+            for path, _ in _iter_path_buffers(self, within_limit, prune=too_difficult):
+                yield path[:]
+            return
+        for path, _ in iter_paths(self, within_limit, prune=too_difficult):
+            yield path
+
+    def difficulty_difference_paths(self, max_difference: int, shared: bool=False) -> list[list[Mountain]]|TrailPaths:
+        """
+        Calculates all paths through the trail such that the difference between the most
+        and least difficult mountains on the path does not exceed max_difference.
+
+        Args:
+            max_difference: The largest spread of difficulty allowed along a path.
+            shared: If True, return a TrailPaths instead, see difficulty_maximum_paths.
+
+        Returns:
+            A list of lists of the Mountains on each path, in order taken in the path.
+
+        Complexity: O(n + E + P*L) where n is the number of nodes, E the number of mountains
+        stepped onto before a path is cut off, P the number of paths and L the longest path,
+        or O(n + E) when shared
+        """
+        if shared:
+            return TrailPaths.from_views(self.iter_difficulty_difference_paths(max_difference, views=True))
+        return list(self.iter_difficulty_difference_paths(max_difference))
+
+    #Defines a generator version of difficulty_difference_paths
+    def iter_difficulty_difference_paths(self, max_difference: int, views: bool=False) -> Iterator[list[Mountain]|PathView]:
+        """
+        Yields the paths of difficulty_difference_paths one at a time.
+
+        The lowest and highest difficulty seen so far are carried along the walk, and a
+        branch is cut off at the first mountain that spreads them too far, so paths that
+        share a failing prefix are never walked.
+
+        Args:
+            max_difference: The largest spread of difficulty allowed along a path.
+            views: If True, yield PathViews of the prefix tree, see iter_difficulty_maximum_paths.
+
+        Complexity: O(n + E + P*L) where P is the number of paths yielded and L the longest path,
+        or O(n + E) with views, as for difficulty_difference_paths
+        """
+        #The state is the (lowest, highest) difficulty on the path so far
+        def within_spread(state: tuple[int, int]|None, mountain: Mountain) -> Any:
+            difficulty = mountain.difficulty_level
+            if state is None:
+                return (difficulty, difficulty)
+            lowest, highest = state
+            if difficulty < lowest:
+                lowest = difficulty
+            elif difficulty > highest:
+                highest = difficulty
+            else:
+                return state
+            if highest - lowest > max_difference:
+                return PRUNE
+            return (lowest, highest)
+
+        #Every path through a subtrail reaches at least its lowest peak and at most its highest floor
+        def too_spread(trail: Trail, state: tuple[int, int]|None) -> bool:
+            if state is None:
+                return False
+            lowest, highest = state
+            summary = trail.summary()
+            if summary.min_path_peak is not None and summary.min_path_peak - lowest > max_difference:
+                return True
+            return summary.max_path_floor is not None and highest - summary.max_path_floor > max_difference
+
+        if not views:
+            for path, _ in _iter_path_buffers(self, within_spread, prune=too_spread):
+                yield path[:]
+            return
+        for path, _ in iter_paths(self, within_spread, prune=too_spread):
+            yield path
+
+
+# Shared traversal core.
+# Every walk over a trail goes through one of the functions below, which keep
+# their own explicit stack instead of recursing once per node. Long trails in
+# series are therefore limited by memory rather than by the recursion limit.
+
+#Sentinel a path step returns to abandon the current path
+PRUNE = object()
+
+def trail_children(trail: Trail) -> tuple[Trail, ...]:
+    """
+    Returns the subtrails directly below a trail, in the order they are walked:
+    following for a series, top, bottom and following for a split.
+    Complexity: O(1) for best and worst case
+    """
+    store = trail.store
+    if isinstance(store, TrailSeries):
+        return (store.following,)
+    if isinstance(store, TrailSplit):
+        return (store.top, store.bottom, store.following)
+    return ()
+
+def iter_preorder(trail: Trail) -> Iterator[Trail]:
+    """
+    Pre-order visitor: yields every Trail node, each one before its subtrails.
+    Subtrails are visited top, bottom, then following.
+    Complexity: O(n) for best and worst case where n is the number of nodes,
+    with O(number of open splits) extra memory
+    """
+    stack = [trail]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        current = pop()
+        yield current
+        store = current.store
+        if isinstance(store, TrailSeries):
+            push(store.following)
+        elif isinstance(store, TrailSplit):
+            push(store.following)
+            push(store.bottom)
+            push(store.top)
+
+def fold_postorder(root: T, children: Callable[[T], tuple[T, ...]], combine: Callable[..., V]) -> V:
+    """
+    Post-order visitor: computes a value for every node from the values of its children,
+    calling combine(node, *child_values) once all children are done.
+
+    Works on anything tree shaped, children(node) gives the child nodes in walk order.
+    Use trail_children to fold over a Trail.
+    Complexity: O(n) calls to children and combine where n is the number of nodes
+    """
+    values: list = []
+    stack: list = [(root, -1)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        node, count = pop()
+        if count < 0:
+            kids = children(node)
+            if not kids:
+                values.append(combine(node))
+                continue
+            #Revisit this node once all of its children have left their value behind
+            push((node, len(kids)))
+            for kid in reversed(kids):
+                push((kid, -1))
+        else:
+            args = values[-count:]
+            del values[-count:]
+            values.append(combine(node, *args))
+    return values[0]
+
+def _children_without_summary(trail: Trail) -> tuple[Trail, ...]:
+    """
+    The subtrails a summary still has to be worked out for.
+    Complexity: O(1)
+    """
+    store = trail.store
+    if store is None or store._summary is not None:
+        return ()
+    return trail_children(trail)
+
+def _min_known(*values: int|None) -> int|None:
+    """Smallest of the values that are not None, or None if there are none."""
+    known = [value for value in values if value is not None]
+    return min(known) if known else None
+
+def _max_known(*values: int|None) -> int|None:
+    """Largest of the values that are not None, or None if there are none."""
+    known = [value for value in values if value is not None]
+    return max(known) if known else None
+
+def _combine_summary(trail: Trail, *summaries: TrailSummary) -> TrailSummary:
+    """
+    Works out the summary of a trail from those of its subtrails and keeps it on the store.
+    Complexity: O(1)
+    """
+    store = trail.store
+    if store is None:
+        return EMPTY_SUMMARY
+    if store._summary is not None:
+        return store._summary
+    if isinstance(store, TrailSeries):
+        following, = summaries
+        difficulty = store.mountain.difficulty_level
+        summary = TrailSummary(
+            mountains=following.mountains + 1,
+            length=following.length + store.mountain.length,
+            min_difficulty=_min_known(difficulty, following.min_difficulty),
+            max_difficulty=_max_known(difficulty, following.max_difficulty),
+            min_path_difficulty=following.min_path_difficulty + difficulty,
+            max_path_difficulty=following.max_path_difficulty + difficulty,
+            min_path_peak=_max_known(difficulty, following.min_path_peak),
+            max_path_floor=_min_known(difficulty, following.max_path_floor),
+            paths=following.paths,
+        )
+    else:
+        top, bottom, following = summaries
+        #A path takes one of the branches and then the following trail.
+        #A branch with an empty path has no peak or floor to add, hence the None checks.
+        if top.min_path_peak is None or bottom.min_path_peak is None:
+            branch_peak = None
+        else:
+            branch_peak = min(top.min_path_peak, bottom.min_path_peak)
+        if top.max_path_floor is None or bottom.max_path_floor is None:
+            branch_floor = None
+        else:
+            branch_floor = max(top.max_path_floor, bottom.max_path_floor)
+        summary = TrailSummary(
+            mountains=top.mountains + bottom.mountains + following.mountains,
+            length=top.length + bottom.length + following.length,
+            min_difficulty=_min_known(top.min_difficulty, bottom.min_difficulty, following.min_difficulty),
+            max_difficulty=_max_known(top.max_difficulty, bottom.max_difficulty, following.max_difficulty),
+            min_path_difficulty=min(top.min_path_difficulty, bottom.min_path_difficulty) + following.min_path_difficulty,
+            max_path_difficulty=max(top.max_path_difficulty, bottom.max_path_difficulty) + following.max_path_difficulty,
+            min_path_peak=_max_known(branch_peak, following.min_path_peak),
+            max_path_floor=_min_known(branch_floor, following.max_path_floor),
+            paths=(top.paths + bottom.paths) * following.paths,
+        )
+    store._summary = summary
+    return summary
+
+def _mountain_difficulty(mountain: Mountain) -> int:
+    return mountain.difficulty_level
+
+def _mountain_length(mountain: Mountain) -> int:
+    return mountain.length
+
+def _path_histogram(trail: Trail, weight: Callable[[Mountain], int]) -> ndarray:
+    """
+    Number of paths by their total weight, indexed from 0.
+    Complexity: O(n * W^2) worst case where W is the largest total weight
+    """
+    import numpy as np
+    offset, counts = _path_distribution(trail, weight)
+    if offset < 0:
+        raise ValueError("Path histograms need non-negative mountain values.")
+    return np.concatenate((np.zeros(offset, dtype=counts.dtype), counts))
+
+def _path_distribution(trail: Trail, weight: Callable[[Mountain], int], cap: int|None=None) -> tuple[int, ndarray]:
+    """
+    Works out how many paths through the trail have each total weight, by dynamic programming
+    over the series and splits rather than by listing the paths.
+
+    The result is (offset, counts) where counts[i] paths have a total weight of offset + i.
+    A series only moves the offset, the two branches of a split are added together and the
+    result is convolved with the distribution of the following trail.
+    If cap is given, totals above it are dropped as soon as they appear (only when every
+    weight is non-negative, so a total can never come back under the cap).
+    Complexity: O(n * W^2) worst case where W is the range of totals kept
+    """
+    import numpy as np
+    #Counts can outgrow 64 bits on trails with many splits, fall back to Python integers then
+    dtype = np.int64 if trail.summary().paths < 2**63 else object
+    if cap is not None and any(weight(mountain) < 0 for mountain in trail.collect_all_mountains()):
+        cap = None
+
+    def keep_under_cap(offset: int, counts: ndarray) -> tuple[int, ndarray]:
+        if cap is not None and offset + len(counts) - 1 > cap:
+            counts = counts[:max(0, cap - offset + 1)]
+            if len(counts) == 0:
+                counts = np.zeros(1, dtype=dtype)
+                offset = 0
+        return offset, counts
+
+    def combine(current: Trail, *parts: tuple[int, ndarray]) -> tuple[int, ndarray]:
+        store = current.store
+        if store is None:
+            return 0, np.ones(1, dtype=dtype)
+        if isinstance(store, TrailSeries):
+            (offset, counts), = parts
+            return keep_under_cap(offset + weight(store.mountain), counts)
+        (top_offset, top), (bottom_offset, bottom), (following_offset, following) = parts
+        #Line the two branches up on the same offset and add them
+        offset = min(top_offset, bottom_offset)
+        branches = np.zeros(max(top_offset + len(top), bottom_offset + len(bottom)) - offset, dtype=dtype)
+        branches[top_offset - offset:top_offset - offset + len(top)] += top
+        branches[bottom_offset - offset:bottom_offset - offset + len(bottom)] += bottom
+        return keep_under_cap(offset + following_offset, np.convolve(branches, following))
+
+    return fold_postorder(trail, trail_children, combine)
+
+def iter_paths(trail: Trail, step: Callable[[Any, Mountain], Any]|None=None, state: Any=None,
+               prune: Callable[[Trail, Any], bool]|None=None) -> Iterator[tuple[PathView, Any]]:
+    """
+    Path-aware visitor: yields (path, state) for every path through the trail,
+    taking the top branch of each split before the bottom one.
+
+    step(state, mountain) is called as each mountain is added to the path and returns
+    the new state, or PRUNE to abandon every path that shares the current prefix.
+
+    prune(subtrail, state), if given, is asked before walking the trail and each part of a split.
+    Returning True skips that subtrail, and for the trail following a split the whole split.
+
+    Paths are built as a persistent prefix tree (see trail_paths), so every path with the same
+    prefix shares it, and each yielded PathView stays valid after the generator moves on.
+    Complexity: O(n + total length of all paths explored) where n is the number of nodes
+    """
+    if prune is not None and prune(trail, state):
+        return
+    #Each entry is a branch still to walk: the subtrail, what follows it, the path so far, its length and state
+    stack: list = [(trail, None, None, 0, state)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        current, rest, tail, depth, state = pop()
+        while True:
+            store = current.store
+            if isinstance(store, TrailSeries):
+                if step is not None:
+                    state = step(state, store.mountain)
+                    if state is PRUNE:
+                        break
+                tail = (store.mountain, tail)
+                depth += 1
+                current = store.following
+            elif isinstance(store, TrailSplit):
+                if prune is not None and prune(store.following, state):
+                    break
+                #Both branches continue into the following trail once they are done
+                rest = (store.following, rest)
+                if prune is None or not prune(store.bottom, state):
+                    push((store.bottom, rest, tail, depth, state))
+                if prune is not None and prune(store.top, state):
+                    break
+                current = store.top
+            elif rest is not None:
+                current, rest = rest
+            else:
+                yield PathView(tail, depth), state
+                break
+
+def _iter_path_buffers(trail: Trail, step: Callable[[Any, Mountain], Any]|None=None, state: Any=None,
+                       prune: Callable[[Trail, Any], bool]|None=None) -> Iterator[tuple[list[Mountain], Any]]:
+    """
+    Walks the same paths as iter_paths, but yields each one in a list that is reused for the
+    next path, so it is only valid until the generator is resumed. Copying it out is cheaper
+    than building the prefix tree when every path is going to be copied into a list anyway.
+    Complexity: O(n + total length of all paths explored) where n is the number of nodes
+    """
+    if prune is not None and prune(trail, state):
+        return
+    path: list[Mountain] = []
+    #Each entry is a branch still to walk: the subtrail, what follows it, the prefix length and state
+    stack: list = [(trail, None, 0, state)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        current, rest, depth, state = pop()
+        del path[depth:]
+        while True:
+            store = current.store
+            if isinstance(store, TrailSeries):
+                if step is not None:
+                    state = step(state, store.mountain)
+                    if state is PRUNE:
+                        break
+                path.append(store.mountain)
+                current = store.following
+            elif isinstance(store, TrailSplit):
+                if prune is not None and prune(store.following, state):
+                    break
+                rest = (store.following, rest)
+                if prune is None or not prune(store.bottom, state):
+                    push((store.bottom, rest, len(path), state))
+                if prune is not None and prune(store.top, state):
+                    break
+                current = store.top
+            elif rest is not None:
+                current, rest = rest
+            else:
+                yield path, state
+                break
+
+def structurally_equal(first: Trail|TrailStore, second: Trail|TrailStore) -> bool:
+    """
+    Compares two trails node by node, the same way the dataclass equality would,
+    without recursing. Shared subtrails are only compared once by identity.
+    Complexity: O(n) worst case where n is the number of nodes in the smaller trail
+    """
+    stack = [(first, second)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        a, b = pop()
+        if a is b:
+            continue
+        if a.__class__ is not b.__class__ and not (isinstance(a, Trail) and isinstance(b, Trail)):
+            return False
+        if isinstance(a, Trail):
+            push((a.store, b.store))
+        elif isinstance(a, TrailSeries):
+            if a.mountain != b.mountain:
+                return False
+            push((a.following, b.following))
+        elif isinstance(a, TrailSplit):
+            push((a.following, b.following))
+            push((a.bottom, b.bottom))
+            push((a.top, b.top))
+        elif a != b:
+            return False
+    return True
+
+def trail_repr(node: Trail|TrailStore) -> str:
+    """
+    Builds the same text as the dataclass repr, emitting the pieces from an explicit stack.
+    Complexity: O(size of the output)
+    """
+    parts: list[str] = []
+    stack: list = [node]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        item = pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif isinstance(item, Trail):
+            parts.append(f"{item.__class__.__qualname__}(store=")
+            push(")")
+            push(item.store)
+        elif isinstance(item, TrailSeries):
+            parts.append(f"{item.__class__.__qualname__}(mountain={item.mountain!r}, following=")
+            push(")")
+            push(item.following)
+        elif isinstance(item, TrailSplit):
+            parts.append(f"{item.__class__.__qualname__}(top=")
+            push(")")
+            push(item.following)
+            push(", following=")
+            push(item.bottom)
+            push(", bottom=")
+            push(item.top)
+        else:
+            parts.append(repr(item))
+    return "".join(parts)
@@ -0,0 +1,222 @@
+"""
+Compact binary trail stores, read through mmap one node at a time.
+
+A store is laid out as
+    header          magic, version, table item size, counts and section positions
+    name offsets    where each mountain name starts in the name data
+    name data       every distinct mountain name once, as varint length + utf-8
+    node offsets    where each node record starts in the node stream, by pre-order node index
+    node stream     one record per node in pre-order (a node, then its top, bottom and following):
+                        0                                           empty trail
+                        1 name index, difficulty, length            series, followed by node i + 1
+                        2 top size, bottom size                     split, with the top at node i + 1
+                    where sizes are node counts of whole subtrails, so a split knows where its
+                    bottom and following start without reading its top.
+Every number in a record is a varint, difficulty and length zigzag encoded so negatives fit too.
+
+BinaryTrailStore maps the file and hands out LazyTrails, so opening a store reads only its header,
+and a query reads only the pages holding the nodes it walks.
+"""
+
+from __future__ import annotations
+import mmap
+import struct
+from typing import IO
+
+from lazy_trail import LazyTrail
+from mountain import Mountain
+from trail import Trail, TrailSeries, TrailSplit, TrailStore
+
+MAGIC = b"TRAILBIN"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHH4xQQQQQQ")
+_EMPTY, _SERIES, _SPLIT = range(3)
+
+def dump(trail: Trail, fp: IO[bytes]) -> None:
+    """
+    Writes trail to the binary file fp in the store format above.
+    Shared subtrails are written once for every place they appear.
+    Complexity: O(n) where n is the number of nodes
+    """
+    names: dict[str, int] = {}
+    #One entry per node in pre-order: None for an empty trail, (name index, difficulty, length)
+    #for a series, and [node index, bottom index, following index] for a split
+    records: list = []
+    stack: list = [trail]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, tuple):
+            #A split's top (or bottom) is done, so the next node starts its bottom (or following)
+            record, slot = item
+            record[slot] = len(records)
+            continue
+        store = item.store
+        if store is None:
+            records.append(None)
+        elif isinstance(store, TrailSeries):
+            mountain = store.mountain
+            index = names.setdefault(mountain.name, len(names))
+            records.append((index, _zigzag(mountain.difficulty_level), _zigzag(mountain.length)))
+            stack.append(store.following)
+        else:
+            record = [len(records), 0, 0]
+            records.append(record)
+            stack.extend((store.following, (record, 2), store.bottom, (record, 1), store.top))
+
+    name_data = bytearray()
+    name_offsets = []
+    for name in names:
+        name_offsets.append(len(name_data))
+        encoded = name.encode("utf-8")
+        _write_varint(name_data, len(encoded))
+        name_data += encoded
+    stream = bytearray()
+    node_offsets = []
+    for record in records:
+        node_offsets.append(len(stream))
+        if record is None:
+            stream.append(_EMPTY)
+        elif isinstance(record, tuple):
+            stream.append(_SERIES)
+            for value in record:
+                _write_varint(stream, value)
+        else:
+            node, bottom, following = record
+            stream.append(_SPLIT)
+            _write_varint(stream, bottom - node - 1)
+            _write_varint(stream, following - bottom)
+
+    item_size = 4 if max(len(stream), len(name_data)) < 1 << 32 else 8
+    name_offsets_at = _HEADER.size
+    name_data_at = name_offsets_at + item_size * len(name_offsets)
+    node_offsets_at = name_data_at + len(name_data)
+    stream_at = node_offsets_at + item_size * len(node_offsets)
+    fp.write(_HEADER.pack(MAGIC, VERSION, item_size, len(node_offsets), len(name_offsets),
+                          name_offsets_at, name_data_at, node_offsets_at, stream_at))
+    fp.write(_pack_offsets(name_offsets, item_size))
+    fp.write(name_data)
+    fp.write(_pack_offsets(node_offsets, item_size))
+    fp.write(stream)
+
+def _pack_offsets(offsets: list[int], item_size: int) -> bytes:
+    return struct.pack(f"<{len(offsets)}{'I' if item_size == 4 else 'Q'}", *offsets)
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data: mmap.mmap, pos: int) -> tuple[int, int]:
+    #Returns the varint at pos and the position after it
+    byte = data[pos]
+    value = byte & 0x7F
+    shift = 7
+    while byte & 0x80:
+        pos += 1
+        byte = data[pos]
+        value |= (byte & 0x7F) << shift
+        shift += 7
+    return value, pos + 1
+
+class BinaryTrailStore:
+    """
+    A binary trail store mapped into memory, handing out LazyTrails for its nodes.
+    Nodes are only read and built once a query reaches them.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Maps the store at path and reads its header.
+        Complexity: O(1)
+        """
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._data) < _HEADER.size:
+            raise ValueError(f"{path} is too short to be a binary trail store")
+        (magic, version, item_size, self._node_count, self._name_count, self._name_offsets_at,
+         self._name_data_at, self._node_offsets_at, self._stream_at) = _HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary trail store")
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} binary trail store, expected version {VERSION}")
+        self._offset = struct.Struct("<I" if item_size == 4 else "<Q")
+        #Names read so far, by index
+        self._names: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self._node_count
+
+    def __enter__(self) -> BinaryTrailStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Unmaps the store. Nodes already loaded stay usable, the others can no longer be read.
+        Complexity: O(1)
+        """
+        self._data.close()
+
+    def root(self) -> LazyTrail:
+        """
+        Returns the whole stored trail, loaded as it is walked.
+        Complexity: O(1)
+        """
+        return LazyTrail(self, 0)
+
+    def name(self, index: int) -> str:
+        """
+        Returns the mountain name with this index in the name table.
+        Complexity: O(length of the name)
+        """
+        name = self._names.get(index)
+        if name is None:
+            if not 0 <= index < self._name_count:
+                raise ValueError(f"Name {index} is not in the store")
+            start = self._name_data_at + self._offset.unpack_from(self._data, self._name_offsets_at + index * self._offset.size)[0]
+            length, start = _read_varint(self._data, start)
+            name = self._names[index] = self._data[start:start + length].decode("utf-8")
+        return name
+
+    def load_store(self, index: int) -> TrailStore:
+        """
+        Builds the store of the node with this pre-order index, with LazyTrails for its subtrails.
+        Complexity: O(1)
+        """
+        if not 0 <= index < self._node_count:
+            raise ValueError(f"Node {index} is not in the store")
+        data = self._data
+        pos = self._stream_at + self._offset.unpack_from(data, self._node_offsets_at + index * self._offset.size)[0]
+        tag = data[pos]
+        if tag == _EMPTY:
+            return None
+        if tag == _SERIES:
+            name, pos = _read_varint(data, pos + 1)
+            difficulty_level, pos = _read_varint(data, pos)
+            length, pos = _read_varint(data, pos)
+            mountain = Mountain(self.name(name), _unzigzag(difficulty_level), _unzigzag(length))
+            return TrailSeries(mountain, LazyTrail(self, index + 1))
+        if tag == _SPLIT:
+            top_size, pos = _read_varint(data, pos + 1)
+            bottom_size, pos = _read_varint(data, pos)
+            bottom = index + 1 + top_size
+            return TrailSplit(LazyTrail(self, index + 1), LazyTrail(self, bottom), LazyTrail(self, bottom + bottom_size))
+        raise ValueError(f"Node {index} has an unknown record type {tag}")
+
+def load(path: str) -> LazyTrail:
+    """
+    Opens the binary store at path, returning its trail, which is read as it is walked.
+    The store stays mapped for as long as any of its unloaded nodes are around.
+    Complexity: O(1)
+    """
+    return BinaryTrailStore(path).root()
@@ -0,0 +1,215 @@
+"""
+A cursor (zipper) for editing a trail by address instead of by holding the node to change.
+
+An address is the list of steps taken from the root, each one of
+    F   the trail following a series or split
+    T   the top branch of a split
+    B   the bottom branch of a split
+written like "F F T F B" (the spaces are optional). The empty address is the root itself.
+
+Edits through a cursor return a new root: only the stores on the way down to the cursor
+are copied, every other subtrail is shared with the old root.
+"""
+
+from __future__ import annotations
+from typing import Iterable
+
+from mountain import Mountain
+from trail import Trail, TrailSeries, TrailSplit, TrailStore
+
+#The field of the parent store each step goes through
+STEPS = {"F": "following", "T": "top", "B": "bottom"}
+
+def parse_address(address: str|Iterable[str]) -> list[str]:
+    """
+    Splits an address into its steps, checking each one.
+    Complexity: O(length of the address)
+    """
+    steps = [step for step in address if not step.isspace()] if isinstance(address, str) else list(address)
+    for step in steps:
+        if step not in STEPS:
+            raise ValueError(f"Unknown step {step!r} in trail address, expected F, T or B")
+    return steps
+
+class TrailCursor:
+    """
+    A position in a trail: the subtrail there, and the chain of stores above it back to the root.
+    Cursors are never changed, moving or editing gives a new one (or a new root).
+    """
+
+    __slots__ = ("root", "trail", "_spine", "_depth")
+
+    def __init__(self, root: Trail, address: str|Iterable[str]="") -> None:
+        """
+        Makes a cursor at address in root.
+        Complexity: O(length of the address)
+        """
+        self.root = root
+        self.trail = root
+        #Linked chain of (parent trail, step taken from it, rest of the chain) up to the root
+        self._spine: tuple|None = None
+        self._depth = 0
+        for step in parse_address(address):
+            self._spine = (self.trail, step, self._spine)
+            self.trail = self._child(self.trail, step)
+            self._depth += 1
+
+    @staticmethod
+    def _child(trail: Trail, step: str) -> Trail:
+        store = trail.store
+        if isinstance(store, TrailSplit) or (isinstance(store, TrailSeries) and step == "F"):
+            return getattr(store, STEPS[step])
+        raise ValueError(f"Cannot take step {step!r} from {type(store).__name__ if store is not None else 'an empty trail'}")
+
+    def _moved(self, trail: Trail, spine: tuple|None, depth: int) -> TrailCursor:
+        cursor = object.__new__(TrailCursor)
+        cursor.root = self.root
+        cursor.trail = trail
+        cursor._spine = spine
+        cursor._depth = depth
+        return cursor
+
+    @property
+    def store(self) -> TrailStore:
+        return self.trail.store
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @property
+    def address(self) -> str:
+        """
+        The address of the cursor from the root, e.g. "F T F".
+        Complexity: O(depth)
+        """
+        steps = []
+        spine = self._spine
+        while spine is not None:
+            _, step, spine = spine
+            steps.append(step)
+        return " ".join(reversed(steps))
+
+    def __repr__(self) -> str:
+        return f"TrailCursor(address={self.address!r}, trail={self.trail!r})"
+
+    # NAVIGATION
+
+    def step(self, step: str) -> TrailCursor:
+        """
+        Returns a cursor one step further down.
+        Complexity: O(1)
+        """
+        if step not in STEPS:
+            raise ValueError(f"Unknown step {step!r} in trail address, expected F, T or B")
+        return self._moved(self._child(self.trail, step), (self.trail, step, self._spine), self._depth + 1)
+
+    def following(self) -> TrailCursor:
+        return self.step("F")
+
+    def top(self) -> TrailCursor:
+        return self.step("T")
+
+    def bottom(self) -> TrailCursor:
+        return self.step("B")
+
+    def walk(self, address: str|Iterable[str]) -> TrailCursor:
+        """
+        Returns a cursor further down by the steps of address.
+        Complexity: O(length of the address)
+        """
+        cursor = self
+        for step in parse_address(address):
+            cursor = cursor.step(step)
+        return cursor
+
+    def up(self) -> TrailCursor:
+        """
+        Returns a cursor at the trail this one was reached from.
+        Complexity: O(1)
+        """
+        if self._spine is None:
+            raise ValueError("The root of a trail has nothing above it")
+        parent, _, spine = self._spine
+        return self._moved(parent, spine, self._depth - 1)
+
+    # EDITS
+
+    def replace_subtrail(self, new_trail: Trail) -> Trail:
+        """
+        Returns a new root where the subtrail at the cursor is new_trail.
+        Only the stores above the cursor are copied, everything else is shared with the old root.
+        Complexity: O(depth)
+        """
+        spine = self._spine
+        while spine is not None:
+            parent, step, spine = spine
+            store = parent.store
+            if isinstance(store, TrailSeries):
+                new_trail = Trail(TrailSeries(store.mountain, new_trail))
+            elif step == "T":
+                new_trail = Trail(TrailSplit(new_trail, store.bottom, store.following))
+            elif step == "B":
+                new_trail = Trail(TrailSplit(store.top, new_trail, store.following))
+            else:
+                new_trail = Trail(TrailSplit(store.top, store.bottom, new_trail))
+        return new_trail
+
+    def _series(self) -> TrailSeries:
+        if not isinstance(self.store, TrailSeries):
+            raise ValueError(f"Expected a mountain at {self.address!r}")
+        return self.store
+
+    def _split(self) -> TrailSplit:
+        if not isinstance(self.store, TrailSplit):
+            raise ValueError(f"Expected a branch at {self.address!r}")
+        return self.store
+
+    def add_mountain_before(self, mountain: Mountain) -> Trail:
+        """
+        Returns a new root with mountain added before the subtrail at the cursor.
+        Complexity: O(depth)
+        """
+        return self.replace_subtrail(self.trail.add_mountain_before(mountain))
+
+    def add_empty_branch_before(self) -> Trail:
+        """
+        Returns a new root with an empty branch added before the subtrail at the cursor.
+        Complexity: O(depth)
+        """
+        return self.replace_subtrail(self.trail.add_empty_branch_before())
+
+    def add_mountain_after(self, mountain: Mountain) -> Trail:
+        """
+        Returns a new root with mountain added after the mountain at the cursor.
+        Complexity: O(depth)
+        """
+        return self.replace_subtrail(Trail(self._series().add_mountain_after(mountain)))
+
+    def add_empty_branch_after(self) -> Trail:
+        """
+        Returns a new root with an empty branch added after the mountain at the cursor.
+        Complexity: O(depth)
+        """
+        return self.replace_subtrail(Trail(self._series().add_empty_branch_after()))
+
+    def replace_mountain(self, mountain: Mountain) -> Trail:
+        """
+        Returns a new root with the mountain at the cursor swapped for mountain.
+        Complexity: O(depth)
+        """
+        return self.replace_subtrail(Trail(self._series().replace_mountain(mountain)))
+
+    def remove_mountain(self) -> Trail:
+        """
+        Returns a new root without the mountain at the cursor.
+        Complexity: O(depth)
+        """
+        return self.replace_subtrail(Trail(self._series().remove_mountain()))
+
+    def remove_branch(self) -> Trail:
+        """
+        Returns a new root without the branch at the cursor, keeping the trail that followed it.
+        Complexity: O(depth)
+        """
+        return self.replace_subtrail(Trail(self._split().remove_branch()))
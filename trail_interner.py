@@ -0,0 +1,170 @@
+"""
+Hash-consing for trails: one canonical instance for each distinct structure.
+
+Trails built through a TrailInterner share every equal subtrail, so comparing two of them
+is an identity check, repeated parts of a trail are only stored once, and values cached on
+a node (such as its summary) are reused by every trail that contains it.
+"""
+
+from __future__ import annotations
+
+from mountain import Mountain
+from trail import Trail, TrailSeries, TrailSplit, TrailStore, fold_postorder, trail_children
+
+class TrailInterner:
+    """
+    Keeps the canonical Mountain, TrailSeries, TrailSplit and Trail for each structure seen.
+
+    A node is keyed on its values (for a mountain) or on the identity of its canonical parts,
+    so looking one up is O(1). The interner holds on to every canonical node, which keeps
+    the identities in its keys valid for as long as the interner is alive.
+
+    The edit methods on trails keep working on interned trails: they build new nodes around
+    the untouched (still canonical) subtrails, and intern brings the result back in by only
+    looking at the new nodes. Interned mountains are shared, so they must not be changed in place.
+    """
+
+    def __init__(self) -> None:
+        """
+        Complexity: O(1)
+        """
+        self._mountains: dict[tuple[str, int, int], Mountain] = {}
+        self._series: dict[tuple[int, int], TrailSeries] = {}
+        self._splits: dict[tuple[int, int, int], TrailSplit] = {}
+        #Canonical Trail for each canonical store, by identity of the store
+        self._trails: dict[int, Trail] = {}
+        self._empty = Trail(None)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of canonical nodes held, mountains included.
+        Complexity: O(1)
+        """
+        return len(self._mountains) + len(self._series) + len(self._splits) + len(self._trails) + 1
+
+    def mountain(self, name: str, difficulty_level: int, length: int) -> Mountain:
+        """
+        Returns the canonical mountain with these values.
+        Complexity: O(1)
+        """
+        key = (name, difficulty_level, length)
+        mountain = self._mountains.get(key)
+        if mountain is None:
+            mountain = self._mountains[key] = Mountain(name, difficulty_level, length)
+        return mountain
+
+    def intern_mountain(self, mountain: Mountain) -> Mountain:
+        """
+        Returns the canonical mountain equal to mountain, which becomes it if there is none yet.
+        Complexity: O(1)
+        """
+        return self._mountains.setdefault((mountain.name, mountain.difficulty_level, mountain.length), mountain)
+
+    def empty(self) -> Trail:
+        """
+        Returns the canonical empty trail.
+        Complexity: O(1)
+        """
+        return self._empty
+
+    def series(self, mountain: Mountain, following: Trail) -> TrailSeries:
+        """
+        Returns the canonical series of mountain followed by following.
+        Complexity: O(1) if following is already interned, otherwise O(size of following)
+        """
+        return self._series_of(self.intern_mountain(mountain), self.intern(following))
+
+    def split(self, top: Trail, bottom: Trail, following: Trail) -> TrailSplit:
+        """
+        Returns the canonical split with these branches and following trail.
+        Complexity: O(1) if all three are already interned, otherwise O(size of the ones that are not)
+        """
+        return self._split_of(self.intern(top), self.intern(bottom), self.intern(following))
+
+    def trail(self, store: TrailStore) -> Trail:
+        """
+        Returns the canonical trail with this store.
+        Complexity: O(1) if the parts of store are already interned, otherwise O(size of the ones that are not)
+        """
+        if store is None:
+            return self._empty
+        if isinstance(store, TrailSeries):
+            return self._trail_of(self.series(store.mountain, store.following))
+        return self._trail_of(self.split(store.top, store.bottom, store.following))
+
+    def intern(self, trail: Trail) -> Trail:
+        """
+        Returns the canonical trail equal to trail.
+        Subtrails that are already canonical are not walked again, so interning the result
+        of an edit on an interned trail only costs the nodes the edit made.
+        Complexity: O(1) for a canonical trail, otherwise O(number of nodes that are not canonical)
+        """
+        return fold_postorder(trail, self._children_to_intern, self._combine)
+
+    def is_canonical(self, trail: Trail) -> bool:
+        """
+        Returns whether trail is the canonical instance of its structure.
+        Complexity: O(1)
+        """
+        if trail.store is None:
+            return trail is self._empty
+        return self._trails.get(id(trail.store)) is trail
+
+    def clear(self) -> None:
+        """
+        Forgets every canonical node. Trails interned before stay valid, but are no longer canonical.
+        Complexity: O(n) where n is the number of canonical nodes
+        """
+        self._mountains.clear()
+        self._series.clear()
+        self._splits.clear()
+        self._trails.clear()
+        self._empty = Trail(None)
+
+    def _children_to_intern(self, trail: Trail) -> tuple[Trail, ...]:
+        #A canonical trail is a leaf for the walk, everything under it is canonical too
+        if self.is_canonical(trail):
+            return ()
+        return trail_children(trail)
+
+    def _combine(self, trail: Trail, *children: Trail) -> Trail:
+        store = trail.store
+        if store is None or not children:
+            return self._empty if store is None else trail
+        if isinstance(store, TrailSeries):
+            following, = children
+            mountain = self.intern_mountain(store.mountain)
+            #Adopt the node as it is when its parts are canonical already, which keeps its caches
+            if mountain is store.mountain and following is store.following:
+                canonical = self._series.setdefault((id(mountain), id(following)), store)
+            else:
+                canonical = self._series_of(mountain, following)
+        else:
+            top, bottom, following = children
+            if top is store.top and bottom is store.bottom and following is store.following:
+                canonical = self._splits.setdefault((id(top), id(bottom), id(following)), store)
+            else:
+                canonical = self._split_of(top, bottom, following)
+        if canonical is store:
+            return self._trails.setdefault(id(store), trail)
+        return self._trail_of(canonical)
+
+    def _series_of(self, mountain: Mountain, following: Trail) -> TrailSeries:
+        key = (id(mountain), id(following))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = TrailSeries(mountain, following)
+        return series
+
+    def _split_of(self, top: Trail, bottom: Trail, following: Trail) -> TrailSplit:
+        key = (id(top), id(bottom), id(following))
+        split = self._splits.get(key)
+        if split is None:
+            split = self._splits[key] = TrailSplit(top, bottom, following)
+        return split
+
+    def _trail_of(self, store: TrailStore) -> Trail:
+        trail = self._trails.get(id(store))
+        if trail is None:
+            trail = self._trails[id(store)] = Trail(store)
+        return trail
@@ -0,0 +1,166 @@
+"""
+Paths through a trail kept as a persistent prefix tree.
+
+A path is a tail pointer into the tree: each node is a (mountain, parent) pair and the
+empty path is None. Paths that share a prefix share the nodes for it, so a path costs
+one node per mountain it does not share with a path found before it.
+"""
+
+from __future__ import annotations
+from array import array
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+# Avoid circular imports for typing.
+if TYPE_CHECKING:
+    from mountain import Mountain
+
+#A node of the prefix tree, None being the root (the empty path)
+PathNode = tuple
+
+def path_to_list(tail: PathNode|None, length: int) -> list[Mountain]:
+    """
+    Builds the list of mountains from the root of the tree down to tail.
+    Complexity: O(length)
+    """
+    path: list = [None] * length
+    index = length - 1
+    while tail is not None:
+        path[index], tail = tail
+        index -= 1
+    return path
+
+class PathView(Sequence):
+    """
+    A read-only view of one path in the prefix tree.
+
+    Handed out by the streaming path queries so that counting or filtering paths does not
+    copy them. The tree is never changed, so a view stays valid after the query moves on.
+    """
+
+    __slots__ = ("_tail", "_length")
+
+    def __init__(self, tail: PathNode|None, length: int) -> None:
+        self._tail = tail
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        #Walk up from the end of the path
+        node = self._tail
+        for _ in range(self._length - 1 - index):
+            node = node[1]
+        return node[0]
+
+    def __iter__(self) -> Iterator[Mountain]:
+        return iter(self.to_list())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, PathView):
+            return self._tail is other._tail or self.to_list() == other.to_list()
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def to_list(self) -> list[Mountain]:
+        """
+        Copies the path into a new list.
+        Complexity: O(length)
+        """
+        return path_to_list(self._tail, self._length)
+
+    def __repr__(self) -> str:
+        return f"PathView({self.to_list()!r})"
+
+class TrailPaths(Sequence):
+    """
+    The paths found by a path query, in the order they were found.
+
+    Only the tail of each path is stored, the mountains live in the shared prefix tree.
+    Reads like a list of lists of mountains: iterating or indexing builds the list for
+    a path on demand, and to_lists converts the whole result.
+    """
+
+    __slots__ = ("_tails", "_lengths")
+
+    def __init__(self, tails: list[PathNode|None]|None=None, lengths: array|None=None) -> None:
+        """
+        Complexity: O(1)
+        """
+        self._tails = tails if tails is not None else []
+        self._lengths = lengths if lengths is not None else array("q")
+
+    @classmethod
+    def from_views(cls, views: Iterable[PathView]) -> TrailPaths:
+        """
+        Collects the paths behind some PathViews, without copying them.
+        Complexity: O(P) where P is the number of views
+        """
+        paths = cls()
+        tails = paths._tails
+        lengths = paths._lengths
+        for view in views:
+            tails.append(view._tail)
+            lengths.append(view._length)
+        return paths
+
+    def __len__(self) -> int:
+        return len(self._tails)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TrailPaths(self._tails[index], self._lengths[index])
+        return path_to_list(self._tails[index], self._lengths[index])
+
+    def __iter__(self) -> Iterator[list[Mountain]]:
+        for tail, length in zip(self._tails, self._lengths):
+            yield path_to_list(tail, length)
+
+    def view(self, index: int) -> PathView:
+        """
+        Returns a PathView of the path at index, without copying it.
+        Complexity: O(1)
+        """
+        return PathView(self._tails[index], self._lengths[index])
+
+    def views(self) -> Iterator[PathView]:
+        """
+        Yields a PathView of every path, without copying them.
+        Complexity: O(1) per path
+        """
+        for tail, length in zip(self._tails, self._lengths):
+            yield PathView(tail, length)
+
+    def to_lists(self) -> list[list[Mountain]]:
+        """
+        Converts the result into a list of lists of mountains.
+        Complexity: O(P*L) where P is the number of paths and L the longest path
+        """
+        return list(self)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TrailPaths):
+            if self._lengths != other._lengths:
+                return False
+            return all(
+                mine is theirs or path_to_list(mine, length) == path_to_list(theirs, length)
+                for mine, theirs, length in zip(self._tails, other._tails, self._lengths)
+            )
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and all(path == list(expected) for path, expected in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TrailPaths({self.to_lists()!r})"
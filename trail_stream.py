@@ -0,0 +1,178 @@
+"""
+Streaming loader for the trail stores written by serialize.
+
+The store is read a chunk at a time and split into JSON tokens, and every object is turned into
+its Mountain, TrailSeries, TrailSplit or Trail as soon as it closes. Only the objects that are
+still open (one per level between the root and the current token) are kept as dicts, so loading
+never holds the whole text or a dict tree of the store, and never recurses however deep it is.
+"""
+
+from __future__ import annotations
+import codecs
+import json
+import re
+from typing import IO, TYPE_CHECKING, Any, Iterable, Iterator
+
+from mountain import Mountain
+from trail import Trail, TrailSeries, TrailSplit
+
+# Avoid circular imports for typing.
+if TYPE_CHECKING:
+    from trail_interner import TrailInterner
+
+CHUNK_SIZE = 1 << 16
+
+#One token after optional whitespace: punctuation, a key with its colon, a string, a number or a literal
+_TOKEN = re.compile(r'[ \t\r\n]*(?:([{}\[\],])|"((?:[^"\\]|\\.)*)"[ \t\r\n]*:|"((?:[^"\\]|\\.)*)"|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)|(true|false|null))')
+#A whole mountain written by serialize, read in one go rather than token by token
+_MOUNTAIN = re.compile(r'[ \t\r\n]*\{[ \t\r\n]*"name"[ \t\r\n]*:[ \t\r\n]*"((?:[^"\\]|\\.)*)"[ \t\r\n]*,[ \t\r\n]*"difficulty_level"[ \t\r\n]*:[ \t\r\n]*(-?[0-9]+)[ \t\r\n]*,[ \t\r\n]*"length"[ \t\r\n]*:[ \t\r\n]*(-?[0-9]+)[ \t\r\n]*\}')
+_SPACE = re.compile(r'[ \t\r\n]*')
+_LITERALS = {"true": True, "false": False, "null": None}
+
+#What the parser expects next
+_VALUE, _KEY_OR_END, _KEY, _COMMA_OR_END, _DONE = range(5)
+
+def load(fp: IO, interner: TrailInterner|None=None, chunk_size: int=CHUNK_SIZE) -> Trail:
+    """
+    Reads the trail stored in fp, a text or binary file.
+    If an interner is given, equal subtrails come out as the same canonical objects.
+    Complexity: O(size of the store), with memory for the Trail, one chunk and one dict per open level
+    """
+    return _parse(_read_chunks(fp, chunk_size), interner)
+
+def loads(text: str|bytes, interner: TrailInterner|None=None) -> Trail:
+    """
+    Reads the trail stored in text.
+    Complexity: O(size of the store)
+    """
+    if isinstance(text, (bytes, bytearray)):
+        text = text.decode("utf-8")
+    return _parse(iter(((text, True),)), interner)
+
+def _read_chunks(fp: IO, chunk_size: int) -> Iterator[tuple[str, bool]]:
+    #Yields (text, whether it is the last chunk), decoding binary files as utf-8 across chunk edges
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while chunk := fp.read(chunk_size):
+        yield (chunk if isinstance(chunk, str) else decoder.decode(chunk)), False
+    yield decoder.decode(b"", final=True), True
+
+def _build(fields: dict[str, Any], interner: TrailInterner|None) -> Any:
+    #Turns a closed object into the node it stores, telling them apart by their keys
+    try:
+        if "store" in fields:
+            store = fields["store"]
+            if interner is not None:
+                return interner.trail(store)
+            return Trail(store)
+        if "mountain" in fields:
+            if interner is not None:
+                return interner.series(fields["mountain"], fields["following"])
+            return TrailSeries(fields["mountain"], fields["following"])
+        if "top" in fields:
+            if interner is not None:
+                return interner.split(fields["top"], fields["bottom"], fields["following"])
+            return TrailSplit(fields["top"], fields["bottom"], fields["following"])
+        if interner is not None:
+            return interner.mountain(**fields)
+        return Mountain(**fields)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Not a trail store object, with keys {sorted(fields)}") from e
+
+def _string(text: str) -> str:
+    return json.loads(f'"{text}"') if "\\" in text else text
+
+def _parse(chunks: Iterable[tuple[str, bool]], interner: TrailInterner|None) -> Trail:
+    match = _TOKEN.match
+    match_mountain = _MOUNTAIN.match
+    space = _SPACE.match
+    make_mountain = Mountain if interner is None else interner.mountain
+    #Open objects, innermost last, each as [fields so far, key of the value being read]
+    stack: list[list] = []
+    expect = _VALUE
+    result = None
+    buffer = ""
+    pos = 0
+    #Characters of the input dropped from the front of the buffer, for error positions
+    offset = 0
+    for chunk, final in chunks:
+        offset += pos
+        buffer = buffer[pos:] + chunk if pos < len(buffer) else chunk
+        pos = 0
+        end = len(buffer)
+        while True:
+            token = match(buffer, pos)
+            #Wait for more input when a token may be cut by the end of the chunk, or is a string
+            #followed only by whitespace, which may still be a key whose colon comes next
+            if token is None or (not final and token.lastindex != 1 and (
+                    token.end() == end or (token.lastindex == 3 and space(buffer, token.end()).end() == end))):
+                break
+            punct, key, string, number, literal = token.groups()
+
+            if expect == _KEY_OR_END or expect == _KEY:
+                if key is not None:
+                    key = _string(key)
+                    stack[-1][1] = key
+                    pos = token.end()
+                    if key == "mountain":
+                        mountain = match_mountain(buffer, pos)
+                        if mountain is not None:
+                            name, difficulty_level, length = mountain.groups()
+                            value = make_mountain(_string(name), int(difficulty_level), int(length))
+                            pos = mountain.end()
+                            stack[-1][0][key] = value
+                            expect = _COMMA_OR_END
+                            continue
+                    expect = _VALUE
+                    continue
+                if punct != "}" or expect == _KEY:
+                    raise ValueError(f"Expected a key at {offset + token.start()}")
+                value = _build(stack.pop()[0], interner)
+            elif expect == _COMMA_OR_END:
+                if punct == ",":
+                    pos = token.end()
+                    expect = _KEY
+                    continue
+                if punct != "}":
+                    raise ValueError(f"Expected ',' or '}}' at {offset + token.start()}")
+                value = _build(stack.pop()[0], interner)
+            elif expect == _VALUE:
+                if punct == "{":
+                    pos = token.end()
+                    stack.append([{}, None])
+                    expect = _KEY_OR_END
+                    continue
+                if string is not None:
+                    value = _string(string)
+                elif number is not None:
+                    value = float(number) if number.strip("-0123456789") else int(number)
+                elif literal is not None:
+                    value = _LITERALS[literal]
+                elif punct == "[":
+                    raise ValueError(f"Trail stores have no arrays, found one at {offset + token.start()}")
+                else:
+                    raise ValueError(f"Expected a value at {offset + token.start()}")
+            else:
+                raise ValueError(f"Extra data after the trail at {offset + token.start()}")
+
+            #A whole value was read, it belongs to the innermost open object or is the result
+            pos = token.end()
+            if stack:
+                frame = stack[-1]
+                key = frame[1]
+                #Drop the draw boxes and cached values, as serialize does
+                if not (key.startswith("_") or key.endswith("_box")):
+                    frame[0][key] = value
+                expect = _COMMA_OR_END
+            else:
+                result = value
+                expect = _DONE
+        if final:
+            break
+    rest = _SPACE.match(buffer, pos).end()
+    if rest != len(buffer):
+        raise ValueError(f"Invalid JSON at {offset + rest}")
+    if expect != _DONE:
+        raise ValueError("The trail store ends before it is complete")
+    if not isinstance(result, Trail):
+        raise ValueError(f"Expected a trail store, found {type(result).__name__}")
+    return result